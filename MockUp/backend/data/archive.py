@@ -0,0 +1,311 @@
+"""
+Project Archive
+Cold storage for finished projects in a second database file
+
+Archiving moves a project and all of its records out of the hot database
+into archive.db next to it, so the working set the API scans and caches
+stays small. The archive is ATTACHed to the shared connection only while a
+project moves in or out; reads open their own read-only connection to it.
+
+A move is two transactions: copy, then delete from the source. Under WAL a
+transaction spanning attached databases is not atomic across the files, so
+a crash between the two leaves the project in both places rather than in
+neither; the hot copy wins on reads and moving again overwrites the stale
+one.
+
+Archive tables are plain copies of the hot tables (no constraints or
+triggers): the data is read-only until restored. Archived document rows
+keep their blobs referenced (blobs.refcount counts them).
+
+Backups copy archive.db next to each database backup. A standby gets it
+with its base snapshot. A move is then replicated as one MOVE_TABLE change,
+which the standby repeats against its own copy; it is never shipped as
+plain deletes. frozen() holds moves off while the two files are copied
+together.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional
+from urllib.parse import quote
+
+
+ARCHIVE_FILE = 'archive.db'
+ARCHIVE_SCHEMA = 'archive'
+
+# Change log entry a move is replicated as ({'project_id', 'archived'})
+MOVE_TABLE = '_project_archive'
+
+# Project tables, in restore order (referenced tables first)
+ARCHIVE_TABLES = ('projects', 'contacts', 'tasks', 'milestones', 'budget_items', 'documents',
+                  'document_versions', 'materials', 'evm_snapshots')
+
+# Key of each archived table (unique index in the archive)
+TABLE_KEYS = {'evm_snapshots': ('project_id', 'week_start')}
+
+# Rows of a project, in a table (schema placeholder {s})
+PROJECT_FILTERS = {
+    'projects': "id = ?",
+    'document_versions': "document_id IN (SELECT id FROM {s}.documents WHERE project_id = ?)"
+}
+
+# Blob references held by a project's rows
+BLOB_REFERENCES = '''
+    SELECT blob_hash, COUNT(*) AS refs FROM (
+        SELECT blob_hash FROM {s}.documents WHERE project_id = ?
+        UNION ALL
+        SELECT blob_hash FROM {s}.document_versions
+        WHERE document_id IN (SELECT id FROM {s}.documents WHERE project_id = ?)
+    ) WHERE blob_hash IS NOT NULL GROUP BY blob_hash
+'''
+
+
+def _project_filter(table: str, schema: str) -> str:
+    return PROJECT_FILTERS.get(table, "project_id = ?").format(s=schema)
+
+
+class ProjectArchive:
+    """Moves projects between the hot database and archive.db, and reads archived ones"""
+
+    def __init__(self, data_layer, path: Optional[str] = None):
+        self.data_layer = data_layer
+        self.path = path or os.path.join(data_layer.data_dir, ARCHIVE_FILE)
+        self._project_ids: Optional[FrozenSet[str]] = None
+        self._lock = threading.Lock()
+        # Held for a whole move (both transactions), and by frozen()
+        self._move_lock = threading.Lock()
+
+        # Change log of a replicating primary (modules/replication/changelog.py), set by its shipper
+        self.journal = None
+
+    # ==================== LOOKUP ====================
+
+    def project_ids(self) -> FrozenSet[str]:
+        """Ids of archived projects (cached; the archive only changes through this class)"""
+        with self._lock:
+            if self._project_ids is None:
+                self._project_ids = frozenset()
+                if os.path.exists(self.path):
+                    with self._reader() as conn:
+                        if self._has_table(conn, 'projects'):
+                            self._project_ids = frozenset(row['id'] for row in conn.execute("SELECT id FROM projects"))
+            return self._project_ids
+
+    def contains(self, project_id: Optional[str]) -> bool:
+        """Whether reads for a project are served from the archive (it is archived and not in the hot database)"""
+        if not project_id or project_id not in self.project_ids():
+            return False
+        return self.data_layer.fetchone("SELECT 1 AS found FROM projects WHERE id = ?", (project_id,)) is None
+
+    # ==================== READING ====================
+
+    def connect(self) -> sqlite3.Connection:
+        """New read-only connection to the archive (the caller closes it)"""
+        conn = sqlite3.connect(f"file:{quote(self.path)}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _has_table(self, conn: sqlite3.Connection, table: str, schema: str = 'main') -> bool:
+        return conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+
+    def fetchall(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """Rows of a SELECT against the archive (nothing if there is no archive yet)"""
+        if not os.path.exists(self.path):
+            return []
+        with self._reader() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def list_projects(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Archived projects matching equality filters"""
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        query = "SELECT * FROM projects"
+        if filters:
+            query += " WHERE " + " AND ".join(f"{k} = ?" for k in filters)
+        return self.fetchall(query, tuple(filters.values())) if self.project_ids() else []
+
+    # ==================== MOVING ====================
+
+    @contextmanager
+    def _attached(self):
+        """The archive attached to the shared connection, with tables matching the hot ones"""
+        data_layer = self.data_layer
+        with data_layer.lock:
+            data_layer.conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (self.path,))
+            try:
+                self._ensure_tables(data_layer.conn)
+                yield
+            finally:
+                data_layer.conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+
+    def _ensure_tables(self, conn: sqlite3.Connection):
+        with self.data_layer.transaction() as cursor:
+            for table in ARCHIVE_TABLES:
+                if not self._has_table(conn, table, ARCHIVE_SCHEMA):
+                    cursor.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} AS SELECT * FROM main.{table} WHERE 0")
+                    key = ', '.join(TABLE_KEYS.get(table, ('id',)))
+                    cursor.execute(f"CREATE UNIQUE INDEX {ARCHIVE_SCHEMA}.idx_{table}_key ON {table}({key})")
+                    if table == 'document_versions':
+                        cursor.execute(f"CREATE INDEX {ARCHIVE_SCHEMA}.idx_{table}_document ON {table}(document_id)")
+                    elif table != 'projects':
+                        cursor.execute(f"CREATE INDEX {ARCHIVE_SCHEMA}.idx_{table}_project ON {table}(project_id)")
+                    continue
+
+                # Columns the hot table gained since the archive table was created
+                archived = {row[1] for row in cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({table})")}
+                for row in cursor.execute(f"PRAGMA main.table_info({table})").fetchall():
+                    if row[1] not in archived:
+                        cursor.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {row[1]} {row[2]}")
+
+    def _copy(self, cursor, project_id: str, source: str, target: str) -> Dict[str, int]:
+        """Copy a project's rows, replacing any stale copy at the target"""
+        params = (project_id,)
+        # Versions are found through their documents: delete children first
+        for table in reversed(ARCHIVE_TABLES):
+            cursor.execute(f"DELETE FROM {target}.{table} WHERE {_project_filter(table, target)}", params)
+
+        counts = {}
+        for table in ARCHIVE_TABLES:
+            columns = ', '.join(row[1] for row in cursor.execute(f"PRAGMA {source}.table_info({table})").fetchall())
+            counts[table] = cursor.execute(
+                f"INSERT INTO {target}.{table} ({columns}) "
+                f"SELECT {columns} FROM {source}.{table} WHERE {_project_filter(table, source)}",
+                params
+            ).rowcount
+        return counts
+
+    def _blob_references(self, cursor, project_id: str, schema: str) -> List[tuple]:
+        return [(row['refs'], row['blob_hash']) for row in cursor.execute(
+            BLOB_REFERENCES.format(s=schema), (project_id, project_id)
+        ).fetchall()]
+
+    def _check_writable(self):
+        if self.data_layer.read_only:
+            raise PermissionError('Database is a read-only standby')
+
+    def _in_hot(self, project_id: str) -> bool:
+        return self.data_layer.fetchone("SELECT 1 AS found FROM projects WHERE id = ?", (project_id,)) is not None
+
+    def archive(self, project_id: str) -> Dict[str, int]:
+        """Move a project and its records into the archive; returns rows moved per table"""
+        self._check_writable()
+        with self._move_lock:
+            if not self._in_hot(project_id):
+                raise LookupError('Project not found')
+            return self._archive(project_id)
+
+    def restore(self, project_id: str) -> Dict[str, int]:
+        """Move an archived project back into the hot database; returns rows moved per table"""
+        self._check_writable()
+        with self._move_lock:
+            if project_id not in self.project_ids():
+                raise LookupError('Archived project not found')
+            return self._restore(project_id)
+
+    def apply_move(self, move: Dict[str, Any]):
+        """Repeat a move replicated from the primary (a move already made here is skipped)"""
+        project_id = move['project_id']
+        with self.data_layer.replicating(), self._move_lock:
+            if move['archived']:
+                if self._in_hot(project_id):
+                    self._archive(project_id)
+            elif project_id in self.project_ids():
+                self._restore(project_id)
+
+    def _log_move(self, cursor, mark: Optional[int], move: Dict[str, Any]):
+        """Replace the move's row changes in the change log with the move itself"""
+        if self.journal:
+            self.journal.log_move(cursor, mark, move)
+
+    def _archive(self, project_id: str) -> Dict[str, int]:
+        with self._attached():
+            with self.data_layer.transaction() as cursor:
+                counts = self._copy(cursor, project_id, 'main', ARCHIVE_SCHEMA)
+
+            with self.data_layer.transaction() as cursor:
+                mark = self.journal.mark(cursor) if self.journal else None
+                references = self._blob_references(cursor, project_id, 'main')
+                # ON DELETE CASCADE removes the records (and drops their blob references) ...
+                self.data_layer.delete('projects', project_id)
+                # ... but the archived rows still need those files
+                cursor.executemany("UPDATE blobs SET refcount = refcount + ? WHERE hash = ?", references)
+                self._log_move(cursor, mark, {'project_id': project_id, 'archived': True})
+
+        with self._lock:
+            self._project_ids = None
+        return counts
+
+    def _restore(self, project_id: str) -> Dict[str, int]:
+        with self._attached():
+            with self.data_layer.transaction() as cursor:
+                mark = self.journal.mark(cursor) if self.journal else None
+                # Inserting the rows counts their blob references again
+                references = self._blob_references(cursor, project_id, ARCHIVE_SCHEMA)
+                cursor.executemany("UPDATE blobs SET refcount = refcount - ? WHERE hash = ?", references)
+                # A hot copy left by an interrupted archive is replaced
+                self.data_layer.delete('projects', project_id)
+                counts = self._restore_rows(cursor, project_id)
+                # Tells listeners and caches the project is back
+                self.data_layer.update('projects', project_id, {'updated_at': datetime.utcnow().isoformat()})
+                self._log_move(cursor, mark, {'project_id': project_id, 'archived': False})
+
+            with self.data_layer.transaction() as cursor:
+                for table in reversed(ARCHIVE_TABLES):
+                    cursor.execute(
+                        f"DELETE FROM {ARCHIVE_SCHEMA}.{table} WHERE {_project_filter(table, ARCHIVE_SCHEMA)}",
+                        (project_id,)
+                    )
+
+        with self._lock:
+            self._project_ids = None
+        return counts
+
+    def _restore_rows(self, cursor, project_id: str) -> Dict[str, int]:
+        """Insert the archived rows into the hot tables, in reference order"""
+        counts = {}
+        for table in ARCHIVE_TABLES:
+            hot = {row[1] for row in cursor.execute(f"PRAGMA main.table_info({table})").fetchall()}
+            columns = ', '.join(row[1] for row in cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({table})").fetchall()
+                                if row[1] in hot)
+            insert = (
+                f"INSERT INTO main.{table} ({columns}) "
+                f"SELECT {columns} FROM {ARCHIVE_SCHEMA}.{table} WHERE {_project_filter(table, ARCHIVE_SCHEMA)}"
+            )
+            if table == 'document_versions':
+                # Restoring a document already wrote its current version's row: keep the original date
+                insert += " ON CONFLICT(id) DO UPDATE SET created_at = excluded.created_at"
+            counts[table] = cursor.execute(insert, (project_id,)).rowcount
+        return counts
+
+    # ==================== COPYING ====================
+
+    @contextmanager
+    def frozen(self):
+        """Hold moves off, so the archive and a snapshot of the hot database taken meanwhile match"""
+        with self._move_lock:
+            yield
+
+    def copy_to(self, target_path: str) -> bool:
+        """Backup-API copy of the archive into a standalone file; False when there is no archive yet"""
+        if not os.path.exists(self.path):
+            return False
+        target = sqlite3.connect(target_path)
+        try:
+            with self._reader() as source:
+                source.backup(target)
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+        return True
@@ -0,0 +1,29 @@
+"""
+Date Helpers
+Parse the ISO date strings stored in SQLite into naive UTC datetimes
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a stored date/datetime string
+
+    Accepts 'YYYY-MM-DD', full ISO timestamps and a trailing 'Z'.
+    Timezone-aware values are converted to UTC; everything is returned naive.
+    Returns None for empty or unparseable values.
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return parsed
@@ -0,0 +1,376 @@
+"""
+Project Shards
+Optional storage mode with one SQLite database per project
+
+With sharded storage (AVEN_STORAGE=sharded) every project created from then
+on gets its own directory, <data dir>/shards/<project id>/, holding
+project.db and the project's blob store, so a project can be moved, backed
+up or deleted as one directory. The main database becomes the catalog: it
+keeps projects and categories, the list of sharded projects
+(project_shards) and a locator from record id to project (shard_records)
+for requests that only carry a record id.
+
+The Orchestrator asks route() which shard a request belongs to. Each shard
+has its own data layer and connection, so writes to different projects no
+longer queue behind one lock, and its own instances of the project-scoped
+modules attached to that data layer (their caches, write listeners and
+background workers are per database). The shard's projects row mirrors the
+catalog's, so foreign keys and modules that read the project work unchanged.
+
+Shards are opened on first use and held open while a request uses them
+(acquire()/release()). At most max_open stay open: the least recently used
+idle shard is closed (its modules detached) when another opens, and any
+shard idle for idle_seconds is closed by a background sweep.
+
+Maintenance is not per shard. The catalog's maintenance module finds the
+router as catalog.shards: its status sweeps run over every shard through
+using(), which does not open the shard's modules, and backups copy every
+shard with copy_to(). Deleting a project removes its shard directory at
+once, so the purge only has the catalog row left to remove.
+
+Lists of a project-scoped module without a project_id filter (GET
+/api/tasks) fan out: the catalog's rows come first, then each shard's in
+turn, so rows are not ordered across projects.
+
+Limitations:
+- Cross-project features (dashboard stats, automation rules, imports,
+  archiving) only see the catalog database.
+- Projects created before sharding was turned on, or by clone, template or
+  import, stay in the catalog database.
+- Replication is not supported in sharded mode.
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+from urllib.parse import quote
+
+from .sqlite_layer import SQLiteDataLayer
+
+
+SHARD_DIR = 'shards'
+SHARD_FILE = 'project.db'
+
+# Tables whose records the locator tracks (requests address them by id alone)
+LOCATED_TABLES = ('tasks', 'budget_items', 'documents', 'contacts', 'milestones', 'materials')
+
+# Shards kept open at once, and how long an unused one stays open
+MAX_OPEN_SHARDS = 16
+SHARD_IDLE_SECONDS = 10 * 60
+EVICT_INTERVAL_SECONDS = 60
+
+
+class Shard:
+    """One project's database and the modules attached to it"""
+
+    def __init__(self, project_id: str, path: str, data_layer: SQLiteDataLayer, modules: Dict[str, Any]):
+        self.project_id = project_id
+        self.path = path
+        self.data_layer = data_layer
+        self.modules = modules
+
+        # Requests using the shard (it is not closed while any are), and when it was last released
+        self.users = 0
+        self.last_used = time.monotonic()
+
+
+class ShardRouter:
+    """Opens per-project databases and maps requests onto them"""
+
+    def __init__(self, catalog: SQLiteDataLayer, module_factory: Callable[[], Dict[str, Any]],
+                 root: Optional[str] = None, max_open: int = MAX_OPEN_SHARDS,
+                 idle_seconds: float = SHARD_IDLE_SECONDS):
+        self.catalog = catalog
+        self.module_factory = module_factory
+        self.root = root or os.path.join(catalog.data_dir, SHARD_DIR)
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+
+        self._sharded: Set[str] = set()
+        # Least recently used first
+        self._open: 'OrderedDict[str, Shard]' = OrderedDict()
+        self._lock = threading.RLock()
+
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.shards_evicted = 0
+
+    # ==================== LIFECYCLE ====================
+
+    def install(self):
+        """Create the catalog tables and follow project writes"""
+        with self.catalog.transaction() as cursor:
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS project_shards (
+                project_id TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                created_at TEXT DEFAULT (datetime('now'))
+            )
+            ''')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS shard_records (
+                id TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                table_name TEXT NOT NULL
+            )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_shard_records_project ON shard_records(project_id)')
+
+        self._sharded = {row['project_id'] for row in self.catalog.fetchall("SELECT project_id FROM project_shards")}
+        self.catalog.add_listener(self._on_catalog_write)
+        # Catalog-wide services (maintenance) reach the shards through the catalog
+        self.catalog.shards = self
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='shard-evict', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop every open shard's modules and close its database"""
+        self.catalog.remove_listener(self._on_catalog_write)
+        self.catalog.shards = None
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+        with self._lock:
+            for project_id in list(self._open):
+                self._close(project_id)
+
+    def _close(self, project_id: str):
+        shard = self._open.pop(project_id, None)
+        if not shard:
+            return
+        for module in shard.modules.values():
+            if hasattr(module, 'detach'):
+                module.detach()
+        shard.data_layer.close()
+
+    def _run(self):
+        while not self._stopped.wait(EVICT_INTERVAL_SECONDS):
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"⚠️  Shard eviction failed: {e}")
+
+    def evict(self) -> int:
+        """Close idle shards past idle_seconds, and the least recently used beyond max_open"""
+        now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            for project_id, shard in list(self._open.items()):
+                if shard.users:
+                    continue
+                if len(self._open) > self.max_open or now - shard.last_used > self.idle_seconds:
+                    self._close(project_id)
+                    evicted += 1
+            self.shards_evicted += evicted
+        return evicted
+
+    # ==================== SHARDS ====================
+
+    def directory(self, project_id: str) -> str:
+        return os.path.join(self.root, project_id)
+
+    def create(self, project: Dict[str, Any]):
+        """Give a new project its own database, holding a copy of its projects row (opened on first use)"""
+        project_id = project['id']
+        path = os.path.join(self.directory(project_id), SHARD_FILE)
+        with self._lock:
+            data_layer = self._open_data_layer(path)
+            data_layer.insert('projects', {k: v for k, v in project.items() if v is not None})
+            data_layer.close()
+
+            self.catalog.execute(
+                "INSERT INTO project_shards (project_id, path, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(project_id) DO NOTHING",
+                (project_id, path, datetime.utcnow().isoformat())
+            )
+            self._sharded.add(project_id)
+
+    def _open_data_layer(self, path: str) -> SQLiteDataLayer:
+        data_layer = SQLiteDataLayer(path)
+        data_layer.initialize_schema(seed=False)
+        return data_layer
+
+    def project_ids(self) -> List[str]:
+        """Every sharded project"""
+        with self._lock:
+            return sorted(self._sharded)
+
+    def paths(self) -> Dict[str, str]:
+        """Database path of every sharded project"""
+        return {row['project_id']: row['path']
+                for row in self.catalog.fetchall("SELECT project_id, path FROM project_shards")}
+
+    def _path(self, project_id: Optional[str]) -> Optional[str]:
+        if not project_id or project_id not in self._sharded:
+            return None
+        row = self.catalog.fetchone("SELECT path FROM project_shards WHERE project_id = ?", (project_id,))
+        return row['path'] if row else None
+
+    def acquire(self, project_id: Optional[str]) -> Optional[Shard]:
+        """
+        The project's shard, opened on first use; None for projects kept in the catalog
+
+        The shard stays open until the matching release().
+        """
+        if not project_id or project_id not in self._sharded:
+            return None
+
+        with self._lock:
+            shard = self._open.get(project_id)
+            if shard is None:
+                path = self._path(project_id)
+                if not path:
+                    return None
+                data_layer = self._open_data_layer(path)
+                data_layer.add_listener(self._locator(project_id))
+
+                modules = self.module_factory()
+                for module in modules.values():
+                    if hasattr(module, 'attach'):
+                        module.attach(data_layer)
+
+                shard = Shard(project_id, path, data_layer, modules)
+                self._open[project_id] = shard
+
+            self._open.move_to_end(project_id)
+            shard.users += 1
+            if len(self._open) > self.max_open:
+                self.evict()
+            return shard
+
+    def release(self, shard: Shard):
+        """A request is done with its shard"""
+        with self._lock:
+            shard.users -= 1
+            shard.last_used = time.monotonic()
+
+    @contextmanager
+    def using(self, project_id: str) -> Iterator[Optional[SQLiteDataLayer]]:
+        """
+        A data layer on the project's database, without opening its modules
+
+        An open shard's own data layer is used (and held open); otherwise a
+        connection is opened just for the block, with no shard able to open
+        meanwhile, so no module misses the writes. None when the project is
+        not sharded.
+        """
+        with self._lock:
+            shard = self._open.get(project_id)
+            if shard is None:
+                path = self._path(project_id)
+                if not path:
+                    yield None
+                    return
+                data_layer = self._open_data_layer(path)
+                try:
+                    yield data_layer
+                finally:
+                    data_layer.close()
+                return
+            shard.users += 1
+
+        try:
+            yield shard.data_layer
+        finally:
+            self.release(shard)
+
+    def copy_to(self, project_id: str, target_path: str) -> bool:
+        """Backup-API copy of a project's database; False when it is not (or no longer) sharded"""
+        path = self._path(project_id)
+        if not path or not os.path.exists(path):
+            return False
+
+        source = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+            # A standalone file: no WAL sidecar files next to the copy
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+            source.close()
+        return True
+
+    def drop(self, project_id: str):
+        """Close a project's shard and delete its directory"""
+        with self._lock:
+            self._close(project_id)
+            self._sharded.discard(project_id)
+            with self.catalog.transaction() as cursor:
+                cursor.execute("DELETE FROM shard_records WHERE project_id = ?", (project_id,))
+                cursor.execute("DELETE FROM project_shards WHERE project_id = ?", (project_id,))
+            shutil.rmtree(self.directory(project_id), ignore_errors=True)
+
+    # ==================== ROUTING ====================
+
+    def route(self, request: Dict[str, Any], project_id: Optional[str] = None) -> Optional[Shard]:
+        """
+        Shard a request belongs to, or None for the catalog database
+
+        The project comes from project_id, the filters or the record data,
+        and otherwise from the locator entry for the record id. A shard
+        returned is held open until release().
+        """
+        if not self._sharded:
+            return None
+
+        for source in (request, request.get('filters'), request.get('data')):
+            if not project_id and isinstance(source, dict):
+                project_id = source.get('project_id')
+
+        if not project_id and request.get('id'):
+            row = self.catalog.fetchone("SELECT project_id FROM shard_records WHERE id = ?", (request['id'],))
+            project_id = row['project_id'] if row else None
+
+        return self.acquire(project_id)
+
+    def _locator(self, project_id: str) -> Callable[[str, str, str], None]:
+        """Shard write listener keeping shard_records current"""
+        def on_write(table: str, operation: str, record_id: str):
+            if table not in LOCATED_TABLES:
+                return
+            if operation == 'insert':
+                self.catalog.execute(
+                    "INSERT INTO shard_records (id, project_id, table_name) VALUES (?, ?, ?) "
+                    "ON CONFLICT(id) DO NOTHING",
+                    (record_id, project_id, table)
+                )
+            elif operation == 'delete':
+                self.catalog.execute("DELETE FROM shard_records WHERE id = ?", (record_id,))
+        return on_write
+
+    def _on_catalog_write(self, table: str, operation: str, record_id: str):
+        """Mirror project edits into the shard; a deleted project's directory goes at once"""
+        if table != 'projects' or operation != 'update' or record_id not in self._sharded:
+            return
+
+        project = self.catalog.get('projects', record_id)
+        if not project or project.get('deleted_at'):
+            self.drop(record_id)
+            return
+
+        with self.using(record_id) as data_layer:
+            if data_layer:
+                data_layer.update('projects', record_id, {k: v for k, v in project.items() if k != 'id'})
+
+    def get_status(self) -> Dict[str, Any]:
+        """Sharded and currently open projects"""
+        with self._lock:
+            return {
+                'root': self.root,
+                'sharded_projects': len(self._sharded),
+                'open_shards': sorted(self._open),
+                'max_open': self.max_open,
+                'idle_seconds': self.idle_seconds,
+                'shards_evicted': self.shards_evicted
+            }
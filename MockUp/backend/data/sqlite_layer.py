@@ -6,28 +6,244 @@ Provides database operations for SQLite
 import sqlite3
 import json
 import os
+import re
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
 from uuid import uuid4
 
+from .archive import ARCHIVE_TABLES, ProjectArchive
+
+
+# Table written by a raw INSERT/UPDATE/DELETE statement
+WRITE_TARGET = re.compile(r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+(\w+)', re.IGNORECASE)
+
+# Rows fetched per round trip when streaming
+STREAM_BATCH_SIZE = 500
+
+MEMORY_PATH = ':memory:'
+
+
+def is_memory_path(db_path: str) -> bool:
+    """Whether a database path is an in-memory database (:memory: or a mode=memory URI)"""
+    if db_path == MEMORY_PATH:
+        return True
+    if not db_path.startswith('file:'):
+        return False
+    parts = urlsplit(db_path)
+    return parse_qs(parts.query).get('mode') == ['memory'] or parts.path == MEMORY_PATH
+
 
 class SQLiteDataLayer:
     """SQLite implementation of data access layer"""
 
-    def __init__(self, db_path: str):
-        """Initialize SQLite connection"""
+    def __init__(self, db_path: str, seed_path: Optional[str] = None):
+        """
+        Initialize SQLite connection
+
+        db_path is a file path, ':memory:' or a 'file:' URI (including
+        file:name?mode=memory&cache=shared). An in-memory database can be
+        seeded from a database file (seed_path) with the backup API; files
+        that normally live next to the database (blobs, backups, archive)
+        go to a temporary directory that close() removes.
+        """
         self.db_path = db_path
+        self.in_memory = is_memory_path(db_path)
 
-        # Create data directory if it doesn't exist
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        if self.in_memory:
+            self.data_dir = tempfile.mkdtemp(prefix='aven-')
+        else:
+            file_path = unquote(urlsplit(db_path).path) if db_path.startswith('file:') else db_path
+            self.data_dir = os.path.dirname(os.path.abspath(file_path))
+            # Create data directory if it doesn't exist
+            os.makedirs(self.data_dir, exist_ok=True)
 
         # Connect to database
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, uri=db_path.startswith('file:'))
         self.conn.row_factory = sqlite3.Row  # Return rows as dicts
+
+        if seed_path:
+            self._seed(seed_path)
+
+        # WAL lets streaming readers on their own connections run alongside writes
+        # (memory databases have no journal file; their readers get a copy, see _open_reader)
+        if not self.in_memory:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+
+        # Enforce REFERENCES and run the ON DELETE actions (off by default in SQLite)
+        self.conn.execute('PRAGMA foreign_keys=ON')
+
+        # Serialises access to the shared connection (API threads + background jobs)
+        self.lock = threading.RLock()
+
+        # Write listeners: callback(table, operation, record_id)
+        self._listeners: List[Callable[[str, str, str], None]] = []
+
+        # Write validators: callback(table, operation, record_id, data), raise to reject
+        self._validators: List[Callable[[str, str, str, Dict[str, Any]], None]] = []
+
+        # Per-table write counters, for caches keyed on data version
+        self._versions: Dict[str, int] = {}
+
+        # Open transaction (owning thread, nesting depth) and the writes it will notify
+        self._tx_owner: Optional[int] = None
+        self._tx_depth = 0
+        self._tx_writes: List[Tuple[str, str, str, Optional[Dict]]] = []
+
+        # Row being notified, when the writer already has it: get() serves it to listeners
+        self._notifying = threading.local()
+
+        # Memory databases: the copy readers share, (changes, schema version, URI, connection keeping it)
+        self._reader_copy: Optional[Tuple[int, int, str, sqlite3.Connection]] = None
+
+        # Set on a replication standby: only apply_changes() (and writes under replicating()) may write
+        self.read_only = False
+        self._replicating = threading.local()
+
+        # Cold storage for archived projects; their reads fall back to it
+        self.archive = ProjectArchive(self)
+
+        # ShardRouter (data/shards.py) while this database is the catalog of sharded storage
+        self.shards = None
         print(f"✅ Connected to SQLite: {db_path}")
 
-    def initialize_schema(self):
-        """Create tables if they don't exist"""
+    def _seed(self, seed_path: str):
+        """Replace the (new) database's contents with a copy of a database file"""
+        if not os.path.isfile(seed_path):
+            raise FileNotFoundError(f"Seed database not found: {seed_path}")
+        source = sqlite3.connect(f"file:{quote(os.path.abspath(seed_path))}?mode=ro", uri=True)
+        try:
+            source.backup(self.conn)
+        finally:
+            source.close()
+
+    def close(self):
+        """Close the shared connection (the data layer is unusable afterwards)"""
+        with self.lock:
+            if self._reader_copy:
+                self._reader_copy[3].close()
+                self._reader_copy = None
+            self.conn.close()
+        if self.in_memory:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def add_listener(self, callback: Callable[[str, str, str], None]):
+        """Register a callback invoked after every insert/update/delete"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, str, str], None]):
+        """Unregister a write listener"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_validator(self, callback: Callable[[str, str, str, Dict[str, Any]], None]):
+        """Register a callback run before insert/update, under the lock the write takes; raising ValueError rejects it"""
+        self._validators.append(callback)
+
+    def remove_validator(self, callback: Callable[[str, str, str, Dict[str, Any]], None]):
+        """Unregister a write validator"""
+        if callback in self._validators:
+            self._validators.remove(callback)
+
+    def _validate(self, table: str, operation: str, record_id: str, data: Dict[str, Any]):
+        """Run validators against the unserialized write"""
+        for callback in list(self._validators):
+            callback(table, operation, record_id, data)
+
+    def get_version(self, *tables: str) -> tuple:
+        """Write counters for the given tables; changes whenever any of them is written"""
+        with self.lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def _bump_version(self, table: str):
+        """Record a write to a table"""
+        with self.lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _notify(self, table: str, operation: str, record_id: str, row: Optional[Dict] = None):
+        """Tell listeners a record changed (listener errors never fail the write)"""
+        self._bump_version(table)
+        self._notifying.write = (table, record_id, row) if row is not None else None
+        try:
+            for callback in list(self._listeners):
+                try:
+                    callback(table, operation, record_id)
+                except Exception as e:
+                    print(f"⚠️  Write listener failed for {table}.{operation}: {e}")
+        finally:
+            self._notifying.write = None
+
+    def _check_writable(self):
+        """Reject writes on a read-only standby"""
+        if self.read_only and not getattr(self._replicating, 'active', False):
+            raise PermissionError('Database is a read-only standby')
+
+    @contextmanager
+    def replicating(self):
+        """Let the calling thread write on a standby, to repeat a replicated change"""
+        self._replicating.active = True
+        try:
+            yield
+        finally:
+            self._replicating.active = False
+
+    def _in_transaction(self) -> bool:
+        """Whether the calling thread has a transaction() open"""
+        return self._tx_owner == threading.get_ident()
+
+    def _commit(self):
+        """Commit now, unless the write belongs to an open transaction (call under lock)"""
+        if not self._in_transaction():
+            self.conn.commit()
+
+    def _written(self, table: str, operation: str, record_id: str, row: Optional[Dict] = None):
+        """Notify listeners now, or when the open transaction commits"""
+        if self._in_transaction():
+            self._tx_writes.append((table, operation, record_id, row))
+        else:
+            self._notify(table, operation, record_id, row)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into a single commit
+
+        insert/update/delete/execute calls inside the block join it. Nested
+        blocks join the outer one. Listeners run after the outermost commit,
+        and not at all on rollback.
+        """
+        with self.lock:
+            outer = self._tx_depth == 0
+            self._tx_owner = threading.get_ident()
+            self._tx_depth += 1
+            try:
+                # Explicit BEGIN so savepoints inside the block nest rather than commit
+                if outer and not self.conn.in_transaction:
+                    self.conn.execute('BEGIN')
+                yield self.conn.cursor()
+                if outer:
+                    self.conn.commit()
+            except BaseException:
+                if outer:
+                    self.conn.rollback()
+                    self._tx_writes.clear()
+                raise
+            finally:
+                self._tx_depth -= 1
+                if outer:
+                    self._tx_owner = None
+
+            writes, self._tx_writes = (self._tx_writes, []) if outer else ([], self._tx_writes)
+
+        for write in writes:
+            self._notify(*write)
+
+    def initialize_schema(self, seed: bool = True):
+        """Create tables if they don't exist (seed: add the default project to an empty database)"""
         cursor = self.conn.cursor()
 
         # ==================== PROJECTS TABLE ====================
@@ -43,14 +259,18 @@ class SQLiteDataLayer:
             status TEXT DEFAULT 'planning' CHECK(status IN ('planning', 'in-progress', 'on-hold', 'completed', 'archived')),
             budget_total REAL,
             description TEXT DEFAULT '',
+            deleted_at TEXT,
             created_at TEXT DEFAULT (datetime('now')),
             updated_at TEXT DEFAULT (datetime('now'))
         )
         ''')
+        # deleted_at: hidden at once, records purged in the background (maintenance/purge.py)
+        self._ensure_columns(cursor, 'projects', {'deleted_at': 'TEXT'})
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_deleted ON projects(deleted_at) WHERE deleted_at IS NOT NULL')
 
         # Create default project if none exists
         cursor.execute('SELECT COUNT(*) FROM projects')
-        if cursor.fetchone()[0] == 0:
+        if seed and cursor.fetchone()[0] == 0:
             cursor.execute('''
             INSERT INTO projects (id, name, status)
             VALUES ('default-project', 'My Self-Build Project', 'planning')
@@ -121,12 +341,151 @@ class SQLiteDataLayer:
             upload_date TEXT DEFAULT (datetime('now')),
             tags TEXT DEFAULT '[]',
             notes TEXT DEFAULT '',
+            blob_hash TEXT,
+            file_size INTEGER,
+            content_type TEXT,
             created_at TEXT DEFAULT (datetime('now')),
             updated_at TEXT DEFAULT (datetime('now')),
             FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE,
             FOREIGN KEY (linked_task_id) REFERENCES tasks(id) ON DELETE SET NULL
         )
         ''')
+        self._ensure_columns(cursor, 'documents', {
+            'blob_hash': 'TEXT',
+            'file_size': 'INTEGER',
+            'content_type': 'TEXT'
+        })
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_documents_blob ON documents(blob_hash)')
+
+        # ==================== BLOBS TABLE ====================
+        # Content-addressed document files; refcount = documents rows pointing at the blob
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            size_bytes INTEGER NOT NULL,
+            refcount INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS documents_blob_insert AFTER INSERT ON documents
+        WHEN NEW.blob_hash IS NOT NULL BEGIN
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.blob_hash;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS documents_blob_update AFTER UPDATE OF blob_hash ON documents
+        WHEN OLD.blob_hash IS NOT NEW.blob_hash BEGIN
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.blob_hash;
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.blob_hash;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS documents_blob_delete AFTER DELETE ON documents
+        WHEN OLD.blob_hash IS NOT NULL BEGIN
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.blob_hash;
+        END
+        ''')
+
+        # ==================== DOCUMENT VERSIONS TABLE ====================
+        # One row per document version (id = '<document id>:<version>'), kept by triggers on
+        # documents for every write path. documents.version points at the latest row.
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS document_versions (
+            id TEXT PRIMARY KEY,
+            document_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            blob_hash TEXT,
+            file_size INTEGER,
+            content_type TEXT,
+            created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+            FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+        )
+        ''')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_document_versions_document_version ON document_versions(document_id, version)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_document_versions_blob ON document_versions(blob_hash)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_documents_project_type_version ON documents(project_id, document_type, version)')
+
+        # A version's row is created when the version first appears and refreshed while it is
+        # current (content attached to version 1, renames); older rows are never rewritten
+        version_row = '''
+            UPDATE document_versions
+            SET filename = NEW.filename, blob_hash = NEW.blob_hash, file_size = NEW.file_size, content_type = NEW.content_type
+            WHERE id = NEW.id || ':' || NEW.version;
+            INSERT INTO document_versions (id, document_id, version, filename, blob_hash, file_size, content_type)
+            SELECT NEW.id || ':' || NEW.version, NEW.id, NEW.version, NEW.filename, NEW.blob_hash, NEW.file_size, NEW.content_type
+            WHERE NOT EXISTS (SELECT 1 FROM document_versions WHERE id = NEW.id || ':' || NEW.version);
+        '''
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS documents_version_insert AFTER INSERT ON documents BEGIN
+            {version_row}
+        END
+        ''')
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS documents_version_update
+        AFTER UPDATE OF version, filename, blob_hash, file_size, content_type ON documents
+        WHEN OLD.version IS NOT NEW.version OR OLD.filename IS NOT NEW.filename
+          OR OLD.blob_hash IS NOT NEW.blob_hash OR OLD.file_size IS NOT NEW.file_size
+          OR OLD.content_type IS NOT NEW.content_type BEGIN
+            {version_row}
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS documents_version_delete AFTER DELETE ON documents BEGIN
+            DELETE FROM document_versions WHERE document_id = OLD.id;
+        END
+        ''')
+
+        # Older versions keep their files: blob references count version rows too
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS document_versions_blob_insert AFTER INSERT ON document_versions
+        WHEN NEW.blob_hash IS NOT NULL BEGIN
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.blob_hash;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS document_versions_blob_update AFTER UPDATE OF blob_hash ON document_versions
+        WHEN OLD.blob_hash IS NOT NEW.blob_hash BEGIN
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.blob_hash;
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.blob_hash;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS document_versions_blob_delete AFTER DELETE ON document_versions
+        WHEN OLD.blob_hash IS NOT NULL BEGIN
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.blob_hash;
+        END
+        ''')
+
+        # Databases that predate version history start it at each document's current version
+        cursor.execute('''
+        INSERT INTO document_versions (id, document_id, version, filename, blob_hash, file_size, content_type, created_at)
+        SELECT d.id || ':' || d.version, d.id, d.version, d.filename, d.blob_hash, d.file_size, d.content_type, d.updated_at
+        FROM documents d
+        WHERE NOT EXISTS (SELECT 1 FROM document_versions v WHERE v.document_id = d.id)
+        ''')
+
+        # ==================== UPLOAD SESSIONS TABLE ====================
+        # Resumable chunked uploads: received holds the verified [start, end) byte ranges
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            document_id TEXT NOT NULL,
+            total_size INTEGER NOT NULL,
+            sha256 TEXT,
+            content_type TEXT,
+            received TEXT DEFAULT '[]',
+            bytes_received INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'open' CHECK(status IN ('open', 'committed', 'aborted', 'expired')),
+            blob_hash TEXT,
+            expires_at TEXT NOT NULL,
+            created_at TEXT DEFAULT (datetime('now')),
+            updated_at TEXT DEFAULT (datetime('now')),
+            FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_status_expires ON upload_sessions(status, expires_at)')
 
         # ==================== CONTACTS TABLE ====================
         cursor.execute('''
@@ -160,6 +519,7 @@ class SQLiteDataLayer:
             status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'in-progress', 'completed', 'delayed', 'cancelled')),
             dependencies TEXT DEFAULT '[]',
             notes TEXT DEFAULT '',
+            auto_status_from TEXT,
             created_at TEXT DEFAULT (datetime('now')),
             updated_at TEXT DEFAULT (datetime('now')),
             FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
@@ -181,6 +541,7 @@ class SQLiteDataLayer:
             delivery_status TEXT DEFAULT 'not-ordered' CHECK(delivery_status IN ('not-ordered', 'ordered', 'in-transit', 'delivered', 'overdue')),
             warranty_info TEXT DEFAULT '',
             notes TEXT DEFAULT '',
+            auto_status_from TEXT,
             created_at TEXT DEFAULT (datetime('now')),
             updated_at TEXT DEFAULT (datetime('now')),
             FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE,
@@ -188,6 +549,36 @@ class SQLiteDataLayer:
         )
         ''')
 
+        # auto_status_from: status the maintenance job replaced with 'overdue'/'delayed'
+        # (NULL when the status was set by hand), restored if the row is rescheduled
+        self._ensure_columns(cursor, 'milestones', {'auto_status_from': 'TEXT'})
+        self._ensure_columns(cursor, 'materials', {'auto_status_from': 'TEXT'})
+        # Any other status change (API, import, replication) makes the status the user's
+        for table, column in (('milestones', 'status'), ('materials', 'delivery_status')):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_status_by_hand AFTER UPDATE OF {column} ON {table}
+            WHEN NEW.{column} IS NOT OLD.{column} AND NEW.auto_status_from IS NOT NULL
+                AND NEW.auto_status_from IS OLD.auto_status_from
+            BEGIN
+                UPDATE {table} SET auto_status_from = NULL WHERE id = NEW.id;
+            END
+            ''')
+
+        # ==================== STATUS/DATE INDEXES ====================
+        # Used by the maintenance sweeps and the overdue/delayed filters
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_materials_status_delivery ON materials(delivery_status, delivery_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_materials_project_status ON materials(project_id, delivery_status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_milestones_status_target ON milestones(status, target_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_milestones_project_status ON milestones(project_id, status)')
+
+        # Foreign key columns without an index of their own: ON DELETE actions and purges look them up
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_budget_items_project ON budget_items(project_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_contacts_project ON contacts(project_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_documents_linked_task ON documents(linked_task_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_materials_supplier ON materials(supplier_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_document ON upload_sessions(document_id)')
+
         # ==================== CATEGORIES TABLE ====================
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS categories (
@@ -218,83 +609,277 @@ class SQLiteDataLayer:
         )
         ''')
 
+        # ==================== EVM SNAPSHOTS TABLE ====================
+        # Weekly percent complete / actual cost, so earned value has history
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS evm_snapshots (
+            project_id TEXT NOT NULL,
+            week_start TEXT NOT NULL,
+            percent_complete REAL DEFAULT 0,
+            actual_cost REAL DEFAULT 0,
+            updated_at TEXT DEFAULT (datetime('now')),
+            PRIMARY KEY (project_id, week_start),
+            FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+        )
+        ''')
+
+        # ==================== IMPORT JOBS TABLE ====================
+        # Progress is committed with each batch, so a failed import resumes where it stopped
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            id TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            source_format TEXT NOT NULL CHECK(source_format IN ('csv', 'ndjson')),
+            source_path TEXT NOT NULL,
+            options TEXT DEFAULT '{}',
+            status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'running', 'completed', 'failed')),
+            rows_processed INTEGER DEFAULT 0,
+            rows_imported INTEGER DEFAULT 0,
+            rows_failed INTEGER DEFAULT 0,
+            errors TEXT DEFAULT '[]',
+            last_error TEXT,
+            created_at TEXT DEFAULT (datetime('now')),
+            updated_at TEXT DEFAULT (datetime('now'))
+        )
+        ''')
+
         self.conn.commit()
         print("✅ Database schema initialized")
 
+    def _ensure_columns(self, cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]):
+        """Add columns that an existing database's table predates"""
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+        for column, definition in columns.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
     def execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
         """Execute raw SQL query"""
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        self.conn.commit()
+        target = WRITE_TARGET.match(query)
+        if target:
+            self._check_writable()
+
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            self._commit()
+
+            if target and cursor.rowcount > 0:
+                self._bump_version(target.group(1))
         return cursor
 
     def fetchone(self, query: str, params: tuple = ()) -> Optional[Dict]:
         """Fetch single row"""
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        row = cursor.fetchone()
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            row = cursor.fetchone()
         return dict(row) if row else None
 
     def fetchall(self, query: str, params: tuple = ()) -> List[Dict]:
         """Fetch all rows"""
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
+    def fetch_records(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Fetch all rows of a hand-written SELECT, decoded like query() results"""
+        return [self._deserialize_row(row) for row in self.fetchall(query, params)]
+
     def insert(self, table: str, data: Dict[str, Any]) -> str:
         """Insert record and return ID"""
         # Generate ID if not provided
         if 'id' not in data:
             data['id'] = str(uuid4())
 
-        # Convert lists/dicts to JSON strings
-        data = self._serialize_data(data)
+        self._check_writable()
 
-        columns = ', '.join(data.keys())
-        placeholders = ', '.join(['?' for _ in data])
-        query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        with self.lock:
+            # Validated under the lock, so no other write commits in between
+            self._validate(table, 'insert', data['id'], data)
 
-        cursor = self.conn.cursor()
-        cursor.execute(query, tuple(data.values()))
-        self.conn.commit()
+            # Convert lists/dicts to JSON strings
+            data = self._serialize_data(data)
 
+            columns = ', '.join(data.keys())
+            placeholders = ', '.join(['?' for _ in data])
+            query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+
+            cursor = self.conn.cursor()
+            cursor.execute(query, tuple(data.values()))
+            self._commit()
+
+        self._written(table, 'insert', data['id'])
         return data['id']
 
+    def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insert rows with one executemany and return their IDs
+
+        Every row is validated first; rows are aligned on the union of their
+        keys (missing keys insert NULL).
+        """
+        self._check_writable()
+        if not rows:
+            return []
+
+        with self.lock:
+            prepared = []
+            for data in rows:
+                if 'id' not in data:
+                    data['id'] = str(uuid4())
+                self._validate(table, 'insert', data['id'], data)
+                prepared.append(self._serialize_data(data))
+
+            columns = list(dict.fromkeys(key for data in prepared for key in data))
+            placeholders = ', '.join(['?' for _ in columns])
+            query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+            cursor = self.conn.cursor()
+            cursor.executemany(query, [tuple(data.get(c) for c in columns) for data in prepared])
+            self._commit()
+
+        for data in prepared:
+            self._written(table, 'insert', data['id'])
+        return [data['id'] for data in prepared]
+
+    def insert_select(self, table: str, columns: List[str], select: str, params: Any = ()) -> List[str]:
+        """
+        Set-based INSERT ... SELECT; returns the new rows' IDs
+
+        Rows are built in SQL, so validators do not see them; listeners do,
+        and their get() of each new row is answered from the RETURNING data.
+        """
+        self._check_writable()
+        query = f"INSERT INTO {table} ({', '.join(columns)}) {select} RETURNING *"
+
+        with self.lock:
+            cursor = self.conn.cursor()
+            rows = [self._deserialize_row(dict(row)) for row in cursor.execute(query, params).fetchall()]
+            self._commit()
+
+        for row in rows:
+            self._written(table, 'insert', row['id'], row)
+        return [row['id'] for row in rows]
+
+    def create(self, table: str, data: Dict[str, Any]) -> Optional[Dict]:
+        """Insert record and return the stored row"""
+        record_id = self.insert(table, data)
+        return self.get(table, record_id)
+
     def update(self, table: str, id: str, data: Dict[str, Any]) -> bool:
         """Update record by ID"""
         # Add updated_at timestamp
         data['updated_at'] = datetime.utcnow().isoformat()
 
-        # Convert lists/dicts to JSON strings
-        data = self._serialize_data(data)
+        self._check_writable()
 
-        set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
-        query = f"UPDATE {table} SET {set_clause} WHERE id = ?"
+        with self.lock:
+            # Validated under the lock, so no other write commits in between
+            self._validate(table, 'update', id, data)
 
-        cursor = self.conn.cursor()
-        cursor.execute(query, tuple(data.values()) + (id,))
-        self.conn.commit()
+            # Convert lists/dicts to JSON strings
+            data = self._serialize_data(data)
+
+            set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
+            query = f"UPDATE {table} SET {set_clause} WHERE id = ?"
+
+            cursor = self.conn.cursor()
+            cursor.execute(query, tuple(data.values()) + (id,))
+            self._commit()
 
+        if cursor.rowcount > 0:
+            self._written(table, 'update', id)
         return cursor.rowcount > 0
 
     def delete(self, table: str, id: str) -> bool:
         """Delete record by ID"""
+        self._check_writable()
         query = f"DELETE FROM {table} WHERE id = ?"
 
-        cursor = self.conn.cursor()
-        cursor.execute(query, (id,))
-        self.conn.commit()
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(query, (id,))
+            self._commit()
 
+        if cursor.rowcount > 0:
+            self._written(table, 'delete', id)
         return cursor.rowcount > 0
 
+    def delete_where(self, table: str, where: str, params: tuple = ()) -> int:
+        """
+        Set-based DELETE ... RETURNING; returns the number of rows removed
+
+        Listeners are told of each row, as with delete(). Rows of a table
+        without an id column are reported by their primary key as JSON,
+        as apply_changes() does.
+        """
+        self._check_writable()
+        key = [row['name'] for row in sorted(
+            (row for row in self.fetchall(f"PRAGMA table_info({table})") if row['pk']), key=lambda row: row['pk']
+        )]
+        query = f"DELETE FROM {table} WHERE {where} RETURNING {', '.join(key)}"
+
+        with self.lock:
+            cursor = self.conn.cursor()
+            rows = [dict(row) for row in cursor.execute(query, params).fetchall()]
+            self._commit()
+
+        for row in rows:
+            self._written(table, 'delete', row['id'] if key == ['id'] else json.dumps(row, sort_keys=True))
+        return len(rows)
+
+    def apply_changes(self, changes: List[Dict[str, Any]]) -> int:
+        """
+        Apply replicated row changes in one transaction (allowed when read-only)
+
+        Each change is {'table', 'operation': 'upsert'|'delete', 'key': {pk: value},
+        'data': {column: value}}. Upserts update in place rather than replace,
+        so ON DELETE CASCADE children are untouched. Listeners are notified.
+        """
+        with self.transaction() as cursor:
+            for change in changes:
+                table, key = change['table'], change['key']
+                where = ' AND '.join(f"{column} = ?" for column in key)
+
+                if change['operation'] == 'delete':
+                    cursor.execute(f"DELETE FROM {table} WHERE {where}", tuple(key.values()))
+                    operation = 'delete'
+                else:
+                    data = change['data']
+                    updates = [column for column in data if column not in key]
+                    cursor.execute(
+                        f"INSERT INTO {table} ({', '.join(data)}) VALUES ({', '.join('?' for _ in data)}) "
+                        f"ON CONFLICT({', '.join(key)}) DO "
+                        + (f"UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in updates)}" if updates else "NOTHING"),
+                        tuple(data.values())
+                    )
+                    operation = 'update'
+
+                self._written(table, operation, key.get('id') or json.dumps(key, sort_keys=True))
+        return len(changes)
+
     def get(self, table: str, id: str) -> Optional[Dict]:
         """Get single record by ID"""
+        notifying = getattr(self._notifying, 'write', None)
+        if notifying and notifying[0] == table and notifying[1] == id:
+            return dict(notifying[2])
+
         row = self.fetchone(f"SELECT * FROM {table} WHERE id = ?", (id,))
+        if not row and table == 'projects' and id in self.archive.project_ids():
+            rows = self.archive.fetchall("SELECT * FROM projects WHERE id = ?", (id,))
+            row = rows[0] if rows else None
         return self._deserialize_row(row) if row else None
 
-    def query(self, table: str, filters: Dict[str, Any] = None) -> List[Dict]:
-        """Query with filters"""
+    def _archived(self, table: str, filters: Optional[Dict[str, Any]]) -> bool:
+        """Whether a project-scoped read is for an archived project (served from the archive)"""
+        return (table in ARCHIVE_TABLES and table != 'projects' and bool(filters)
+                and self.archive.contains(filters.get('project_id')))
+
+    def _select(self, table: str, filters: Dict[str, Any] = None) -> Tuple[str, tuple]:
+        """SELECT * with equality filters (None values ignored)"""
         query = f"SELECT * FROM {table}"
         params = []
 
@@ -307,9 +892,93 @@ class SQLiteDataLayer:
                 query += " WHERE " + " AND ".join(where_clauses)
                 params = list(filters.values())
 
-        rows = self.fetchall(query, tuple(params))
+        return query, tuple(params)
+
+    def query(self, table: str, filters: Dict[str, Any] = None) -> List[Dict]:
+        """Query with filters"""
+        query, params = self._select(table, filters)
+        rows = self.archive.fetchall(query, params) if self._archived(table, filters) else self.fetchall(query, params)
         return [self._deserialize_row(row) for row in rows]
 
+    def _open_reader(self) -> sqlite3.Connection:
+        """
+        Separate connection for long reads, so the shared one stays free
+
+        An in-memory database has no WAL to read a snapshot from (and a
+        shared-cache reader would lock writers out), so readers read a copy
+        made with the backup API instead. The copy is a named shared-cache
+        memory database nobody writes to, and it is shared by every reader
+        until the database changes (total_changes or schema_version move);
+        only then does the next reader make a new copy. An old copy is freed
+        when its last reader closes.
+        """
+        if self.in_memory:
+            with self.lock:
+                changes = self.conn.total_changes
+                schema = self.conn.execute('PRAGMA schema_version').fetchone()[0]
+                if not self._reader_copy or self._reader_copy[:2] != (changes, schema):
+                    uri = f"file:aven-reader-{uuid4().hex}?mode=memory&cache=shared"
+                    keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                    self.conn.backup(keeper)
+                    if self._reader_copy:
+                        self._reader_copy[3].close()
+                    self._reader_copy = (changes, schema, uri, keeper)
+                # Connected under the lock: the copy cannot be released first
+                conn = sqlite3.connect(self._reader_copy[2], uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, uri=self.db_path.startswith('file:'))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def snapshot(self):
+        """Read connection that sees one consistent state of the database until closed"""
+        conn = self._open_reader()
+        try:
+            # BEGIN is deferred: the first read is what pins the snapshot
+            conn.execute('BEGIN')
+            conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            yield conn
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def iter_query(self, table: str, filters: Dict[str, Any] = None, order_by: Optional[str] = None,
+                   batch_size: int = STREAM_BATCH_SIZE,
+                   conn: Optional[sqlite3.Connection] = None) -> Iterator[Dict]:
+        """
+        Yield filtered rows batch by batch without building the full list
+
+        Runs on its own connection (closed when the iterator is exhausted or
+        closed) unless a snapshot() connection is passed, so memory stays
+        constant and writers are not held up. Archived projects are read from
+        the archive.
+        """
+        query, params = self._select(table, filters)
+        if order_by:
+            query += f" ORDER BY {order_by}"
+
+        if self._archived(table, filters):
+            conn = None
+            reader = self.archive.connect()
+        else:
+            reader = conn or self._open_reader()
+        try:
+            cursor = reader.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._deserialize_row(dict(row))
+        finally:
+            if conn is None:
+                reader.close()
+
+    def columns(self, table: str) -> List[str]:
+        """Column names of a table"""
+        return [row['name'] for row in self.fetchall(f"PRAGMA table_info({table})")]
+
     def _serialize_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Convert Python objects to SQLite-compatible types"""
         serialized = {}
@@ -340,7 +1009,9 @@ class SQLiteDataLayer:
         json_fields = [
             'tags', 'blocked_by', 'comments', 'attachments', 'checklist',
             'subtasks', 'custom_fields', 'conditions', 'actions',
-            'notes', 'contracts', 'dependencies'  # New fields from new tables
+            'notes', 'contracts', 'dependencies',  # New fields from new tables
+            'errors', 'options',  # import_jobs
+            'received'  # upload_sessions
         ]
 
         for field in json_fields:
@@ -3,11 +3,16 @@ AvenStudio Backend - FastAPI Application
 Main entry point for Python backend server
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+from urllib.parse import quote
 from datetime import datetime
+import json
+import tempfile
 import uvicorn
 import sys
 import os
@@ -34,13 +39,71 @@ app.add_middleware(
 )
 
 # Initialize orchestrator
-DB_PATH = os.path.join(os.path.dirname(__file__), '../data/aven.db')
-orchestrator = Orchestrator({
-    'db_type': 'sqlite',
-    'db_path': DB_PATH
-})
+# AVEN_ROLE=primary ships changes to AVEN_STANDBY_DIR; AVEN_ROLE=standby serves
+# read-only traffic from a copy kept current from that directory
+DB_PATH = os.environ.get('AVEN_DB_PATH') or os.path.join(os.path.dirname(__file__), '../data/aven.db')
+ROLE = os.environ.get('AVEN_ROLE', 'primary')
+STANDBY_DIR = os.environ.get('AVEN_STANDBY_DIR')
+# AVEN_DB_PATH may be ':memory:' or a file: URI; AVEN_DB_SEED seeds a memory database from a file
+SEED_PATH = os.environ.get('AVEN_DB_SEED')
+# AVEN_STORAGE=sharded keeps each new project in its own database under <data dir>/shards
+STORAGE = os.environ.get('AVEN_STORAGE', 'single')
 
-print(f"✅ Database initialized at: {DB_PATH}")
+# Built at startup, not at import: worker processes (thumbnails, text
+# extraction) are spawned and re-import this module, and must not open the
+# database or start background threads of their own
+orchestrator: Optional[Orchestrator] = None
+
+
+# Writes a standby must still accept
+STANDBY_WRITE_PATHS = {'/api/admin/replication/promote'}
+
+
+class StandbyWriteGuard:
+    """
+    A standby serves reads only until it is promoted
+
+    Plain ASGI rather than @app.middleware("http"), so response bodies pass
+    through untouched (blob downloads stream memoryview chunks).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] == 'http'
+                and orchestrator.data_layer.read_only
+                and scope['method'] not in ('GET', 'HEAD', 'OPTIONS')
+                and scope['path'] not in STANDBY_WRITE_PATHS):
+            response = JSONResponse(status_code=503, content={'detail': 'Read-only standby: send writes to the primary'})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(StandbyWriteGuard)
+
+
+@app.on_event("startup")
+def startup():
+    """Open the database and start the modules"""
+    global orchestrator
+    orchestrator = Orchestrator({
+        'db_type': 'sqlite',
+        'db_path': DB_PATH,
+        'role': ROLE,
+        'standby_dir': STANDBY_DIR,
+        'storage': STORAGE,
+        'seed_path': SEED_PATH
+    })
+    print(f"✅ Database initialized at: {DB_PATH} ({ROLE})")
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """Stop background schedulers"""
+    if orchestrator:
+        orchestrator.shutdown()
 
 
 # ============================================================================
@@ -59,6 +122,7 @@ class TaskCreate(BaseModel):
     estimatedHours: Optional[float] = None
     completionPercentage: Optional[int] = 0
     blockedBy: List[str] = []
+    project_id: Optional[str] = None
 
 
 class TaskUpdate(BaseModel):
@@ -118,6 +182,17 @@ class ProjectUpdate(BaseModel):
     description: Optional[str] = None
 
 
+class ProjectClone(BaseModel):
+    name: Optional[str] = None
+    start_date: Optional[str] = None
+    include: Optional[List[str]] = None
+    reset_progress: bool = True
+
+
+class ProjectFromTemplate(ProjectCreate):
+    template_id: Optional[str] = None
+
+
 class BudgetItemCreate(BaseModel):
     project_id: str
     category: str
@@ -161,6 +236,12 @@ class DocumentUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class UploadCreate(BaseModel):
+    size: int
+    sha256: Optional[str] = None
+    content_type: Optional[str] = None
+
+
 class ContactCreate(BaseModel):
     project_id: str
     name: str
@@ -229,6 +310,112 @@ class MaterialUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+# ============================================================================
+# Streaming Responses
+# ============================================================================
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    """Stream when asked for NDJSON or with ?stream=1"""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+
+def _chunked(parts: Iterable[str]) -> Iterable[bytes]:
+    """Group encoded rows into ~64KB chunks"""
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_BYTES:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def streaming_response(request: Request, response: Dict[str, Any]) -> StreamingResponse:
+    """
+    Encode a module's row iterator as it is consumed
+
+    NDJSON (one row per line) when the client accepts it, otherwise a JSON
+    array written incrementally. Memory stays constant whatever the row count.
+    """
+    if not response.get('success'):
+        raise HTTPException(status_code=500, detail=response.get('error'))
+
+    rows = response['data']
+
+    if NDJSON_MEDIA_TYPE in request.headers.get('accept', ''):
+        lines = (json.dumps(row, default=str) + "\n" for row in rows)
+        return StreamingResponse(_chunked(lines), media_type=NDJSON_MEDIA_TYPE)
+
+    def array():
+        yield "["
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + json.dumps(row, default=str)
+        yield "]"
+
+    return StreamingResponse(_chunked(array()), media_type="application/json")
+
+
+class RangeNotSatisfiable(Exception):
+    """Range starts beyond the end of the content"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end exclusive) of a single 'bytes=' range, or None for the whole content
+
+    Malformed headers and multiple ranges are answered with the whole
+    content, as RFC 9110 allows. Raises RangeNotSatisfiable past the end.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    first, separator, last = header[len('bytes='):].strip().partition('-')
+    if not separator or ',' in last:
+        return None
+
+    try:
+        if not first.strip():
+            # Suffix range: the last n bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size
+
+        start = int(first)
+        end = int(last) + 1 if last.strip() else size
+    except ValueError:
+        return None
+
+    if last.strip() and end <= start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag (weak comparison)"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+class BlobStreamingResponse(StreamingResponse):
+    """StreamingResponse that hands memoryview chunks to the server without copying them"""
+
+    async def stream_response(self, send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        async for chunk in self.body_iterator:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
 # ============================================================================
 # Health Check
 # ============================================================================
@@ -249,21 +436,30 @@ def root():
 
 @app.get("/api/tasks")
 def list_tasks(
+    request: Request,
     status: Optional[str] = None,
     priority: Optional[str] = None,
-    category: Optional[str] = None
+    category: Optional[str] = None,
+    project_id: Optional[str] = None,
+    stream: bool = False
 ):
-    """List all tasks with optional filters"""
+    """List all tasks with optional filters (every project's unless project_id is given)"""
     try:
+        action = 'stream' if wants_stream(request, stream) else 'list'
         response = orchestrator.handle_request({
             'module': 'tasks',
-            'action': 'list',
+            'action': action,
             'filters': {
                 'status': status,
                 'priority': priority,
-                'category': category
+                'category': category,
+                'project_id': project_id
             }
         })
+
+        if action == 'stream':
+            return streaming_response(request, response)
+
         return response.get('data', [])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -321,7 +517,9 @@ def update_task(task_id: str, task: TaskUpdate):
         })
 
         if not response.get('success'):
-            raise HTTPException(status_code=404, detail="Task not found")
+            if response.get('error') == 'Task not found':
+                raise HTTPException(status_code=404, detail="Task not found")
+            raise HTTPException(status_code=400, detail=response.get('error'))
 
         return response.get('data')
     except HTTPException:
@@ -491,7 +689,41 @@ def execute_automation(data: AutomationExecute):
             'action': 'execute',
             'data': data.dict()
         })
-        return {"success": True, "triggered": response.get('data', [])}
+        return {
+            "success": True,
+            "triggered": response.get('data', []),
+            "cascade": response.get('cascade')
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/automation/metrics")
+def get_automation_metrics():
+    """Get automation cascade metrics"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'automation',
+            'action': 'metrics'
+        })
+        return response.get('data', {})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/automation/schedule")
+def get_automation_schedule():
+    """Get due-date scheduler status"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'automation',
+            'action': 'schedule_status'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=503, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -502,7 +734,7 @@ def execute_automation(data: AutomationExecute):
 
 @app.get("/api/projects")
 def list_projects(status: Optional[str] = None):
-    """List all projects with optional filters"""
+    """List all projects with optional filters (status=archived includes the archive database)"""
     try:
         response = orchestrator.handle_request({
             'module': 'projects',
@@ -532,6 +764,221 @@ def get_project(project_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/projects/{project_id}/graph")
+def get_project_graph(project_id: str):
+    """Get the task/milestone dependency graph for a project"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'graph',
+            'action': 'get',
+            'project_id': project_id
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=400, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/projects/{project_id}/graph/order")
+def get_project_graph_order(project_id: str):
+    """Get tasks and milestones in dependency order"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'graph',
+            'action': 'order',
+            'project_id': project_id
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=400, detail=response.get('error'))
+        return response.get('data', [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/projects/{project_id}/graph/critical-path")
+def get_project_critical_path(project_id: str, include_nodes: bool = True):
+    """Get CPM dates, floats and the critical path for a project"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'graph',
+            'action': 'critical_path',
+            'project_id': project_id,
+            'include_nodes': include_nodes
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=400, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/projects/{project_id}/graph/{node_id}/blockers")
+def get_node_blockers(project_id: str, node_id: str, transitive: bool = False):
+    """Get what blocks a task or milestone"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'graph',
+            'action': 'blockers',
+            'project_id': project_id,
+            'id': node_id,
+            'transitive': transitive
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=404, detail=response.get('error'))
+        return response.get('data', [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/projects/{project_id}/graph/{node_id}/dependents")
+def get_node_dependents(project_id: str, node_id: str, transitive: bool = False):
+    """Get what depends on a task or milestone"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'graph',
+            'action': 'dependents',
+            'project_id': project_id,
+            'id': node_id,
+            'transitive': transitive
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=404, detail=response.get('error'))
+        return response.get('data', [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/projects/{project_id}/graph/{node_id}/unblocks")
+def get_node_unblocks(project_id: str, node_id: str):
+    """Get what becomes unblocked once a task or milestone is finished"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'graph',
+            'action': 'unblocks',
+            'project_id': project_id,
+            'id': node_id
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=404, detail=response.get('error'))
+        return response.get('data', [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/projects/from-template")
+def create_project_from_template(project: ProjectFromTemplate):
+    """New project with the standard UK phase milestones and budget categories, optionally copying a template project"""
+    response = orchestrator.handle_request({
+        'module': 'projects',
+        'action': 'from_template',
+        'data': project.dict(exclude_unset=True)
+    })
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Template project not found' else 400
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.post("/api/projects/{project_id}/clone")
+def clone_project(project_id: str, options: ProjectClone):
+    """Copy a project's records under new ids; dates move with start_date"""
+    response = orchestrator.handle_request({
+        'module': 'projects',
+        'action': 'clone',
+        'id': project_id,
+        'data': options.dict(exclude_unset=True)
+    })
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Project not found' else 400
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return response.get('data')
+
+
+# Archive errors that are not "no such project" (404)
+ARCHIVE_CONFLICTS = (
+    'Project is already archived',
+    'Only completed projects can be archived',
+    'Cannot archive default project'
+)
+
+
+@app.post("/api/projects/{project_id}/archive")
+def archive_project(project_id: str):
+    """Move a completed project into the archive database (reads of it keep working)"""
+    response = orchestrator.handle_request({
+        'module': 'projects',
+        'action': 'archive',
+        'id': project_id
+    })
+    if not response.get('success'):
+        status = 409 if response.get('error') in ARCHIVE_CONFLICTS else 404
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.post("/api/projects/{project_id}/restore")
+def restore_project(project_id: str):
+    """Move an archived project back into the working database"""
+    response = orchestrator.handle_request({
+        'module': 'projects',
+        'action': 'restore',
+        'id': project_id
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=404, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.get("/api/projects/{project_id}/export")
+def export_project(project_id: str):
+    """Stream the project, its records and document files as a zip archive"""
+    response = orchestrator.handle_request({
+        'module': 'projects',
+        'action': 'export',
+        'id': project_id
+    })
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Project not found' else 500
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return StreamingResponse(
+        response['data'],
+        media_type='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{response["filename"]}"'}
+    )
+
+
+@app.post("/api/projects/import")
+async def import_project(request: Request, name: Optional[str] = None):
+    """Restore a project export (request body) as a new project with new ids"""
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as archive:
+        async for chunk in request.stream():
+            archive.write(chunk)
+        archive.seek(0)
+
+        response = await run_in_threadpool(orchestrator.handle_request, {
+            'module': 'projects',
+            'action': 'import',
+            'file': archive,
+            'name': name
+        })
+    if not response.get('success'):
+        raise HTTPException(status_code=400, detail=response.get('error'))
+    return response.get('data')
+
+
 @app.post("/api/projects")
 def create_project(project: ProjectCreate):
     """Create new project"""
@@ -571,7 +1018,7 @@ def update_project(project_id: str, project: ProjectUpdate):
 
 @app.delete("/api/projects/{project_id}")
 def delete_project(project_id: str):
-    """Delete project"""
+    """Delete project (hidden at once; its records are purged in the background)"""
     try:
         response = orchestrator.handle_request({
             'module': 'projects',
@@ -580,7 +1027,7 @@ def delete_project(project_id: str):
         })
         if not response.get('success'):
             raise HTTPException(status_code=404, detail="Project not found")
-        return {"success": True}
+        return {"success": True, "deleted_at": response['data']['deleted_at']}
     except HTTPException:
         raise
     except Exception as e:
@@ -606,7 +1053,8 @@ def get_project_stats(project_id: str):
 # ============================================================================
 
 @app.get("/api/budget")
-def list_budget_items(project_id: str, category: Optional[str] = None, status: Optional[str] = None):
+def list_budget_items(request: Request, project_id: str, category: Optional[str] = None,
+                      status: Optional[str] = None, stream: bool = False):
     """List budget items with optional filters"""
     try:
         filters = {'project_id': project_id}
@@ -615,11 +1063,16 @@ def list_budget_items(project_id: str, category: Optional[str] = None, status: O
         if status:
             filters['status'] = status
 
+        action = 'stream' if wants_stream(request, stream) else 'list'
         response = orchestrator.handle_request({
             'module': 'budget',
-            'action': 'list',
+            'action': action,
             'filters': filters
         })
+
+        if action == 'stream':
+            return streaming_response(request, response)
+
         return response.get('data', [])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -712,39 +1165,154 @@ def get_budget_summary(project_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/budget/forecast/{project_id}")
+def get_budget_forecast(project_id: str, simulations: int = 20000, seed: Optional[int] = None):
+    """Monte Carlo cost-at-completion bands and per-category risk"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'budget',
+            'action': 'get_forecast',
+            'project_id': project_id,
+            'simulations': simulations,
+            'seed': seed
+        })
+
+        if not response.get('success'):
+            raise HTTPException(status_code=400, detail=response.get('error'))
+
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/budget/cashflow/{project_id}")
+def get_budget_cashflow(project_id: str, interval: str = 'month'):
+    """Projected weekly/monthly outgoings from budget items and material deliveries"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'budget',
+            'action': 'get_cashflow',
+            'project_id': project_id,
+            'interval': interval
+        })
+
+        if not response.get('success'):
+            raise HTTPException(status_code=400, detail=response.get('error'))
+
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/budget/evm/{project_id}")
+def get_budget_evm(project_id: str):
+    """Weekly earned value series (PV/EV/AC, CPI/SPI) for a project"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'budget',
+            'action': 'get_evm',
+            'project_id': project_id
+        })
+
+        if not response.get('success'):
+            raise HTTPException(status_code=400, detail=response.get('error'))
+
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ============================================================================
 # Documents Endpoints
 # ============================================================================
 
 @app.get("/api/documents")
-def list_documents(project_id: str, document_type: Optional[str] = None):
+def list_documents(request: Request, project_id: str, document_type: Optional[str] = None, stream: bool = False):
     """List documents with optional filters"""
     try:
         filters = {'project_id': project_id}
         if document_type:
             filters['document_type'] = document_type
 
+        action = 'stream' if wants_stream(request, stream) else 'list'
         response = orchestrator.handle_request({
             'module': 'documents',
-            'action': 'list',
+            'action': action,
             'filters': filters
         })
+
+        if action == 'stream':
+            return streaming_response(request, response)
+
         return response.get('data', [])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/documents/search")
+def search_documents(q: str, project_id: Optional[str] = None, limit: int = 20):
+    """Full-text search over document contents (current versions only)"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'search',
+        'query': q,
+        'project_id': project_id,
+        'limit': max(1, min(limit, 100))
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=400, detail=response.get('error'))
+    return response.get('data', [])
+
+
+@app.get("/api/documents/search/status")
+def document_search_status():
+    """Text index backlog and totals"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'index_status'
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=503, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.get("/api/documents/latest")
+def latest_documents(project_id: str, document_type: Optional[str] = None, as_of: Optional[str] = None):
+    """Latest version of each project document, or the versions current at as_of"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'latest',
+        'project_id': project_id,
+        'document_type': document_type,
+        'as_of': as_of
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=400, detail=response.get('error'))
+    return response.get('data', [])
+
+
 @app.get("/api/documents/{document_id}")
-def get_document(document_id: str):
-    """Get single document by ID"""
+def get_document(document_id: str, version: Optional[int] = None, as_of: Optional[str] = None):
+    """Get single document by ID, or as it was at a version or date"""
     try:
         response = orchestrator.handle_request({
             'module': 'documents',
             'action': 'get',
-            'id': document_id
+            'id': document_id,
+            'version': version,
+            'as_of': as_of
         })
         if not response.get('success'):
-            raise HTTPException(status_code=404, detail="Document not found")
+            error = response.get('error', '')
+            if error.startswith('Invalid as_of date'):
+                raise HTTPException(status_code=400, detail=error)
+            raise HTTPException(status_code=404, detail=error or "Document not found")
         return response.get('data')
     except HTTPException:
         raise
@@ -807,23 +1375,249 @@ def delete_document(document_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/documents/{document_id}/content")
+async def upload_document_content(document_id: str, request: Request):
+    """Store the request body as the document's file (streamed to disk, deduplicated by content)"""
+    response = await run_in_threadpool(orchestrator.handle_request, {
+        'module': 'documents',
+        'action': 'open_upload',
+        'id': document_id
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=404, detail=response.get('error'))
+
+    upload = response['data']
+    try:
+        async for chunk in request.stream():
+            upload.write(chunk)
+
+        response = await run_in_threadpool(orchestrator.handle_request, {
+            'module': 'documents',
+            'action': 'put_content',
+            'id': document_id,
+            'upload': upload,
+            'content_type': request.headers.get('content-type')
+        })
+    finally:
+        upload.discard()
+
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Document not found' else 500
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.get("/api/documents/{document_id}/versions")
+def list_document_versions(document_id: str):
+    """Version history of a document, newest first"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'versions',
+        'id': document_id
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=404, detail=response.get('error'))
+    return response.get('data', [])
+
+
+@app.api_route("/api/documents/{document_id}/content", methods=["GET", "HEAD"])
+def download_document_content(document_id: str, request: Request, version: Optional[int] = None):
+    """
+    Stream the document's stored file (or an earlier version's), or the single byte range asked for
+
+    The strong ETag is the content hash: If-None-Match revalidates a cached
+    copy, and If-Range resumes a transfer only while the content is unchanged.
+    """
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'get_content',
+        'id': document_id,
+        'version': version
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=404, detail=response.get('error'))
+
+    document, content = response['data'], response['content']
+    etag = f'"{content.hash}"'
+    headers = {'ETag': etag, 'Accept-Ranges': 'bytes'}
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        content.close()
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get('if-range')
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get('range'), content.size)
+        except RangeNotSatisfiable:
+            content.close()
+            return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{content.size}'})
+
+    start, end = byte_range or (0, content.size)
+    headers['Content-Length'] = str(end - start)
+    headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(document['filename'])}"
+    if byte_range:
+        headers['Content-Range'] = f'bytes {start}-{end - 1}/{content.size}'
+    status = 206 if byte_range else 200
+    media_type = document.get('content_type') or 'application/octet-stream'
+
+    if request.method == 'HEAD':
+        content.close()
+        return Response(status_code=status, headers=headers, media_type=media_type)
+    return BlobStreamingResponse(content.iter_range(start, end), status_code=status,
+                                 headers=headers, media_type=media_type)
+
+
+# Thumbnail errors that are not "no such thing" (404)
+THUMBNAIL_ERROR_STATUS = {
+    'Previews need Pillow installed': 501,
+    'Thumbnail queue is full, try again shortly': 503,
+    'Could not render a preview of this file': 415
+}
+
+
+@app.get("/api/documents/{document_id}/thumbnail")
+def get_document_thumbnail(document_id: str, request: Request, size: int = 128):
+    """JPEG preview of a photo or drawing (size 128, 512 or 1024), rendered on first request"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'thumbnail',
+        'id': document_id,
+        'size': size
+    })
+    if not response.get('success'):
+        error = response.get('error', '')
+        status = 400 if error.startswith('size must be') else THUMBNAIL_ERROR_STATUS.get(error, 404)
+        headers = {'Retry-After': '5'} if status == 503 else None
+        raise HTTPException(status_code=status, detail=error, headers=headers)
+
+    thumbnail = response['data']
+    headers = {'ETag': thumbnail['etag'], 'Cache-Control': 'private, max-age=86400'}
+    if etag_matches(request.headers.get('if-none-match'), thumbnail['etag']):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(thumbnail['path'], media_type='image/jpeg', headers=headers)
+
+
+@app.post("/api/documents/{document_id}/uploads")
+def create_document_upload(document_id: str, upload: UploadCreate):
+    """Start a resumable chunked upload of the document's content"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'create_upload',
+        'id': document_id,
+        'data': upload.dict()
+    })
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Document not found' else 400
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.get("/api/documents/{document_id}/uploads/{session_id}")
+def get_document_upload(document_id: str, session_id: str):
+    """Upload session state: verified byte ranges and next_offset to resume from"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'get_upload',
+        'id': document_id,
+        'session_id': session_id
+    })
+    if not response.get('success'):
+        raise HTTPException(status_code=404, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.put("/api/documents/{document_id}/uploads/{session_id}")
+async def put_document_upload_chunk(document_id: str, session_id: str, offset: int, request: Request):
+    """
+    Write the request body at offset
+
+    X-Chunk-SHA256 carries the chunk's checksum; a chunk that does not match
+    is rejected and must be sent again.
+    """
+    response = await run_in_threadpool(orchestrator.handle_request, {
+        'module': 'documents',
+        'action': 'open_chunk',
+        'id': document_id,
+        'session_id': session_id,
+        'offset': offset
+    })
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Upload session not found' else 400
+        raise HTTPException(status_code=status, detail=response.get('error'))
+
+    chunk = response['data']
+    try:
+        async for data in request.stream():
+            chunk.write(data)
+
+        response = await run_in_threadpool(orchestrator.handle_request, {
+            'module': 'documents',
+            'action': 'put_chunk',
+            'chunk': chunk,
+            'sha256': request.headers.get('x-chunk-sha256')
+        })
+    finally:
+        chunk.discard()
+
+    if not response.get('success'):
+        raise HTTPException(status_code=400, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.post("/api/documents/{document_id}/uploads/{session_id}/commit")
+def commit_document_upload(document_id: str, session_id: str):
+    """Store the completed upload as the document's content; returns the updated document"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'commit_upload',
+        'id': document_id,
+        'session_id': session_id
+    })
+    if not response.get('success'):
+        status = 404 if response.get('error') in ('Upload session not found', 'Document not found') else 409
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.delete("/api/documents/{document_id}/uploads/{session_id}")
+def abort_document_upload(document_id: str, session_id: str):
+    """Discard an upload session"""
+    response = orchestrator.handle_request({
+        'module': 'documents',
+        'action': 'abort_upload',
+        'id': document_id,
+        'session_id': session_id
+    })
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Upload session not found' else 409
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return {"success": True}
+
+
 # ============================================================================
 # Contacts Endpoints
 # ============================================================================
 
 @app.get("/api/contacts")
-def list_contacts(project_id: str, role: Optional[str] = None):
+def list_contacts(request: Request, project_id: str, role: Optional[str] = None, stream: bool = False):
     """List contacts with optional filters"""
     try:
         filters = {'project_id': project_id}
         if role:
             filters['role'] = role
 
+        action = 'stream' if wants_stream(request, stream) else 'list'
         response = orchestrator.handle_request({
             'module': 'contacts',
-            'action': 'list',
+            'action': action,
             'filters': filters
         })
+
+        if action == 'stream':
+            return streaming_response(request, response)
+
         return response.get('data', [])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -907,7 +1701,8 @@ def delete_contact(contact_id: str):
 # ============================================================================
 
 @app.get("/api/milestones")
-def list_milestones(project_id: str, phase: Optional[str] = None, status: Optional[str] = None):
+def list_milestones(request: Request, project_id: str, phase: Optional[str] = None,
+                    status: Optional[str] = None, stream: bool = False):
     """List milestones with optional filters"""
     try:
         filters = {'project_id': project_id}
@@ -916,11 +1711,16 @@ def list_milestones(project_id: str, phase: Optional[str] = None, status: Option
         if status:
             filters['status'] = status
 
+        action = 'stream' if wants_stream(request, stream) else 'list'
         response = orchestrator.handle_request({
             'module': 'milestones',
-            'action': 'list',
+            'action': action,
             'filters': filters
         })
+
+        if action == 'stream':
+            return streaming_response(request, response)
+
         return response.get('data', [])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -973,7 +1773,9 @@ def update_milestone(milestone_id: str, milestone: MilestoneUpdate):
             'data': milestone.dict(exclude_unset=True)
         })
         if not response.get('success'):
-            raise HTTPException(status_code=404, detail="Milestone not found")
+            if response.get('error') == 'Milestone not found':
+                raise HTTPException(status_code=404, detail="Milestone not found")
+            raise HTTPException(status_code=400, detail=response.get('error'))
         return response.get('data')
     except HTTPException:
         raise
@@ -1008,7 +1810,42 @@ def get_milestones_timeline(project_id: str):
             'action': 'get_timeline',
             'project_id': project_id
         })
-        return response.get('data', {})
+        timeline = response.get('data', {})
+
+        # Add the critical path from the dependency graph (maintained incrementally)
+        schedule = orchestrator.handle_request({
+            'module': 'graph',
+            'action': 'critical_path',
+            'project_id': project_id,
+            'include_nodes': False
+        })
+        if schedule.get('success') and timeline:
+            timeline['critical_path'] = schedule['data']['critical_path']
+            timeline['projected_finish'] = schedule['data']['project_finish']
+
+        return timeline
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/milestones/forecast/{project_id}")
+def get_milestones_forecast(project_id: str, simulations: int = 20000, seed: Optional[int] = None):
+    """Monte Carlo P50/P80/P95 completion dates for the remaining build phases"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'milestones',
+            'action': 'get_forecast',
+            'project_id': project_id,
+            'simulations': simulations,
+            'seed': seed
+        })
+
+        if not response.get('success'):
+            raise HTTPException(status_code=400, detail=response.get('error'))
+
+        return response.get('data')
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1018,18 +1855,23 @@ def get_milestones_timeline(project_id: str):
 # ============================================================================
 
 @app.get("/api/materials")
-def list_materials(project_id: str, delivery_status: Optional[str] = None):
+def list_materials(request: Request, project_id: str, delivery_status: Optional[str] = None, stream: bool = False):
     """List materials with optional filters"""
     try:
         filters = {'project_id': project_id}
         if delivery_status:
             filters['delivery_status'] = delivery_status
 
+        action = 'stream' if wants_stream(request, stream) else 'list'
         response = orchestrator.handle_request({
             'module': 'materials',
-            'action': 'list',
+            'action': action,
             'filters': filters
         })
+
+        if action == 'stream':
+            return streaming_response(request, response)
+
         return response.get('data', [])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1136,6 +1978,240 @@ def get_overdue_materials(project_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================================================
+# Import Endpoints
+# ============================================================================
+
+# Rows are validated with the same models as the create endpoints
+IMPORT_SCHEMAS = {
+    'tasks': TaskCreate,
+    'budget_items': BudgetItemCreate,
+    'documents': DocumentCreate,
+    'contacts': ContactCreate,
+    'milestones': MilestoneCreate,
+    'materials': MaterialCreate
+}
+
+
+def _import_result(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Job data, or the HTTP error for a failed import call"""
+    if not response.get('success'):
+        status = 404 if response.get('error') == 'Import job not found' else 400
+        raise HTTPException(status_code=status, detail=response.get('error'))
+    return response.get('data')
+
+
+@app.post("/api/import/{table}")
+async def import_rows(
+    table: str,
+    request: Request,
+    project_id: Optional[str] = None,
+    format: Optional[str] = None,
+    mapping: Optional[str] = None,
+    batch_size: int = 500
+):
+    """
+    Import a CSV or NDJSON request body into a table
+
+    mapping is a JSON object of source column -> field name. project_id is
+    used for rows without one. Invalid rows are reported, not fatal.
+    """
+    schema = IMPORT_SCHEMAS.get(table)
+    if not schema:
+        raise HTTPException(status_code=404, detail=f"Table cannot be imported: {table}")
+
+    content_type = request.headers.get('content-type', '')
+    source_format = format or ('ndjson' if 'json' in content_type else 'csv')
+
+    try:
+        column_mapping = json.loads(mapping) if mapping else {}
+    except ValueError:
+        column_mapping = None
+    if not isinstance(column_mapping, dict):
+        raise HTTPException(status_code=400, detail="mapping must be a JSON object")
+
+    job = _import_result(await run_in_threadpool(orchestrator.handle_request, {
+        'module': 'imports',
+        'action': 'create',
+        'table': table,
+        'format': source_format,
+        'options': {'project_id': project_id, 'mapping': column_mapping, 'batch_size': batch_size}
+    }))
+
+    # Spool the body to disk so the import can be resumed from the same file
+    with open(job['source_path'], 'wb') as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+
+    return _import_result(await run_in_threadpool(orchestrator.handle_request, {
+        'module': 'imports',
+        'action': 'run',
+        'id': job['id'],
+        'schema': schema
+    }))
+
+
+@app.get("/api/import/jobs")
+def list_import_jobs(status: Optional[str] = None):
+    """List import jobs"""
+    response = orchestrator.handle_request({
+        'module': 'imports',
+        'action': 'list',
+        'filters': {'status': status}
+    })
+    return _import_result(response)
+
+
+@app.get("/api/import/jobs/{job_id}")
+def get_import_job(job_id: str):
+    """Get an import job's progress and row errors"""
+    return _import_result(orchestrator.handle_request({
+        'module': 'imports',
+        'action': 'get',
+        'id': job_id
+    }))
+
+
+@app.post("/api/import/jobs/{job_id}/resume")
+def resume_import_job(job_id: str):
+    """Continue a failed import after its last committed batch"""
+    job = _import_result(orchestrator.handle_request({
+        'module': 'imports',
+        'action': 'get',
+        'id': job_id
+    }))
+
+    return _import_result(orchestrator.handle_request({
+        'module': 'imports',
+        'action': 'run',
+        'id': job_id,
+        'schema': IMPORT_SCHEMAS[job['table_name']]
+    }))
+
+
+# ============================================================================
+# Admin Endpoints
+# ============================================================================
+
+@app.get("/api/admin/maintenance")
+def get_maintenance_status():
+    """Get background maintenance scheduler status"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'maintenance',
+            'action': 'status'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=503, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/maintenance/run")
+def run_maintenance():
+    """Run the status maintenance sweep now"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'maintenance',
+            'action': 'run'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=503, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/purge")
+def get_purge_status():
+    """Deleted projects still being purged in the background"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'maintenance',
+            'action': 'purge_status'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=503, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/backup", status_code=202)
+def start_backup():
+    """Start an online backup; poll GET /api/admin/backup for progress"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'maintenance',
+            'action': 'backup'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=503, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/backup")
+def get_backup_status():
+    """Backup progress, schedule and retained backups"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'maintenance',
+            'action': 'backup_status'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=503, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/replication")
+def get_replication_status():
+    """Role, shipping/apply position and replication lag"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'replication',
+            'action': 'status'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=503, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/replication/promote")
+def promote_standby():
+    """Apply shipped changes and make this standby the writable primary"""
+    try:
+        response = orchestrator.handle_request({
+            'module': 'replication',
+            'action': 'promote'
+        })
+        if not response.get('success'):
+            raise HTTPException(status_code=409, detail=response.get('error'))
+        return response.get('data')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ============================================================================
 # Server Entry Point
 # ============================================================================
@@ -0,0 +1,299 @@
+"""
+Automation Cascade Engine
+Evaluates rules server-side and follows the events their actions cause
+
+An event (task, trigger) is processed as a bounded work queue: actions that
+change status/priority/assignee enqueue the matching follow-up trigger.
+Each (rule, task, version) evaluation is memoized per cascade, repeated task
+states are reported as cycles, and depth/evaluation caps keep the cost of a
+single write predictable.
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List
+
+
+MAX_CASCADE_DEPTH = 8
+MAX_CASCADE_EVALUATIONS = 500
+
+# Rule condition/action fields (camelCase, as in automationEngine.ts) -> task columns
+RULE_FIELD_COLUMNS = {
+    'assignedTo': 'assigned_to',
+    'dueDate': 'due_date',
+    'startDate': 'start_date',
+    'estimatedHours': 'estimated_hours',
+    'completionPercentage': 'completion_percentage',
+    'blockedBy': 'blocked_by'
+}
+
+# Column changes that raise a follow-up trigger
+CHANGE_TRIGGERS = {
+    'status': 'status_changed',
+    'priority': 'priority_changed',
+    'assigned_to': 'assigned'
+}
+
+# Cascade size histogram buckets (upper bound inclusive)
+SIZE_BUCKETS = [1, 4, 16, 64]
+
+
+def evaluate_condition(task: Dict[str, Any], condition: Dict[str, Any]) -> bool:
+    """Evaluate a single condition against a task row"""
+    field = RULE_FIELD_COLUMNS.get(condition.get('field'), condition.get('field'))
+    operator = condition.get('operator')
+    value = condition.get('value')
+    task_value = task.get(field)
+
+    try:
+        if operator == 'equals':
+            return task_value == value
+        elif operator == 'not_equals':
+            return task_value != value
+        elif operator == 'greater_than':
+            return float(task_value) > float(value)
+        elif operator == 'less_than':
+            return float(task_value) < float(value)
+        elif operator == 'contains':
+            if isinstance(task_value, list):
+                return value in task_value
+            return str(value).lower() in str(task_value).lower()
+    except (TypeError, ValueError):
+        return False
+
+    return False
+
+
+def apply_action(task: Dict[str, Any], action: Dict[str, Any], notifications: List[str]) -> Dict[str, Any]:
+    """Return the column updates a single action makes"""
+    action_type = action.get('action')
+    parameters = action.get('parameters') or {}
+    updates = {}
+
+    if action_type == 'set_status' and parameters.get('status'):
+        updates['status'] = parameters['status']
+    elif action_type == 'set_priority' and parameters.get('priority'):
+        updates['priority'] = parameters['priority']
+    elif action_type == 'assign_to' and 'assignedTo' in parameters:
+        updates['assigned_to'] = parameters['assignedTo']
+    elif action_type == 'add_tag' and parameters.get('tag'):
+        tags = task.get('tags') or []
+        if parameters['tag'] not in tags:
+            updates['tags'] = tags + [parameters['tag']]
+    elif action_type == 'send_notification':
+        notifications.append(parameters.get('message') or 'Task automation triggered')
+
+    return updates
+
+
+class CascadeEngine:
+    """Bounded, memoized rule evaluation with cascade metrics"""
+
+    def __init__(self, max_depth: int = MAX_CASCADE_DEPTH,
+                 max_evaluations: int = MAX_CASCADE_EVALUATIONS):
+        self.max_depth = max_depth
+        self.max_evaluations = max_evaluations
+
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            'cascades': 0,
+            'events_processed': 0,
+            'evaluations': 0,
+            'memo_hits': 0,
+            'rules_fired': 0,
+            'cycles_detected': 0,
+            'depth_limit_hits': 0,
+            'evaluation_limit_hits': 0,
+            'max_depth_seen': 0,
+            'max_size_seen': 0,
+            'size_histogram': {self._bucket_label(i): 0 for i in range(len(SIZE_BUCKETS) + 1)},
+            'last_cascade': None
+        }
+
+    def process(self, task_id: str, trigger: str, data_layer) -> Dict[str, Any]:
+        """
+        Process one event and every cascade it causes
+
+        Returns:
+            {'triggered': [rule ids in firing order], 'events': int,
+             'depth': int, 'cycles': [...], 'truncated': bool, 'notifications': [...]}
+        """
+        rules_by_trigger = self._load_rules(data_layer)
+
+        tasks: Dict[str, Dict[str, Any]] = {}
+        versions: Dict[str, int] = {}
+        memo = set()
+        seen_states = set()
+        cycle_states = set()
+
+        queue = deque([(task_id, trigger, 0, [])])
+        triggered: List[str] = []
+        fire_counts: Dict[str, int] = {}
+        cycles: List[Dict[str, Any]] = []
+        notifications: List[str] = []
+        events = 0
+        evaluations = 0
+        memo_hits = 0
+        depth_limit_hits = 0
+        max_depth = 0
+        truncated = False
+        # Set only when an evaluation was still due as the limit stopped the cascade
+        evaluation_limit_hit = False
+
+        while queue:
+            current_id, current_trigger, depth, path = queue.popleft()
+
+            if depth > self.max_depth:
+                depth_limit_hits += 1
+                truncated = True
+                continue
+
+            task = tasks.get(current_id)
+            if task is None:
+                task = data_layer.get('tasks', current_id)
+                if not task:
+                    continue
+                tasks[current_id] = task
+                versions[current_id] = 0
+
+            # Same trigger on an identical task state means the rules are looping
+            state = (current_id, current_trigger, self._fingerprint(task))
+            if state in seen_states:
+                if state not in cycle_states:
+                    cycle_states.add(state)
+                    cycles.append({'task_id': current_id, 'trigger': current_trigger, 'rules': path})
+                continue
+            seen_states.add(state)
+
+            events += 1
+            max_depth = max(max_depth, depth)
+
+            for rule in rules_by_trigger.get(current_trigger, []):
+                memo_key = (rule['id'], current_id, versions[current_id])
+                if memo_key in memo:
+                    memo_hits += 1
+                    continue
+                memo.add(memo_key)
+
+                if evaluations >= self.max_evaluations:
+                    truncated = evaluation_limit_hit = True
+                    queue.clear()
+                    break
+                evaluations += 1
+
+                if not all(evaluate_condition(task, c) for c in rule['conditions'] or []):
+                    continue
+
+                updates = {}
+                for action in rule['actions'] or []:
+                    updates.update(apply_action({**task, **updates}, action, notifications))
+
+                changed = {k: v for k, v in updates.items() if task.get(k) != v}
+                if not changed and not any(a.get('action') == 'send_notification' for a in rule['actions'] or []):
+                    continue
+
+                triggered.append(rule['id'])
+                fire_counts[rule['id']] = fire_counts.get(rule['id'], 0) + 1
+
+                if not changed:
+                    continue
+
+                data_layer.update('tasks', current_id, dict(changed))
+                task.update(changed)
+                versions[current_id] += 1
+
+                for column, follow_up in CHANGE_TRIGGERS.items():
+                    if column in changed and (column != 'assigned_to' or changed[column]):
+                        queue.append((current_id, follow_up, depth + 1, path + [rule['id']]))
+
+        self._record_rule_fires(fire_counts, data_layer)
+
+        summary = {
+            'task_id': task_id,
+            'trigger': trigger,
+            'events': events,
+            'evaluations': evaluations,
+            'memo_hits': memo_hits,
+            'depth_limit_hits': depth_limit_hits,
+            'evaluation_limit_hit': evaluation_limit_hit,
+            'depth': max_depth,
+            'rules_fired': len(triggered),
+            'cycles': len(cycles),
+            'truncated': truncated
+        }
+        self._record_metrics(summary)
+
+        return {
+            'triggered': triggered,
+            'events': events,
+            'evaluations': evaluations,
+            'depth': max_depth,
+            'cycles': cycles,
+            'truncated': truncated,
+            'notifications': notifications
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Cascade counters and size distribution"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+            metrics['size_histogram'] = dict(self.metrics['size_histogram'])
+        metrics['limits'] = {'max_depth': self.max_depth, 'max_evaluations': self.max_evaluations}
+        return metrics
+
+    def _load_rules(self, data_layer) -> Dict[str, List[Dict[str, Any]]]:
+        """Enabled rules grouped by trigger, oldest first (one query per cascade)"""
+        rules = data_layer.query('automation_rules', {'enabled': 1})
+        rules.sort(key=lambda r: r.get('created_at') or '')
+
+        by_trigger: Dict[str, List[Dict[str, Any]]] = {}
+        for rule in rules:
+            by_trigger.setdefault(rule['trigger'], []).append(rule)
+        return by_trigger
+
+    def _record_rule_fires(self, fire_counts: Dict[str, int], data_layer):
+        """Persist trigger counts once per cascade"""
+        now = datetime.utcnow().isoformat()
+        for rule_id, count in fire_counts.items():
+            data_layer.execute(
+                "UPDATE automation_rules SET trigger_count = trigger_count + ?, last_triggered = ? WHERE id = ?",
+                (count, now, rule_id)
+            )
+
+    def _record_metrics(self, summary: Dict[str, Any]):
+        """Fold one cascade into the running metrics"""
+        with self._metrics_lock:
+            self._fold_metrics(summary)
+
+    def _fold_metrics(self, summary: Dict[str, Any]):
+        """Update counters (caller holds the metrics lock)"""
+        metrics = self.metrics
+        metrics['cascades'] += 1
+        metrics['events_processed'] += summary['events']
+        metrics['evaluations'] += summary['evaluations']
+        metrics['memo_hits'] += summary['memo_hits']
+        metrics['depth_limit_hits'] += summary['depth_limit_hits']
+        metrics['evaluation_limit_hits'] += int(summary['evaluation_limit_hit'])
+        metrics['rules_fired'] += summary['rules_fired']
+        metrics['cycles_detected'] += summary['cycles']
+        metrics['max_depth_seen'] = max(metrics['max_depth_seen'], summary['depth'])
+        metrics['max_size_seen'] = max(metrics['max_size_seen'], summary['events'])
+
+        bucket = next((i for i, bound in enumerate(SIZE_BUCKETS) if summary['events'] <= bound), len(SIZE_BUCKETS))
+        metrics['size_histogram'][self._bucket_label(bucket)] += 1
+        metrics['last_cascade'] = summary
+
+    @staticmethod
+    def _fingerprint(task: Dict[str, Any]) -> tuple:
+        """Fields rule actions can change"""
+        return (task.get('status'), task.get('priority'), task.get('assigned_to'), tuple(task.get('tags') or []))
+
+    @staticmethod
+    def _bucket_label(index: int) -> str:
+        """Histogram label for bucket index"""
+        if index >= len(SIZE_BUCKETS):
+            return f">{SIZE_BUCKETS[-1]}"
+        lower = SIZE_BUCKETS[index - 1] + 1 if index > 0 else 0
+        upper = SIZE_BUCKETS[index]
+        return f"{lower}-{upper}" if lower != upper else str(upper)
@@ -7,12 +7,33 @@ from typing import Dict, Any
 from uuid import uuid4
 from datetime import datetime
 
+from .engine import CascadeEngine
+from .scheduler import DueDateScheduler
+
 
 class AutomationModule:
     """Automation rules module"""
 
     def __init__(self):
         self.name = "automation"
+        self.engine = CascadeEngine()
+        self.scheduler = None
+
+    def attach(self, data_layer):
+        """Start the due-date scheduler against the shared data layer (not on a read-only standby)"""
+        if data_layer.read_only:
+            return
+        self.scheduler = DueDateScheduler(
+            data_layer,
+            on_fire=lambda trigger, table, record_id: self._fire(trigger, table, record_id, data_layer)
+        )
+        self.scheduler.start()
+
+    def detach(self):
+        """Stop background work"""
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
 
     def handle(self, request: Dict[str, Any], data_layer) -> Dict[str, Any]:
         """Handle automation requests"""
@@ -24,6 +45,10 @@ class AutomationModule:
             return self._create_rule(request.get('data'), data_layer)
         elif action == 'execute':
             return self._execute(request.get('data'), data_layer)
+        elif action == 'schedule_status':
+            return self._schedule_status()
+        elif action == 'metrics':
+            return {'success': True, 'data': self.engine.get_metrics()}
         else:
             return {'success': False, 'error': f"Unknown action: {action}"}
 
@@ -59,7 +84,7 @@ class AutomationModule:
             return {'success': False, 'error': str(e)}
 
     def _execute(self, data: Dict, data_layer) -> Dict[str, Any]:
-        """Execute automation rules for a task"""
+        """Execute automation rules for a task, following any cascades"""
         try:
             task_id = data['taskId']
             trigger = data['trigger']
@@ -69,27 +94,51 @@ class AutomationModule:
             if not task:
                 return {'success': False, 'error': 'Task not found'}
 
-            # Get enabled rules for this trigger
-            rules = data_layer.fetchall(
-                "SELECT * FROM automation_rules WHERE enabled = 1 AND trigger = ?",
-                (trigger,)
-            )
+            result = self.engine.process(task_id, trigger, data_layer)
+            triggered = result.pop('triggered')
 
-            triggered = []
+            return {'success': True, 'data': triggered, 'cascade': result}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
 
-            for rule in rules:
-                # Check conditions (simplified - just execute all for now)
-                # In real implementation, would evaluate conditions against task
+    def _run_rules(self, trigger: str, data_layer) -> list:
+        """Count enabled rules for a non-task trigger and return their IDs"""
+        # Get enabled rules for this trigger
+        rules = data_layer.fetchall(
+            "SELECT * FROM automation_rules WHERE enabled = 1 AND trigger = ?",
+            (trigger,)
+        )
 
-                # Execute actions (simplified)
-                triggered.append(rule['id'])
+        triggered = []
 
-                # Increment trigger count
-                data_layer.execute(
-                    "UPDATE automation_rules SET trigger_count = trigger_count + 1, last_triggered = ? WHERE id = ?",
-                    (datetime.utcnow().isoformat(), rule['id'])
-                )
+        for rule in rules:
+            # Check conditions (simplified - just execute all for now)
+            # In real implementation, would evaluate conditions against task
 
-            return {'success': True, 'data': triggered}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+            # Execute actions (simplified)
+            triggered.append(rule['id'])
+
+            # Increment trigger count
+            data_layer.execute(
+                "UPDATE automation_rules SET trigger_count = trigger_count + 1, last_triggered = ? WHERE id = ?",
+                (datetime.utcnow().isoformat(), rule['id'])
+            )
+
+        return triggered
+
+    def _fire(self, trigger: str, table: str, record_id: str, data_layer):
+        """Scheduler callback - a date threshold was crossed"""
+        if table == 'tasks':
+            result = self._execute({'taskId': record_id, 'trigger': trigger}, data_layer)
+            triggered = result.get('data', [])
+        else:
+            triggered = self._run_rules(trigger, data_layer)
+
+        if triggered:
+            print(f"⏰ {trigger} for {table}/{record_id}: {len(triggered)} rule(s) triggered")
+
+    def _schedule_status(self) -> Dict[str, Any]:
+        """Report due-date scheduler state"""
+        if not self.scheduler:
+            return {'success': False, 'error': 'Scheduler not running'}
+        return {'success': True, 'data': self.scheduler.get_status()}
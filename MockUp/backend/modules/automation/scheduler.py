@@ -0,0 +1,276 @@
+"""
+Due Date Scheduler
+Fires time-based automation triggers when date thresholds are crossed
+
+Keeps a min-heap of upcoming fire times for tasks.due_date,
+milestones.target_date and materials.delivery_date. The heap is built once
+at startup and then updated from data layer write notifications, so no
+periodic table scans are needed. Superseded heap entries are skipped lazily.
+Each record fires once per date: the fired threshold is remembered, so later
+edits only reschedule when the watched date column itself changes.
+"""
+
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from data.dates import parse_date
+
+
+# How far ahead of the date each trigger fires (matches automationEngine.ts)
+DEFAULT_LEAD_TIME = timedelta(hours=24)
+
+# Longest single sleep, so wall clock adjustments are picked up
+MAX_WAIT_SECONDS = 3600
+
+# Date columns watched per table
+SCHEDULED_SOURCES = {
+    'tasks': {
+        'date_column': 'due_date',
+        'status_column': 'status',
+        'closed_statuses': ['done'],
+        'trigger': 'due_date_approaching'
+    },
+    'milestones': {
+        'date_column': 'target_date',
+        'status_column': 'status',
+        'closed_statuses': ['completed', 'cancelled'],
+        'trigger': 'milestone_approaching'
+    },
+    'materials': {
+        'date_column': 'delivery_date',
+        'status_column': 'delivery_status',
+        'closed_statuses': ['delivered'],
+        'trigger': 'delivery_approaching'
+    }
+}
+
+
+class DueDateScheduler:
+    """In-process timer heap for date-based automation triggers"""
+
+    def __init__(self, data_layer, on_fire: Callable[[str, str, str], None],
+                 lead_time: timedelta = DEFAULT_LEAD_TIME):
+        """
+        Args:
+            data_layer: Database layer (must support add_listener)
+            on_fire: callback(trigger, table, record_id) run on the scheduler thread
+            lead_time: How long before the date the trigger fires
+        """
+        self.data_layer = data_layer
+        self.on_fire = on_fire
+        self.lead_time = lead_time
+
+        self._heap: List[Tuple[datetime, int, str, str]] = []
+        self._entries: Dict[Tuple[str, str], Tuple[datetime, int]] = {}
+        self._fired: Dict[Tuple[str, str], datetime] = {}
+        self._seq = 0
+        self._fired_count = 0
+        self._last_fired: Optional[Dict[str, Any]] = None
+
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Load upcoming dates, subscribe to writes and start the timer thread"""
+        self._load()
+        self.data_layer.add_listener(self._on_write)
+
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='due-date-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the timer thread"""
+        self.data_layer.remove_listener(self._on_write)
+
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _load(self):
+        """Build the heap with one query per table (startup only)"""
+        now = datetime.utcnow()
+
+        for table, source in SCHEDULED_SOURCES.items():
+            placeholders = ', '.join('?' for _ in source['closed_statuses'])
+            rows = self.data_layer.fetchall(
+                f"SELECT id, {source['date_column']} AS due FROM {table} "
+                f"WHERE {source['date_column']} IS NOT NULL "
+                f"AND COALESCE({source['status_column']}, '') NOT IN ({placeholders})",
+                tuple(source['closed_statuses'])
+            )
+
+            for row in rows:
+                # Windows that opened while the server was down are not replayed
+                self._schedule(table, row['id'], row['due'], now, catch_up=False)
+
+    # ==================== INCREMENTAL UPDATES ====================
+
+    def _on_write(self, table: str, operation: str, record_id: str):
+        """Data layer listener - reschedule a single record"""
+        source = SCHEDULED_SOURCES.get(table)
+        if not source:
+            return
+
+        if operation == 'delete':
+            self._unschedule(table, record_id)
+            with self._cond:
+                self._fired.pop((table, record_id), None)
+            return
+
+        row = self.data_layer.fetchone(
+            f"SELECT {source['date_column']} AS due, {source['status_column']} AS status "
+            f"FROM {table} WHERE id = ?",
+            (record_id,)
+        )
+
+        if not row or row['status'] in source['closed_statuses']:
+            self._unschedule(table, record_id)
+            return
+
+        self._schedule(table, record_id, row['due'], datetime.utcnow(), catch_up=True)
+
+    def _schedule(self, table: str, record_id: str, due_value: Optional[str],
+                  now: datetime, catch_up: bool):
+        """Add or replace the heap entry for one record"""
+        due = parse_date(due_value)
+        if due is None or due <= now:
+            self._unschedule(table, record_id)
+            return
+
+        fire_at = due - self.lead_time
+        if fire_at <= now and not catch_up:
+            self._unschedule(table, record_id)
+            return
+
+        key = (table, record_id)
+
+        with self._cond:
+            current = self._entries.get(key)
+            if current and current[0] == fire_at:
+                return  # Date unchanged - keep the existing entry
+            if self._fired.get(key) == fire_at:
+                return  # Already fired for this date
+
+            self._fired.pop(key, None)
+            self._seq += 1
+            self._entries[key] = (fire_at, self._seq)
+            heapq.heappush(self._heap, (fire_at, self._seq, table, record_id))
+            self._compact()
+
+            # Wake the timer if this is now the earliest entry
+            if self._heap[0][1] == self._seq:
+                self._cond.notify()
+
+    def _unschedule(self, table: str, record_id: str):
+        """Drop a record's entry (its heap item becomes stale)"""
+        with self._cond:
+            self._entries.pop((table, record_id), None)
+
+    def _compact(self):
+        """Rebuild the heap once stale entries dominate it (caller holds lock)"""
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [
+                (fire_at, seq, table, record_id)
+                for (table, record_id), (fire_at, seq) in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    # ==================== TIMER LOOP ====================
+
+    def _run(self):
+        """Sleep until the next threshold, then fire it"""
+        while True:
+            with self._cond:
+                due = self._pop_due()
+                while due is None and not self._stopped:
+                    self._cond.wait(self._seconds_until_next())
+                    due = self._pop_due()
+
+                if self._stopped:
+                    return
+
+            table, record_id = due
+            trigger = SCHEDULED_SOURCES[table]['trigger']
+
+            try:
+                self.on_fire(trigger, table, record_id)
+            except Exception as e:
+                print(f"⚠️  Scheduled trigger {trigger} failed for {table}/{record_id}: {e}")
+
+            with self._cond:
+                self._fired_count += 1
+                self._last_fired = {
+                    'trigger': trigger,
+                    'table': table,
+                    'record_id': record_id,
+                    'fired_at': datetime.utcnow().isoformat()
+                }
+
+    def _pop_due(self) -> Optional[Tuple[str, str]]:
+        """Pop the earliest live entry if its time has come (caller holds lock)"""
+        now = datetime.utcnow()
+
+        while self._heap:
+            fire_at, seq, table, record_id = self._heap[0]
+            key = (table, record_id)
+
+            if self._entries.get(key, (None, None))[1] != seq:
+                heapq.heappop(self._heap)  # Stale entry
+                continue
+
+            if fire_at > now:
+                return None
+
+            heapq.heappop(self._heap)
+            del self._entries[key]
+            self._fired[key] = fire_at
+            return key
+
+        return None
+
+    def _seconds_until_next(self) -> Optional[float]:
+        """Seconds to sleep before the head entry is due (caller holds lock)"""
+        if not self._heap:
+            return None
+
+        delta = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+        return max(0.0, min(delta, MAX_WAIT_SECONDS))
+
+    # ==================== STATUS ====================
+
+    def get_status(self) -> Dict[str, Any]:
+        """Pending entry counts and the next scheduled fire"""
+        with self._cond:
+            pending_by_table = {table: 0 for table in SCHEDULED_SOURCES}
+            next_entry = None
+
+            for (table, record_id), (fire_at, _) in self._entries.items():
+                pending_by_table[table] += 1
+                if next_entry is None or fire_at < next_entry['fire_at']:
+                    next_entry = {'table': table, 'record_id': record_id, 'fire_at': fire_at}
+
+            fired_count = self._fired_count
+            last_fired = self._last_fired
+
+        if next_entry:
+            next_entry['fire_at'] = next_entry['fire_at'].isoformat()
+
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'lead_time_hours': self.lead_time.total_seconds() / 3600,
+            'pending': sum(pending_by_table.values()),
+            'pending_by_table': pending_by_table,
+            'next': next_entry,
+            'fired_count': fired_count,
+            'last_fired': last_fired
+        }
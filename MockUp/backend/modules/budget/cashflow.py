@@ -0,0 +1,196 @@
+"""
+Cash Flow Projection
+Weekly or monthly outgoings from budget items and material deliveries
+
+When money goes out:
+- paid budget items: actual cost at their last update
+- other budget items: estimate at the completion of the build phases their
+  category is paid against (latest milestone target date), else quote date
+  plus PAYMENT_TERMS_DAYS, else unscheduled
+- materials: cost at delivery date, else today plus lead time
+- anything due in the past but not yet paid falls into the current period
+
+Every outflow becomes one (day, amount, source) row and periods are filled
+with a single bincount per source, so cost grows with rows, not rows x periods.
+"""
+
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from data.dates import parse_date
+from uk_constants import UK_BUDGET_CATEGORIES
+
+
+PAYMENT_TERMS_DAYS = 30
+INTERVALS = ('week', 'month')
+
+CONTINGENCY_CATEGORY = 'contingency'
+SOURCES = ('budget', 'materials')
+
+EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _day(value: Any) -> Optional[int]:
+    """Days since 1970-01-01 for a stored date"""
+    parsed = parse_date(value)
+    return parsed.date().toordinal() - EPOCH if parsed else None
+
+
+def phase_payment_days(milestones: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Payment day per budget category: completion of its latest phase milestone"""
+    phase_days: Dict[str, int] = {}
+    for milestone in milestones:
+        day = _day(milestone.get('actual_date') if milestone.get('status') == 'completed'
+                   else milestone.get('target_date'))
+        phase = milestone.get('phase')
+        if phase and day is not None:
+            phase_days[phase] = max(day, phase_days.get(phase, day))
+
+    payment_days = {}
+    for category in UK_BUDGET_CATEGORIES:
+        days = [phase_days[p] for p in category.get('phases', []) if p in phase_days]
+        if days:
+            payment_days[category['id']] = max(days)
+    return payment_days
+
+
+def _outflows(items: List[Dict[str, Any]], materials: List[Dict[str, Any]],
+              milestones: List[Dict[str, Any]], today: int) -> Dict[str, Any]:
+    """(day, amount, source, paid) rows plus unscheduled and contingency totals"""
+    payment_days = phase_payment_days(milestones)
+    days, amounts, sources, paid = [], [], [], []
+    unscheduled = 0.0
+    contingency = 0.0
+
+    for item in items:
+        if item.get('category') == CONTINGENCY_CATEGORY:
+            contingency += item.get('estimated_cost') or 0
+            continue
+
+        if item.get('status') == 'paid':
+            day = _day(item.get('updated_at')) or today
+            amount = item.get('actual_cost') or item.get('estimated_cost') or 0
+        else:
+            amount = item.get('estimated_cost') or 0
+            day = payment_days.get(item.get('category'))
+            if day is None:
+                quoted = _day(item.get('quote_date'))
+                day = quoted + PAYMENT_TERMS_DAYS if quoted is not None else None
+            if day is None:
+                unscheduled += amount
+                continue
+            day = max(day, today)
+
+        days.append(day)
+        amounts.append(amount)
+        sources.append(0)
+        paid.append(item.get('status') == 'paid')
+
+    for material in materials:
+        amount = material.get('cost') or 0
+        delivered = material.get('delivery_status') == 'delivered'
+        day = _day(material.get('delivery_date'))
+
+        if delivered:
+            day = day if day is not None else (_day(material.get('updated_at')) or today)
+        elif day is None:
+            day = today + int(material.get('lead_time_days') or 0)
+        else:
+            day = max(day, today)
+
+        days.append(day)
+        amounts.append(amount)
+        sources.append(1)
+        paid.append(delivered)
+
+    return {
+        'days': np.array(days, dtype=np.int64),
+        'amounts': np.array(amounts, dtype=float),
+        'sources': np.array(sources, dtype=np.int64),
+        'paid': np.array(paid, dtype=bool),
+        'unscheduled': unscheduled,
+        'contingency': contingency
+    }
+
+
+def _period_index(days: np.ndarray, interval: str) -> np.ndarray:
+    """Period number (weeks from Monday 1969-12-29, or months since 1970-01)"""
+    if interval == 'week':
+        return (days + 3) // 7  # 1970-01-01 was a Thursday
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def _period_start(period: int, interval: str) -> str:
+    """ISO date a period starts on"""
+    if interval == 'week':
+        return str(np.datetime64(int(period) * 7 - 3, 'D'))
+    return str(np.datetime64(int(period), 'M').astype('datetime64[D]'))
+
+
+def project_cashflow(project: Optional[Dict[str, Any]], items: List[Dict[str, Any]],
+                     materials: List[Dict[str, Any]], milestones: List[Dict[str, Any]],
+                     interval: str = 'month') -> Dict[str, Any]:
+    """
+    Outgoings per period from the first payment to the last
+
+    Each period has budget, materials and total outflow, the running total,
+    and remaining funds when the project has a budget_total.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+
+    started = time.perf_counter()
+    today = date.today().toordinal() - EPOCH
+    flows = _outflows(items, materials, milestones, today)
+
+    periods = _period_index(np.append(flows['days'], today), interval)
+    first = int(periods.min())
+    count = int(periods.max()) - first + 1
+    index = periods[:-1] - first
+
+    by_source = np.zeros((len(SOURCES), count))
+    for s in range(len(SOURCES)):
+        mask = flows['sources'] == s
+        by_source[s] = np.bincount(index[mask], weights=flows['amounts'][mask], minlength=count)
+
+    totals = by_source.sum(axis=0)
+    cumulative = np.cumsum(totals)
+    current = int(_period_index(np.array([today]), interval)[0]) - first
+
+    budget_total = project.get('budget_total') if project else None
+    remaining = budget_total - cumulative if budget_total else None
+
+    series = []
+    for i in range(count):
+        period = {
+            'period_start': _period_start(first + i, interval),
+            'budget': round(float(by_source[0, i]), 2),
+            'materials': round(float(by_source[1, i]), 2),
+            'total': round(float(totals[i]), 2),
+            'cumulative': round(float(cumulative[i]), 2),
+            'projected': i >= current
+        }
+        if remaining is not None:
+            period['remaining_funds'] = round(float(remaining[i]), 2)
+        series.append(period)
+
+    result = {
+        'interval': interval,
+        'periods': series,
+        'spent': round(float(flows['amounts'][flows['paid']].sum()), 2),
+        'to_pay': round(float(flows['amounts'][~flows['paid']].sum()), 2),
+        'unscheduled': round(flows['unscheduled'], 2),
+        'contingency': round(flows['contingency'], 2),
+        'peak_period': series[int(totals.argmax())]['period_start'] if totals.any() else None
+    }
+
+    if remaining is not None:
+        result['budget_total'] = budget_total
+        short = np.nonzero(remaining < 0)[0]
+        result['shortfall_period'] = series[int(short[0])]['period_start'] if len(short) else None
+
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
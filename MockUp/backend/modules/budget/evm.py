@@ -0,0 +1,373 @@
+"""
+Earned Value Management
+Weekly planned value, earned value and actual cost per project
+
+Budget at completion (BAC) is the estimated cost of the project's budget
+items, excluding contingency, spread across tasks by estimated hours. A
+task's planned value accrues linearly between its start and finish, using
+the same duration rules as the critical path schedule. Earned value is
+BAC x hours-weighted completion; actual cost is the budget items'
+actual_cost. If there is no costed budget yet, values are in hours.
+
+Per-task and per-item contributions are kept in memory and updated from
+data layer writes, and each change records the current week's percent
+complete and actual cost in evm_snapshots so earned value has real
+history. Weeks before the first snapshot are approximated by bucketing
+each task's earned hours and each item's spend at its last update. Series
+are then built with array operations over (weeks x tasks).
+"""
+
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from data.dates import parse_date
+from modules.graph.cpm import HOURS_PER_DAY, node_inputs
+
+
+CONTINGENCY_CATEGORY = 'contingency'
+
+
+def _ordinal(value: Any) -> Optional[int]:
+    """Day number for a stored date"""
+    parsed = parse_date(value)
+    return parsed.date().toordinal() if parsed else None
+
+
+def _today() -> int:
+    """Day number of the current UTC date (stored timestamps are UTC)"""
+    return datetime.utcnow().date().toordinal()
+
+
+def _week_start(ordinal: int) -> int:
+    """Monday on or before a day number"""
+    return ordinal - date.fromordinal(ordinal).weekday()
+
+
+def task_entry(row: Dict[str, Any]) -> Optional[Tuple[int, int, float, float, int]]:
+    """(start, finish, hours, percent, updated) for a task, or None if it has no dates"""
+    inputs = node_inputs('tasks', row)
+    duration = inputs['duration']
+    start = inputs['start'].date().toordinal() if inputs['start'] else None
+    finish = inputs['deadline'].date().toordinal() if inputs['deadline'] else None
+
+    if start is None and finish is None:
+        return None
+    if start is None:
+        start = finish - duration
+    if finish is None or finish <= start:
+        finish = start + duration
+
+    hours = float(row.get('estimated_hours') or duration * HOURS_PER_DAY)
+    percent = float(row.get('completion_percentage') or 0)
+    if row.get('status') == 'done':
+        percent = 100.0
+
+    updated = _ordinal(row.get('updated_at')) or _ordinal(row.get('created_at')) or _today()
+    return (start, finish, hours, percent, updated)
+
+
+def item_entry(row: Dict[str, Any]) -> Tuple[float, float, int]:
+    """(budget, actual, spend day) for a budget item; contingency adds no budget"""
+    budget = 0.0 if row.get('category') == CONTINGENCY_CATEGORY else float(row.get('estimated_cost') or 0)
+    spent = _ordinal(row.get('updated_at')) or _ordinal(row.get('created_at')) or _today()
+    return (budget, float(row.get('actual_cost') or 0), spent)
+
+
+class ProjectEVM:
+    """Running EVM totals and per-record contributions for one project"""
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.tasks: Dict[str, Tuple[int, int, float, float, int]] = {}
+        self.unscheduled: set = set()
+        self.items: Dict[str, Tuple[float, float, int]] = {}
+        self.snapshots: Dict[int, Tuple[float, float]] = {}
+
+        self.total_hours = 0.0
+        self.earned_hours = 0.0
+        self.bac = 0.0
+        self.ac = 0.0
+
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+
+    # ==================== INCREMENTAL UPDATES ====================
+
+    def set_task(self, task_id: str, entry: Optional[Tuple[int, int, float, float, int]]):
+        """Replace a task's contribution (None removes it from the time-phased set)"""
+        old = self.tasks.pop(task_id, None)
+        if old:
+            self.total_hours -= old[2]
+            self.earned_hours -= old[2] * old[3] / 100
+
+        self.unscheduled.discard(task_id)
+        if entry:
+            self.tasks[task_id] = entry
+            self.total_hours += entry[2]
+            self.earned_hours += entry[2] * entry[3] / 100
+
+        self._arrays = None
+
+    def mark_unscheduled(self, task_id: str):
+        """Task exists but has no dates to phase it by"""
+        self.set_task(task_id, None)
+        self.unscheduled.add(task_id)
+
+    def remove_task(self, task_id: str):
+        """Drop a deleted task"""
+        self.set_task(task_id, None)
+
+    def set_item(self, item_id: str, entry: Optional[Tuple[float, float, int]]):
+        """Replace a budget item's contribution (None removes it)"""
+        old = self.items.pop(item_id, None)
+        if old:
+            self.bac -= old[0]
+            self.ac -= old[1]
+
+        if entry:
+            self.items[item_id] = entry
+            self.bac += entry[0]
+            self.ac += entry[1]
+
+        self._arrays = None
+
+    def set_snapshot(self, week: int, values: Tuple[float, float]):
+        """Record a week's (percent complete, actual cost)"""
+        self.snapshots[week] = values
+        self._arrays = None
+
+    def percent_complete(self) -> float:
+        """Hours-weighted completion across scheduled tasks (0-1)"""
+        return self.earned_hours / self.total_hours if self.total_hours > 0 else 0.0
+
+    # ==================== SERIES ====================
+
+    def _build_arrays(self) -> Dict[str, np.ndarray]:
+        """Column arrays of the current contributions"""
+        if self._arrays is None:
+            tasks = np.array(list(self.tasks.values()), dtype=float).reshape(-1, 5)
+            items = np.array(list(self.items.values()), dtype=float).reshape(-1, 3)
+            weeks = sorted(self.snapshots)
+            self._arrays = {
+                'start': tasks[:, 0], 'finish': tasks[:, 1], 'hours': tasks[:, 2],
+                'percent': tasks[:, 3], 'updated': tasks[:, 4],
+                'actual': items[:, 1], 'spent': items[:, 2],
+                'snapshot_weeks': np.array(weeks, dtype=float),
+                'snapshot_percent': np.array([self.snapshots[w][0] for w in weeks], dtype=float),
+                'snapshot_actual': np.array([self.snapshots[w][1] for w in weeks], dtype=float)
+            }
+        return self._arrays
+
+    def series(self, today: Optional[int] = None) -> Dict[str, Any]:
+        """Weekly PV/EV/AC with CPI/SPI, from the first planned week to the last"""
+        today = today or _today()
+        arrays = self._build_arrays()
+
+        money = self.bac > 0
+        scale = self.bac if money else self.total_hours
+
+        starts = [arrays['start'].min()] if len(arrays['start']) else []
+        finishes = [arrays['finish'].max()] if len(arrays['finish']) else []
+        origin = _week_start(int(min(starts + [today] + list(arrays['snapshot_weeks']))))
+        last = int(max(finishes + [today]))
+        week_count = (last - origin) // 7 + 1
+
+        week_starts = origin + 7 * np.arange(week_count)
+        current = (today - origin) // 7
+
+        # Planned fraction at each week's end: (weeks x tasks) linear ramps
+        if self.total_hours > 0:
+            elapsed = (week_starts[:, None] + 7 - arrays['start']) / np.maximum(arrays['finish'] - arrays['start'], 1)
+            planned = np.clip(elapsed, 0, 1) @ arrays['hours'] / self.total_hours
+        else:
+            planned = np.zeros(week_count)
+
+        # History before the first snapshot: bucket at each record's last update
+        updated_weeks = np.clip((arrays['updated'] - origin) // 7, 0, week_count - 1).astype(int)
+        earned = np.cumsum(np.bincount(updated_weeks, weights=arrays['hours'] * arrays['percent'] / 100,
+                                       minlength=week_count))
+        earned = earned / self.total_hours if self.total_hours > 0 else earned
+
+        spent_weeks = np.clip((arrays['spent'] - origin) // 7, 0, week_count - 1).astype(int)
+        actual = np.cumsum(np.bincount(spent_weeks, weights=arrays['actual'], minlength=week_count))
+
+        # Recorded snapshots (forward-filled) take precedence
+        if len(arrays['snapshot_weeks']):
+            index = np.searchsorted(arrays['snapshot_weeks'], week_starts, side='right') - 1
+            recorded = index >= 0
+            earned = np.where(recorded, arrays['snapshot_percent'][np.maximum(index, 0)], earned)
+            actual = np.where(recorded, arrays['snapshot_actual'][np.maximum(index, 0)], actual)
+
+        if 0 <= current < week_count:
+            earned[current] = self.percent_complete()
+            actual[current] = self.ac
+
+        pv = planned * scale
+        ev = earned * scale
+
+        weeks = []
+        for i in range(week_count):
+            week = {
+                'week_start': date.fromordinal(int(week_starts[i])).isoformat(),
+                'pv': round(float(pv[i]), 2)
+            }
+            if i <= current:
+                week['ev'] = round(float(ev[i]), 2)
+                week['spi'] = round(float(ev[i] / pv[i]), 3) if pv[i] > 0 else None
+                if money:
+                    week['ac'] = round(float(actual[i]), 2)
+                    week['cpi'] = round(float(ev[i] / actual[i]), 3) if actual[i] > 0 else None
+            weeks.append(week)
+
+        return {
+            'project_id': self.project_id,
+            'unit': 'GBP' if money else 'hours',
+            'budget_at_completion': round(scale, 2),
+            'current': self._current(pv, ev, min(current, week_count - 1), money),
+            'weeks': weeks,
+            'scheduled_tasks': len(self.tasks),
+            'unscheduled_tasks': len(self.unscheduled)
+        }
+
+    def _current(self, pv: np.ndarray, ev: np.ndarray, current: int, money: bool) -> Dict[str, Any]:
+        """Headline indices for the current week"""
+        planned = float(pv[current]) if current >= 0 else 0.0
+        earned = float(ev[current]) if current >= 0 else 0.0
+
+        result = {
+            'percent_complete': round(self.percent_complete() * 100, 1),
+            'pv': round(planned, 2),
+            'ev': round(earned, 2),
+            'sv': round(earned - planned, 2),
+            'spi': round(earned / planned, 3) if planned > 0 else None
+        }
+
+        if money:
+            cpi = earned / self.ac if self.ac > 0 else None
+            result.update({
+                'ac': round(self.ac, 2),
+                'cv': round(earned - self.ac, 2),
+                'cpi': round(cpi, 3) if cpi else None,
+                'eac': round(self.bac / cpi, 2) if cpi else None,
+                'vac': round(self.bac - self.bac / cpi, 2) if cpi else None
+            })
+        return result
+
+
+class EVMTracker:
+    """Per-project EVM state kept current from data layer writes"""
+
+    def __init__(self, data_layer):
+        self.data_layer = data_layer
+        self.projects: Dict[str, ProjectEVM] = {}
+        self.record_projects: Dict[str, str] = {}
+        self.lock = threading.RLock()
+
+    def attach(self):
+        """Subscribe to data layer writes"""
+        self.data_layer.add_listener(self._on_write)
+
+    def detach(self):
+        """Unsubscribe from data layer writes"""
+        self.data_layer.remove_listener(self._on_write)
+
+    def get(self, project_id: str) -> ProjectEVM:
+        """Project state, loaded on first use"""
+        with self.lock:
+            evm = self.projects.get(project_id)
+            if evm is None:
+                evm = self._load(project_id)
+                self.projects[project_id] = evm
+            return evm
+
+    def series(self, project_id: str) -> Dict[str, Any]:
+        """Weekly EVM series for a project"""
+        with self.lock:
+            return self.get(project_id).series()
+
+    def _load(self, project_id: str) -> ProjectEVM:
+        """One query per source table"""
+        evm = ProjectEVM(project_id)
+
+        for row in self.data_layer.query('tasks', {'project_id': project_id}):
+            self._apply_task(evm, row)
+        for row in self.data_layer.query('budget_items', {'project_id': project_id}):
+            evm.set_item(row['id'], item_entry(row))
+            self.record_projects[row['id']] = project_id
+
+        for row in self.data_layer.fetchall(
+            "SELECT week_start, percent_complete, actual_cost FROM evm_snapshots WHERE project_id = ?",
+            (project_id,)
+        ):
+            evm.set_snapshot(_ordinal(row['week_start']), (row['percent_complete'], row['actual_cost']))
+
+        return evm
+
+    def _apply_task(self, evm: ProjectEVM, row: Dict[str, Any]):
+        """Insert/replace a task's contribution"""
+        entry = task_entry(row)
+        if entry:
+            evm.set_task(row['id'], entry)
+        else:
+            evm.mark_unscheduled(row['id'])
+        self.record_projects[row['id']] = evm.project_id
+
+    def _on_write(self, table: str, operation: str, record_id: str):
+        """Apply a task or budget item write and record this week's snapshot"""
+        if table == 'projects' and operation == 'delete':
+            with self.lock:
+                self.projects.pop(record_id, None)
+            return
+        if table not in ('tasks', 'budget_items'):
+            return
+
+        with self.lock:
+            if operation == 'delete':
+                project_id = self.record_projects.pop(record_id, None)
+                evm = self.projects.get(project_id)
+                if evm is None:
+                    return
+                if table == 'tasks':
+                    evm.remove_task(record_id)
+                else:
+                    evm.set_item(record_id, None)
+            else:
+                row = self.data_layer.get(table, record_id)
+                if not row:
+                    return
+
+                previous = self.record_projects.get(record_id)
+                if previous and previous != row['project_id'] and previous in self.projects:
+                    if table == 'tasks':
+                        self.projects[previous].remove_task(record_id)
+                    else:
+                        self.projects[previous].set_item(record_id, None)
+
+                evm = self.get(row['project_id'])
+                if table == 'tasks':
+                    self._apply_task(evm, row)
+                else:
+                    evm.set_item(record_id, item_entry(row))
+                    self.record_projects[record_id] = evm.project_id
+
+            self._record_snapshot(evm)
+
+    def _record_snapshot(self, evm: ProjectEVM):
+        """Upsert the current week's percent complete and actual cost if they moved"""
+        week = _week_start(_today())
+        values = (round(evm.percent_complete(), 6), round(evm.ac, 2))
+        if evm.snapshots.get(week) == values or self.data_layer.read_only:
+            return  # A standby receives the primary's snapshots
+
+        self.data_layer.execute(
+            "INSERT INTO evm_snapshots (project_id, week_start, percent_complete, actual_cost, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(project_id, week_start) DO UPDATE SET "
+            "percent_complete = excluded.percent_complete, actual_cost = excluded.actual_cost, "
+            "updated_at = excluded.updated_at",
+            (evm.project_id, date.fromordinal(week).isoformat(), values[0], values[1],
+             datetime.utcnow().isoformat())
+        )
+        evm.set_snapshot(week, values)
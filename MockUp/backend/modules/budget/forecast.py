@@ -0,0 +1,178 @@
+"""
+Cost Forecast
+Monte Carlo cost-at-completion over a project's budget items
+
+Paid items are fixed at their actual cost. Every other item's estimate is
+scaled by a lognormal overrun multiplier drawn once per category per
+simulation, so items in a category move together. Multipliers are
+calibrated from the actual/estimated ratios of paid items, per category
+where there is enough history and pooled otherwise. Quoted, approved and
+ordered items carry half the spread of bare estimates.
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from uk_constants import UK_BUDGET_CATEGORIES
+
+
+DEFAULT_SIMULATIONS = 20000
+MAX_SIMULATIONS = 200000
+
+# Overrun multiplier used when there is no history (~5% median overrun)
+DEFAULT_LOG_MU = 0.05
+DEFAULT_LOG_SIGMA = 0.15
+MIN_LOG_SIGMA = 0.02
+
+# Paid items needed before a category (or the pool) is calibrated
+MIN_HISTORY = 3
+
+# Spread multiplier for items whose price has been firmed up
+FIRM_STATUSES = ('quoted', 'approved', 'ordered')
+FIRM_SIGMA_SCALE = 0.5
+
+CONTINGENCY_CATEGORY = 'contingency'
+
+PERCENTILES = (50, 80, 95)
+
+
+def _log_overruns(items: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """log(actual/estimated) per category, from paid items"""
+    ratios: Dict[str, List[float]] = {}
+    for item in items:
+        estimated = item.get('estimated_cost') or 0
+        actual = item.get('actual_cost') or 0
+        if item.get('status') != 'paid' or estimated <= 0 or actual <= 0:
+            continue
+        ratio = float(np.clip(actual / estimated, 0.2, 5.0))
+        ratios.setdefault(item.get('category', 'other'), []).append(float(np.log(ratio)))
+    return ratios
+
+
+def calibrate(items: List[Dict[str, Any]], categories: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Lognormal (mu, sigma) overrun parameters per category"""
+    ratios = _log_overruns(items)
+    pooled = [r for values in ratios.values() for r in values]
+
+    if len(pooled) >= MIN_HISTORY:
+        pooled_params = (float(np.mean(pooled)), max(float(np.std(pooled)), MIN_LOG_SIGMA), 'history')
+    else:
+        pooled_params = (DEFAULT_LOG_MU, DEFAULT_LOG_SIGMA, 'default')
+
+    params = {}
+    for category in categories:
+        samples = ratios.get(category, [])
+        if len(samples) >= MIN_HISTORY:
+            params[category] = {
+                'mu': float(np.mean(samples)),
+                'sigma': max(float(np.std(samples)), MIN_LOG_SIGMA),
+                'source': 'category-history',
+                'samples': len(samples)
+            }
+        else:
+            params[category] = {
+                'mu': pooled_params[0],
+                'sigma': pooled_params[1],
+                'source': pooled_params[2],
+                'samples': len(samples)
+            }
+    return params
+
+
+def forecast_cost(project: Optional[Dict[str, Any]], items: List[Dict[str, Any]],
+                  simulations: int = DEFAULT_SIMULATIONS,
+                  seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Simulate cost at completion and summarise it
+
+    Returns percentile bands, the chance of exhausting the contingency (and
+    the project budget, if set), and each category's share of tail risk.
+    """
+    started = time.perf_counter()
+    simulations = int(min(max(simulations, 100), MAX_SIMULATIONS))
+
+    # UK categories first, then any others in use
+    known = [c['id'] for c in UK_BUDGET_CATEGORIES if c['id'] != CONTINGENCY_CATEGORY]
+    extra = sorted({i.get('category', 'other') for i in items} - set(known) - {CONTINGENCY_CATEGORY})
+    categories = known + extra
+    index = {category: i for i, category in enumerate(categories)}
+
+    # Per-category paid / firm / open amounts
+    paid = np.zeros(len(categories))
+    firm = np.zeros(len(categories))
+    open_ = np.zeros(len(categories))
+    contingency = 0.0
+
+    for item in items:
+        category = item.get('category', 'other')
+        if category == CONTINGENCY_CATEGORY:
+            contingency += item.get('estimated_cost') or 0
+            continue
+
+        i = index[category]
+        if item.get('status') == 'paid':
+            paid[i] += item.get('actual_cost') or 0
+        elif item.get('status') in FIRM_STATUSES:
+            firm[i] += item.get('estimated_cost') or 0
+        else:
+            open_[i] += item.get('estimated_cost') or 0
+
+    params = calibrate(items, categories)
+    mu = np.array([params[c]['mu'] for c in categories])
+    sigma = np.array([params[c]['sigma'] for c in categories])
+
+    # One (simulations x categories) draw; firm items share it at reduced spread
+    z = np.random.default_rng(seed).standard_normal((simulations, len(categories)))
+    costs = (
+        paid
+        + open_ * np.exp(mu + sigma * z)
+        + firm * np.exp(mu * FIRM_SIGMA_SCALE + sigma * FIRM_SIGMA_SCALE * z)
+    )
+    totals = costs.sum(axis=1)
+
+    base = float(paid.sum() + firm.sum() + open_.sum())
+    bands = np.percentile(totals, PERCENTILES)
+
+    # Risk contribution: each category's mean excess over its own expectation
+    # in the worst (100 - P95)% of outcomes
+    expected = costs.mean(axis=0)
+    tail = totals >= bands[-1]
+    excess = (costs[tail] - expected).mean(axis=0) if tail.any() else np.zeros(len(categories))
+    excess_total = float(excess.sum())
+
+    category_results = []
+    for i, category in enumerate(categories):
+        if paid[i] == 0 and firm[i] == 0 and open_[i] == 0:
+            continue
+        category_results.append({
+            'category': category,
+            'paid': round(float(paid[i]), 2),
+            'committed': round(float(firm[i]), 2),
+            'estimated': round(float(open_[i]), 2),
+            'p50': round(float(np.percentile(costs[:, i], 50)), 2),
+            'p80': round(float(np.percentile(costs[:, i], 80)), 2),
+            'risk_share': round(float(excess[i]) / excess_total, 3) if excess_total > 0 else 0,
+            'calibration': params[category]['source']
+        })
+    category_results.sort(key=lambda c: c['risk_share'], reverse=True)
+
+    result = {
+        'simulations': simulations,
+        'base_estimate': round(base, 2),
+        'contingency': round(contingency, 2),
+        'mean': round(float(totals.mean()), 2),
+        'percentiles': {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, bands)},
+        'probability_exceeds_contingency': round(float((totals > base + contingency).mean()), 3),
+        'contingency_needed_p80': round(max(0.0, float(bands[1]) - base), 2),
+        'categories': category_results
+    }
+
+    budget_total = project.get('budget_total') if project else None
+    if budget_total:
+        result['budget_total'] = budget_total
+        result['probability_within_budget'] = round(float((totals <= budget_total).mean()), 3)
+
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
@@ -6,18 +6,42 @@ Manages budget items, spending tracking, and financial reporting
 from uuid import uuid4
 from datetime import datetime
 
+from .cashflow import project_cashflow
+from .evm import EVMTracker
+from .forecast import forecast_cost, DEFAULT_SIMULATIONS
+
 
 class BudgetModule:
     def __init__(self):
         self.name = "budget"
         self.version = "1.0.0"
 
+        # project_id -> (data version, simulations, seed, forecast)
+        self.forecast_cache = {}
+
+        # (project_id, interval) -> (data version, day, projection)
+        self.cashflow_cache = {}
+        self.evm = None
+
+    def attach(self, data_layer):
+        """Keep earned value state current from task and budget item writes"""
+        self.evm = EVMTracker(data_layer)
+        self.evm.attach()
+
+    def detach(self):
+        """Stop tracking writes"""
+        if self.evm:
+            self.evm.detach()
+            self.evm = None
+
     def handle(self, request, data_layer):
         """Route budget requests"""
         action = request.get('action')
 
         if action == 'list':
             return self._list_budget_items(request.get('filters', {}), data_layer)
+        elif action == 'stream':
+            return self._stream_budget_items(request.get('filters', {}), data_layer)
         elif action == 'get':
             return self._get_budget_item(request.get('id'), data_layer)
         elif action == 'create':
@@ -28,6 +52,17 @@ class BudgetModule:
             return self._delete_budget_item(request.get('id'), data_layer)
         elif action == 'get_summary':
             return self._get_budget_summary(request.get('project_id'), data_layer)
+        elif action == 'get_forecast':
+            return self._get_forecast(
+                request.get('project_id'),
+                request.get('simulations', DEFAULT_SIMULATIONS),
+                request.get('seed'),
+                data_layer
+            )
+        elif action == 'get_cashflow':
+            return self._get_cashflow(request.get('project_id'), request.get('interval', 'month'), data_layer)
+        elif action == 'get_evm':
+            return self._get_evm(request.get('project_id'))
         else:
             return {'success': False, 'error': f"Unknown action: {action}"}
 
@@ -44,6 +79,18 @@ class BudgetModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _stream_budget_items(self, filters, data_layer):
+        """Iterate budget items (with variance) without loading them all"""
+        try:
+            def rows():
+                for item in data_layer.iter_query('budget_items', filters):
+                    item['variance'] = item.get('actual_cost', 0) - item.get('estimated_cost', 0)
+                    yield item
+
+            return {'success': True, 'data': rows()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def _get_budget_item(self, item_id, data_layer):
         """Get single budget item"""
         try:
@@ -202,3 +249,61 @@ class BudgetModule:
             return {'success': True, 'data': summary}
         except Exception as e:
             return {'success': False, 'error': str(e)}
+
+    def _get_forecast(self, project_id, simulations, seed, data_layer):
+        """Monte Carlo cost-at-completion, cached until budget items or the project change"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'Project ID required'}
+
+            version = data_layer.get_version('budget_items', 'projects')
+            cached = self.forecast_cache.get(project_id)
+            if cached and cached[:3] == (version, simulations, seed):
+                return {'success': True, 'data': cached[3], 'cached': True}
+
+            project = data_layer.get('projects', project_id)
+            items = data_layer.query('budget_items', {'project_id': project_id})
+            forecast = forecast_cost(project, items, simulations=simulations, seed=seed)
+
+            self.forecast_cache[project_id] = (version, simulations, seed, forecast)
+            return {'success': True, 'data': forecast, 'cached': False}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_cashflow(self, project_id, interval, data_layer):
+        """Projected outgoings per week/month, cached until an input table changes"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'Project ID required'}
+
+            # Past-due amounts roll into the current period, so the day is part of the key
+            version = data_layer.get_version('budget_items', 'materials', 'milestones', 'projects')
+            today = datetime.utcnow().date().isoformat()
+            cached = self.cashflow_cache.get((project_id, interval))
+            if cached and cached[:2] == (version, today):
+                return {'success': True, 'data': cached[2], 'cached': True}
+
+            project = data_layer.get('projects', project_id)
+            items = data_layer.query('budget_items', {'project_id': project_id})
+            materials = data_layer.query('materials', {'project_id': project_id})
+            milestones = data_layer.query('milestones', {'project_id': project_id})
+
+            projection = project_cashflow(project, items, materials, milestones, interval=interval)
+
+            self.cashflow_cache[(project_id, interval)] = (version, today, projection)
+            return {'success': True, 'data': projection, 'cached': False}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_evm(self, project_id):
+        """Weekly planned value, earned value and actual cost with CPI/SPI"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'Project ID required'}
+
+            if not self.evm:
+                return {'success': False, 'error': 'Earned value tracking not running'}
+
+            return {'success': True, 'data': self.evm.series(project_id)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
@@ -29,6 +29,8 @@ class ContactsModule:
 
         if action == 'list':
             return self._list_contacts(request.get('filters', {}), data_layer)
+        elif action == 'stream':
+            return self._stream_contacts(request.get('filters', {}), data_layer)
         elif action == 'get':
             return self._get_contact(request.get('id'), data_layer)
         elif action == 'create':
@@ -73,6 +75,14 @@ class ContactsModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _stream_contacts(self, filters: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """Iterate contacts by name without loading them all"""
+        try:
+            rows = data_layer.iter_query('contacts', filters, order_by='name COLLATE NOCASE')
+            return {'success': True, 'data': rows}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def _get_contact(self, contact_id: str, data_layer: Any) -> Dict[str, Any]:
         """Get single contact by ID"""
         try:
@@ -329,6 +339,7 @@ class ContactsModule:
             'description': 'Contact management for architects, engineers, contractors, and suppliers',
             'actions': [
                 'list',
+                'stream',
                 'get',
                 'create',
                 'update',
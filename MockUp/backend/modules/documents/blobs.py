@@ -0,0 +1,247 @@
+"""
+Blob Store
+Content-addressed storage for document files
+
+Each distinct file content is stored once under <data dir>/blobs, named by
+its SHA-256 and sharded two levels deep (ab/cd/abcd...) so no directory
+grows large. Uploads are streamed to a temporary file while they are
+hashed, so a file is never held in memory, and identical uploads (the same
+drawing attached to many tasks) share one blob.
+
+blobs.refcount counts the documents and document_versions rows whose
+blob_hash points at a blob. Triggers on both tables keep it current for
+every write path (API, clone, import, replication); a blob is deleted once
+nothing refers to it, so earlier versions keep their files.
+
+Lock order is always data layer, then _files_lock: a blob row is only ever
+created inside the transaction that references it, and an unreferenced
+blob is only removed inside a transaction, so the two cannot interleave.
+Blob files are not replicated: a standby has the rows but not the bytes.
+"""
+
+import glob
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+
+
+BLOB_DIR = 'blobs'
+TEMP_DIR = 'tmp'
+READ_CHUNK_SIZE = 1024 * 1024
+
+HASH_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+# Serialises moving files into and out of the store
+_files_lock = threading.Lock()
+
+
+class BlobWriter:
+    """Temporary file that hashes everything written to it"""
+
+    def __init__(self, temp_dir: str):
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=temp_dir, suffix='.partial')
+        self._file = os.fdopen(fd, 'wb')
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def close(self) -> str:
+        """Flush the file to disk and return the content hash"""
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        return self._hash.hexdigest()
+
+    def discard(self):
+        """Remove the temporary file (nothing to do once it is in the store)"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BlobStore:
+    """SHA-256 keyed file store with reference counting"""
+
+    def __init__(self, data_layer, root: Optional[str] = None):
+        self.data_layer = data_layer
+        self.root = root or os.path.join(data_layer.data_dir, BLOB_DIR)
+        self.temp_dir = os.path.join(self.root, TEMP_DIR)
+
+    def path(self, blob_hash: str) -> str:
+        """Where a blob's file lives"""
+        if not HASH_PATTERN.fullmatch(blob_hash or ''):
+            raise ValueError(f"Invalid blob hash: {blob_hash}")
+        return os.path.join(self.root, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    def derived_path(self, blob_hash: str, suffix: str) -> str:
+        """Where a file derived from a blob (e.g. a thumbnail) is cached; removed with the blob"""
+        return f"{self.path(blob_hash)}.{suffix}"
+
+    # ==================== WRITING ====================
+
+    def open_writer(self) -> BlobWriter:
+        """Temporary file to stream new content into"""
+        return BlobWriter(self.temp_dir)
+
+    def store(self, writer: BlobWriter) -> Dict[str, Any]:
+        """
+        Add the writer's content to the store; returns {'hash', 'size'}
+
+        Must run inside the transaction that points a document at the blob,
+        so the new (unreferenced) blob row is never visible to release().
+        """
+        return self.store_staged(writer.path, writer.close(), writer.size)
+
+    def store_staged(self, staged_path: str, blob_hash: str, size: int) -> Dict[str, Any]:
+        """Move an already hashed file (in temp_dir) into the store, with the rules of store()"""
+        self.data_layer.execute(
+            "INSERT INTO blobs (hash, size_bytes, created_at) VALUES (?, ?, ?) ON CONFLICT(hash) DO NOTHING",
+            (blob_hash, size, datetime.utcnow().isoformat())
+        )
+
+        path = self.path(blob_hash)
+        with _files_lock:
+            if os.path.exists(path):
+                os.remove(staged_path)  # Same content already stored
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(staged_path, path)
+        return {'hash': blob_hash, 'size': size}
+
+    def store_file(self, source: BinaryIO) -> Dict[str, Any]:
+        """Copy a readable binary file into the store (inside a transaction, as store())"""
+        writer = self.open_writer()
+        try:
+            while True:
+                chunk = source.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return self.store(writer)
+        finally:
+            writer.discard()
+
+    def release(self, hashes: Iterable[Optional[str]]) -> int:
+        """Delete the given blobs if no document refers to them any more; returns blobs removed"""
+        hashes = sorted({h for h in hashes if h})
+        if not hashes:
+            return 0
+
+        with self.data_layer.transaction() as cursor:
+            rows = cursor.execute(
+                f"DELETE FROM blobs WHERE refcount <= 0 AND hash IN ({', '.join('?' for _ in hashes)}) RETURNING hash",
+                hashes
+            ).fetchall()
+            with _files_lock:
+                for row in rows:
+                    path = self.path(row['hash'])
+                    for name in [path] + glob.glob(f"{glob.escape(path)}.*"):
+                        try:
+                            os.remove(name)
+                        except FileNotFoundError:
+                            pass
+        return len(rows)
+
+    def remove_orphans(self, hashes: Iterable[Optional[str]]) -> int:
+        """Delete the files of the given blobs that have no blobs row (stored by a rolled back transaction)"""
+        hashes = sorted({h for h in hashes if h})
+        if not hashes:
+            return 0
+
+        removed = 0
+        with self.data_layer.transaction() as cursor:
+            known = {row['hash'] for row in cursor.execute(
+                f"SELECT hash FROM blobs WHERE hash IN ({', '.join('?' for _ in hashes)})", hashes
+            ).fetchall()}
+            with _files_lock:
+                for blob_hash in hashes:
+                    if blob_hash in known:
+                        continue
+                    path = self.path(blob_hash)
+                    for name in [path] + glob.glob(f"{glob.escape(path)}.*"):
+                        try:
+                            os.remove(name)
+                        except FileNotFoundError:
+                            pass
+                    removed += 1
+        return removed
+
+    def collect_garbage(self, batch_size: int = 500) -> int:
+        """Delete every blob nothing refers to (e.g. after bulk deletes); returns blobs removed"""
+        removed = 0
+        while True:
+            hashes = [row['hash'] for row in self.data_layer.fetchall(
+                "SELECT hash FROM blobs WHERE refcount <= 0 LIMIT ?", (batch_size,)
+            )]
+            if not hashes:
+                return removed
+            released = self.release(hashes)
+            removed += released
+            if released < len(hashes):
+                # The rest were referenced again in the meantime
+                return removed
+
+    # ==================== READING ====================
+
+    def exists(self, blob_hash: Optional[str]) -> bool:
+        """Whether a blob's file is present"""
+        return bool(blob_hash) and os.path.isfile(self.path(blob_hash))
+
+    def open(self, blob_hash: str) -> 'BlobReader':
+        """
+        Reader for a blob's content
+
+        The file is opened before returning, so the content stays readable
+        even if the blob is released while it is being sent.
+        """
+        return BlobReader(self.path(blob_hash), blob_hash)
+
+
+class BlobReader:
+    """Memory-mapped blob that serves byte ranges"""
+
+    def __init__(self, path: str, blob_hash: str):
+        self.hash = blob_hash
+        with open(path, 'rb') as source:
+            self.size = os.fstat(source.fileno()).st_size
+            # mmap cannot map an empty file; the mapping outlives the descriptor
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = READ_CHUNK_SIZE) -> Iterator[memoryview]:
+        """
+        Bytes start..end (exclusive) as slices of the mapping
+
+        Slices are views, not copies, so pages go from the page cache
+        straight to the socket write. The mapping is unmapped once the
+        reader and the last slice handed out are dropped.
+        """
+        mapping = self._map
+        self._map = None
+        end = self.size if end is None else min(end, self.size)
+        if mapping is None or start >= end:
+            return
+
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            page_start = start - start % mmap.PAGESIZE
+            mapping.madvise(mmap.MADV_SEQUENTIAL, page_start, end - page_start)
+        view = memoryview(mapping)
+        for offset in range(start, end, chunk_size):
+            yield view[offset:min(offset + chunk_size, end)]
+
+    def close(self):
+        """Give up the mapping without reading it"""
+        self._map = None
@@ -2,9 +2,20 @@
 Documents Module Handler
 Manages project documents, drawings, certificates, and file versioning
 """
+import mimetypes
 import uuid
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from .blobs import BlobStore, BlobWriter
+from .text_index import TextIndexer
+from .thumbnails import THUMBNAIL_SIZES, ThumbnailService
+from .uploads import ChunkWriter, UploadSessions
+from .versions import document_at, history, latest
+
+
+# Content types clients send by default for a raw body: not a description of the file
+FORM_CONTENT_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
 
 
 class DocumentsModule:
@@ -13,6 +24,30 @@ class DocumentsModule:
     def __init__(self):
         self.name = "documents"
         self.version = "1.0.0"
+        self.blobs: Optional[BlobStore] = None
+        self.uploads: Optional[UploadSessions] = None
+        self.thumbnails: Optional[ThumbnailService] = None
+        self.text_index: Optional[TextIndexer] = None
+
+    def attach(self, data_layer: Any):
+        """Open the blob store next to the database and start text indexing"""
+        self.blobs = BlobStore(data_layer)
+        self.uploads = UploadSessions(data_layer, self.blobs)
+        self.thumbnails = ThumbnailService(self.blobs)
+        self.thumbnails.start()
+
+        # The text index is local derived data: a standby does not maintain one
+        self.text_index = None
+        if not data_layer.read_only:
+            self.text_index = TextIndexer(data_layer, self.blobs)
+            self.text_index.start()
+
+    def detach(self):
+        """Stop thumbnail and text extraction workers"""
+        if self.thumbnails:
+            self.thumbnails.stop()
+        if self.text_index:
+            self.text_index.stop()
 
     def handle(self, request: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
         """
@@ -29,8 +64,15 @@ class DocumentsModule:
 
         if action == 'list':
             return self._list_documents(request.get('filters', {}), data_layer)
+        elif action == 'stream':
+            return self._stream_documents(request.get('filters', {}), data_layer)
         elif action == 'get':
-            return self._get_document(request.get('id'), data_layer)
+            return self._get_document(request.get('id'), data_layer, request.get('version'), request.get('as_of'))
+        elif action == 'versions':
+            return self._list_versions(request.get('id'), data_layer)
+        elif action == 'latest':
+            return self._latest_documents(request.get('project_id'), request.get('document_type'),
+                                          request.get('as_of'), data_layer)
         elif action == 'create':
             return self._create_document(request.get('data'), data_layer)
         elif action == 'update':
@@ -43,6 +85,30 @@ class DocumentsModule:
             return self._get_by_phase(request.get('project_id'), request.get('phase'), data_layer)
         elif action == 'increment_version':
             return self._increment_version(request.get('id'), data_layer)
+        elif action == 'open_upload':
+            return self._open_upload(request.get('id'), data_layer)
+        elif action == 'put_content':
+            return self._put_content(request.get('id'), request.get('upload'), request.get('content_type'), data_layer)
+        elif action == 'get_content':
+            return self._get_content(request.get('id'), data_layer, request.get('version'))
+        elif action == 'search':
+            return self._search(request.get('query'), request.get('project_id'), request.get('limit', 20))
+        elif action == 'index_status':
+            return self._index_status()
+        elif action == 'thumbnail':
+            return self._get_thumbnail(request.get('id'), request.get('size'), data_layer)
+        elif action == 'create_upload':
+            return self._create_upload(request.get('id'), request.get('data', {}), data_layer)
+        elif action == 'get_upload':
+            return self._get_upload(request.get('id'), request.get('session_id'))
+        elif action == 'open_chunk':
+            return self._open_chunk(request.get('id'), request.get('session_id'), request.get('offset'))
+        elif action == 'put_chunk':
+            return self._put_chunk(request.get('chunk'), request.get('sha256'))
+        elif action == 'commit_upload':
+            return self._commit_upload(request.get('id'), request.get('session_id'), data_layer)
+        elif action == 'abort_upload':
+            return self._abort_upload(request.get('id'), request.get('session_id'))
         else:
             return {'success': False, 'error': f'Unknown action: {action}'}
 
@@ -71,12 +137,27 @@ class DocumentsModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
-    def _get_document(self, document_id: str, data_layer: Any) -> Dict[str, Any]:
-        """Get single document by ID"""
+    def _stream_documents(self, filters: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """Iterate documents in list order (newest first) without loading them all"""
+        try:
+            rows = data_layer.iter_query('documents', filters, order_by='upload_date DESC')
+            return {'success': True, 'data': rows}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_document(self, document_id: str, data_layer: Any, version: Optional[int] = None,
+                      as_of: Optional[str] = None) -> Dict[str, Any]:
+        """Get single document by ID, optionally as it was at a version or date"""
         try:
             if not document_id:
                 return {'success': False, 'error': 'Document ID required'}
 
+            if version is not None or as_of:
+                document = document_at(data_layer, document_id, version, as_of)
+                if not document:
+                    return {'success': False, 'error': 'Document version not found'}
+                return {'success': True, 'data': document}
+
             document = data_layer.get('documents', document_id)
 
             if not document:
@@ -154,7 +235,9 @@ class DocumentsModule:
             if not existing:
                 return {'success': False, 'error': 'Document not found'}
 
+            hashes = [existing.get('blob_hash')] + [v['blob_hash'] for v in history(data_layer, document_id)]
             data_layer.delete('documents', document_id)
+            self.blobs.release(hashes)
 
             return {
                 'success': True,
@@ -170,15 +253,7 @@ class DocumentsModule:
             if not project_id or not document_type:
                 return {'success': False, 'error': 'project_id and document_type required'}
 
-            filters = {
-                'project_id': project_id,
-                'document_type': document_type
-            }
-
-            documents = data_layer.query('documents', filters)
-
-            # Sort by version (highest first)
-            documents.sort(key=lambda x: x.get('version', 0), reverse=True)
+            documents = latest(data_layer, project_id, document_type)
 
             return {
                 'success': True,
@@ -209,8 +284,44 @@ class DocumentsModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _latest_documents(self, project_id: str, document_type: Optional[str], as_of: Optional[str],
+                          data_layer: Any) -> Dict[str, Any]:
+        """Latest version of each project document (or the version current at as_of)"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'project_id required'}
+
+            documents = latest(data_layer, project_id, document_type, as_of)
+
+            return {
+                'success': True,
+                'data': documents,
+                'count': len(documents)
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _list_versions(self, document_id: str, data_layer: Any) -> Dict[str, Any]:
+        """Version history of a document, newest first"""
+        try:
+            if not document_id:
+                return {'success': False, 'error': 'Document ID required'}
+
+            if not data_layer.get('documents', document_id):
+                return {'success': False, 'error': 'Document not found'}
+
+            versions = history(data_layer, document_id)
+
+            return {
+                'success': True,
+                'data': versions,
+                'count': len(versions)
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def _increment_version(self, document_id: str, data_layer: Any) -> Dict[str, Any]:
-        """Increment document version number"""
+        """Start a new version of the document (keeping its current file)"""
         try:
             if not document_id:
                 return {'success': False, 'error': 'Document ID required'}
@@ -239,6 +350,224 @@ class DocumentsModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _open_upload(self, document_id: str, data_layer: Any) -> Dict[str, Any]:
+        """Temporary file for a document's new content, once the document is known to exist"""
+        try:
+            if not document_id:
+                return {'success': False, 'error': 'Document ID required'}
+
+            if not data_layer.get('documents', document_id):
+                return {'success': False, 'error': 'Document not found'}
+
+            return {'success': True, 'data': self.blobs.open_writer()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _put_content(self, document_id: str, upload: BlobWriter, content_type: Optional[str],
+                     data_layer: Any) -> Dict[str, Any]:
+        """Store uploaded content as the document's file"""
+        try:
+            if not document_id or upload is None:
+                return {'success': False, 'error': 'Document ID and content required'}
+
+            return self._attach_blob(document_id, lambda: self.blobs.store(upload), content_type, data_layer)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _attach_blob(self, document_id: str, stage, content_type: Optional[str], data_layer: Any) -> Dict[str, Any]:
+        """
+        Point a document at new content
+
+        stage() adds the content to the blob store; it runs in the same
+        transaction as the document update. Replacing earlier content with
+        something different starts a new version; the previous version
+        keeps its blob.
+        """
+        with data_layer.transaction():
+            document = data_layer.get('documents', document_id)
+            if not document:
+                return {'success': False, 'error': 'Document not found'}
+
+            blob = stage()
+            previous = document.get('blob_hash')
+            update = {
+                'blob_hash': blob['hash'],
+                'file_size': blob['size'],
+                'content_type': self._content_type(content_type, document['filename'])
+            }
+            if previous and previous != blob['hash']:
+                update['version'] = (document.get('version') or 1) + 1
+            data_layer.update('documents', document_id, update)
+
+        document = data_layer.get('documents', document_id)
+        if self.thumbnails.supports(document):
+            self.thumbnails.schedule(document['blob_hash'])
+
+        return {'success': True, 'data': document}
+
+    def _content_type(self, declared: Optional[str], filename: str) -> str:
+        """Declared type, else one guessed from the filename"""
+        if declared and not declared.startswith(FORM_CONTENT_TYPES):
+            return declared
+        return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    def _get_content(self, document_id: str, data_layer: Any, version: Optional[int] = None) -> Dict[str, Any]:
+        """Document metadata and an open reader for its content (current or an earlier version)"""
+        try:
+            if not document_id:
+                return {'success': False, 'error': 'Document ID required'}
+
+            if version is not None:
+                document = document_at(data_layer, document_id, version)
+            else:
+                document = data_layer.get('documents', document_id)
+            if not document:
+                return {'success': False, 'error': 'Document not found'}
+            if not self.blobs.exists(document.get('blob_hash')):
+                return {'success': False, 'error': 'Document has no content'}
+
+            return {
+                'success': True,
+                'data': document,
+                'content': self.blobs.open(document['blob_hash'])
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _search(self, query: str, project_id: Optional[str], limit: int) -> Dict[str, Any]:
+        """Documents whose text contains every word of query, best match first"""
+        try:
+            if not query or not query.strip():
+                return {'success': False, 'error': 'Search query required'}
+            if not self.text_index:
+                return {'success': False, 'error': 'Search is not available on a read-only standby'}
+
+            results = self.text_index.search(query, project_id, limit)
+            return {'success': True, 'data': results, 'count': len(results)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _index_status(self) -> Dict[str, Any]:
+        """Text index queue and totals"""
+        try:
+            if not self.text_index:
+                return {'success': False, 'error': 'Search is not available on a read-only standby'}
+            return {'success': True, 'data': self.text_index.get_status()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_thumbnail(self, document_id: str, size: Optional[int], data_layer: Any) -> Dict[str, Any]:
+        """Path of a cached preview, rendered first if needed"""
+        try:
+            if not document_id:
+                return {'success': False, 'error': 'Document ID required'}
+            size = int(size or THUMBNAIL_SIZES[0])
+            if size not in THUMBNAIL_SIZES:
+                return {'success': False, 'error': f'size must be one of {list(THUMBNAIL_SIZES)}'}
+
+            document = data_layer.get('documents', document_id)
+            if not document:
+                return {'success': False, 'error': 'Document not found'}
+            if not self.thumbnails.available:
+                return {'success': False, 'error': 'Previews need Pillow installed'}
+            if not self.blobs.exists(document.get('blob_hash')):
+                return {'success': False, 'error': 'Document has no content'}
+            if not self.thumbnails.supports(document):
+                return {'success': False, 'error': 'No preview for this document'}
+
+            return {
+                'success': True,
+                'data': {
+                    'path': self.thumbnails.get(document['blob_hash'], size),
+                    'etag': f'"{document["blob_hash"]}-{size}"'
+                }
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _session(self, document_id: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """Upload session, if it belongs to the document"""
+        session = self.uploads.get(session_id) if session_id else None
+        return session if session and session['document_id'] == document_id else None
+
+    def _create_upload(self, document_id: str, data: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """
+        Start a chunked upload of the document's content
+
+        Required: size. Optional: sha256 of the whole file (checked at
+        commit), content_type.
+        """
+        try:
+            if not document_id:
+                return {'success': False, 'error': 'Document ID required'}
+            if not data_layer.get('documents', document_id):
+                return {'success': False, 'error': 'Document not found'}
+            if data.get('size') is None:
+                return {'success': False, 'error': 'Missing required field: size'}
+
+            session = self.uploads.create(document_id, int(data['size']), data.get('sha256'), data.get('content_type'))
+            return {'success': True, 'data': session}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_upload(self, document_id: str, session_id: str) -> Dict[str, Any]:
+        """Session state: received ranges and the offset to resume from"""
+        try:
+            session = self._session(document_id, session_id)
+            if not session:
+                return {'success': False, 'error': 'Upload session not found'}
+            return {'success': True, 'data': session}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _open_chunk(self, document_id: str, session_id: str, offset: Optional[int]) -> Dict[str, Any]:
+        """Writer for a chunk at offset, once the session is known to be open"""
+        try:
+            if not self._session(document_id, session_id):
+                return {'success': False, 'error': 'Upload session not found'}
+            if offset is None:
+                return {'success': False, 'error': 'offset required'}
+
+            return {'success': True, 'data': self.uploads.open_chunk(session_id, int(offset))}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _put_chunk(self, chunk: ChunkWriter, sha256: Optional[str]) -> Dict[str, Any]:
+        """Record a written chunk if its SHA-256 matches"""
+        try:
+            if chunk is None:
+                return {'success': False, 'error': 'Chunk required'}
+            if not sha256:
+                return {'success': False, 'error': 'Chunk SHA-256 required'}
+
+            return {'success': True, 'data': self.uploads.finish_chunk(chunk, sha256)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _commit_upload(self, document_id: str, session_id: str, data_layer: Any) -> Dict[str, Any]:
+        """Store a complete upload as the document's file"""
+        try:
+            if not self._session(document_id, session_id):
+                return {'success': False, 'error': 'Upload session not found'}
+
+            return self.uploads.commit(
+                session_id,
+                lambda stage, session: self._attach_blob(document_id, stage, session['content_type'], data_layer)
+            )
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _abort_upload(self, document_id: str, session_id: str) -> Dict[str, Any]:
+        """Discard an upload session and its staged bytes"""
+        try:
+            if not self._session(document_id, session_id):
+                return {'success': False, 'error': 'Upload session not found'}
+
+            self.uploads.abort(session_id)
+            return {'success': True, 'message': f'Upload {session_id} aborted'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def get_info(self) -> Dict[str, Any]:
         """Return module information"""
         return {
@@ -247,12 +576,27 @@ class DocumentsModule:
             'description': 'Document management with versioning and phase linking',
             'actions': [
                 'list',
+                'stream',
                 'get',
+                'versions',
+                'latest',
                 'create',
                 'update',
                 'delete',
                 'get_by_type',
                 'get_by_phase',
-                'increment_version'
+                'increment_version',
+                'open_upload',
+                'put_content',
+                'get_content',
+                'search',
+                'index_status',
+                'thumbnail',
+                'create_upload',
+                'get_upload',
+                'open_chunk',
+                'put_chunk',
+                'commit_upload',
+                'abort_upload'
             ]
         }
@@ -0,0 +1,342 @@
+"""
+Document Text Index
+Full-text search over the contents of text-bearing documents
+
+Writes to documents queue the document id; a background thread compares the
+document's (version, blob_hash) with what was last indexed and only then
+extracts text, in the shared worker pool (workers.py), into the
+document_text FTS5 table. Edits to notes or tags therefore cost nothing,
+and a new version (increment_version, or new content) is re-indexed once.
+
+Extraction covers plain text, HTML and the text layer of simple PDFs
+(Flate-compressed content streams with literal or hex strings). PDFs with
+embedded font encodings or scanned pages yield little or no text.
+
+The index is derived data: it is rebuilt locally, is not replicated, and is
+not maintained on a read-only standby.
+"""
+
+import html.parser
+import re
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from . import workers
+from .blobs import BlobStore
+
+
+INDEX_TABLE = 'document_text'
+STATE_TABLE = '_document_text_state'
+
+TEXT_TYPES = ('text/plain', 'text/csv', 'text/markdown')
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+PDF_TYPES = ('application/pdf',)
+
+MAX_SOURCE_BYTES = 64 * 1024 * 1024
+MAX_TEXT_CHARS = 2 * 1024 * 1024
+EXTRACT_TIMEOUT_SECONDS = 120
+
+
+# ==================== EXTRACTION (worker process) ====================
+
+class _HTMLText(html.parser.HTMLParser):
+    """Visible text of an HTML page"""
+
+    SKIP = ('script', 'style', 'head', 'template')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping and data.strip():
+            self.parts.append(data.strip())
+
+
+PDF_STREAM = re.compile(rb'<<(.*?)>>\s*stream\r?\n(.*?)\r?\nendstream', re.S)
+PDF_TEXT_OBJECT = re.compile(rb'\bBT\b(.*?)\bET\b', re.S)
+PDF_STRING = rb'\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>'
+# Strings, TJ arrays and the operators that show text or start a new line
+PDF_TOKEN = re.compile(rb'\[(?:[^\]\\]|\\.)*\]|' + PDF_STRING + rb'|T\*|\bT[dDmJj]\b|\'|"')
+PDF_ARRAY_ITEM = re.compile(PDF_STRING + rb'|-?\d*\.?\d+')
+PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f',
+               b'(': b'(', b')': b')', b'\\': b'\\'}
+
+# TJ adjustment (thousandths of an em) wide enough to be a word space
+PDF_WORD_GAP = -200
+
+
+def _pdf_string(token: bytes) -> str:
+    """Decode a PDF literal (...) or hex <...> string"""
+    if token.startswith(b'<'):
+        digits = re.sub(rb'\s', b'', token[1:-1])
+        raw = bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode())
+    else:
+        raw = re.sub(
+            rb'\\([0-7]{1,3}|.)',
+            lambda m: bytes([int(m.group(1), 8) & 0xFF]) if m.group(1)[:1].isdigit()
+            else PDF_ESCAPES.get(m.group(1), m.group(1)),
+            token[1:-1], flags=re.S
+        )
+    if raw.startswith(b'\xfe\xff'):
+        return raw[2:].decode('utf-16-be', errors='ignore')
+    return raw.decode('latin-1')
+
+
+def _pdf_shown(tokens) -> str:
+    """Text of one BT ... ET object, with line breaks where the text moves to a new line"""
+    parts = []
+    operands = []
+    for token in tokens:
+        if token[:1] in (b'(', b'<', b'['):
+            operands.append(token)
+            continue
+
+        if token in (b'T*', b'Td', b'TD', b'Tm', b"'", b'"'):
+            parts.append('\n')
+        if token in (b'Tj', b"'", b'"') and operands:
+            parts.append(_pdf_string(operands[-1]))
+        elif token == b'TJ' and operands:
+            for item in PDF_ARRAY_ITEM.findall(operands[-1][1:-1]):
+                if item[:1] in (b'(', b'<'):
+                    parts.append(_pdf_string(item))
+                elif float(item) < PDF_WORD_GAP:
+                    parts.append(' ')
+        operands = []
+    return ''.join(parts)
+
+
+def _pdf_text(data: bytes) -> str:
+    """Text shown by the content streams of a PDF"""
+    lines = []
+    for header, body in PDF_STREAM.findall(data):
+        if b'/FlateDecode' in header:
+            try:
+                body = zlib.decompressobj().decompress(body)
+            except zlib.error:
+                continue
+        elif b'/Filter' in header:
+            continue  # Images and other encodings carry no text we can read
+
+        for text_object in PDF_TEXT_OBJECT.findall(body):
+            text = _pdf_shown(PDF_TOKEN.findall(text_object)).strip()
+            if text:
+                lines.append(text)
+    return '\n'.join(lines)
+
+
+def extract_text(path: str, content_type: str) -> str:
+    """Worker process: text of a stored file, by content type"""
+    with open(path, 'rb') as source:
+        data = source.read(MAX_SOURCE_BYTES)
+
+    if content_type in PDF_TYPES:
+        text = _pdf_text(data)
+    elif content_type in HTML_TYPES:
+        parser = _HTMLText()
+        parser.feed(data.decode('utf-8', errors='replace'))
+        parser.close()
+        text = '\n'.join(parser.parts)
+    else:
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            text = data.decode('latin-1')
+    return text[:MAX_TEXT_CHARS]
+
+
+def match_query(query: str) -> str:
+    """FTS5 query matching every word of free text (quoted, so operators are literal)"""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+# ==================== INDEXER ====================
+
+class TextIndexer:
+    """Keeps document_text current with each document's version"""
+
+    def __init__(self, data_layer, blobs: BlobStore):
+        self.data_layer = data_layer
+        self.blobs = blobs
+
+        self._pending: Dict[str, None] = {}
+        self._wake = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.documents_indexed = 0
+        self.last_error: Optional[str] = None
+
+    # ==================== LIFECYCLE ====================
+
+    def install(self):
+        """Create the index tables (FTS5 is part of every standard SQLite build)"""
+        with self.data_layer.transaction() as cursor:
+            cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5(
+                body, tokenize = 'porter unicode61'
+            )
+            ''')
+            cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                document_id TEXT PRIMARY KEY,
+                version INTEGER,
+                blob_hash TEXT,
+                text_rowid INTEGER,
+                chars INTEGER DEFAULT 0,
+                error TEXT,
+                indexed_at TEXT
+            )
+            ''')
+
+    def start(self):
+        """Queue everything out of date, then follow document writes"""
+        self.install()
+        self.data_layer.add_listener(self._on_write)
+        for row in self.data_layer.fetchall(
+            f"SELECT d.id FROM documents d LEFT JOIN {STATE_TABLE} s ON s.document_id = d.id "
+            f"WHERE s.document_id IS NULL OR s.version IS NOT d.version OR s.blob_hash IS NOT d.blob_hash "
+            f"UNION SELECT s.document_id FROM {STATE_TABLE} s LEFT JOIN documents d ON d.id = s.document_id "
+            f"WHERE d.id IS NULL"
+        ):
+            self._enqueue(row['id'])
+
+        workers.acquire()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='text-index', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop indexing (queued documents are picked up again at the next start)"""
+        self.data_layer.remove_listener(self._on_write)
+        self._stopped.set()
+        with self._wake:
+            self._wake.notify()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+            workers.release()
+
+    def _on_write(self, table: str, operation: str, record_id: str):
+        if table == 'documents':
+            self._enqueue(record_id)
+
+    def _enqueue(self, document_id: str):
+        with self._wake:
+            self._pending[document_id] = None
+            self._wake.notify()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            with self._wake:
+                while not self._pending and not self._stopped.is_set():
+                    self._wake.wait()
+                if self._stopped.is_set():
+                    return
+                document_id = next(iter(self._pending))
+                del self._pending[document_id]
+
+            try:
+                self.index(document_id)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️  Text indexing failed for {document_id}: {e}")
+
+    # ==================== INDEXING ====================
+
+    def _extractable(self, document: Dict[str, Any]) -> bool:
+        return (document.get('content_type') or '').split(';')[0] in TEXT_TYPES + HTML_TYPES + PDF_TYPES \
+            and self.blobs.exists(document.get('blob_hash'))
+
+    def index(self, document_id: str) -> bool:
+        """Bring one document's entry up to date; returns whether anything was (re)indexed"""
+        document = self.data_layer.get('documents', document_id)
+        state = self.data_layer.fetchone(f"SELECT * FROM {STATE_TABLE} WHERE document_id = ?", (document_id,))
+
+        if document and state and state['version'] == document.get('version') \
+                and state['blob_hash'] == document.get('blob_hash'):
+            return False
+
+        text, error = '', None
+        if document and self._extractable(document):
+            content_type = document['content_type'].split(';')[0]
+            try:
+                text = workers.submit(
+                    extract_text, self.blobs.path(document['blob_hash']), content_type
+                ).result(EXTRACT_TIMEOUT_SECONDS)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+
+        with self.data_layer.transaction() as cursor:
+            if state and state['text_rowid'] is not None:
+                cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE rowid = ?", (state['text_rowid'],))
+            if not document:
+                cursor.execute(f"DELETE FROM {STATE_TABLE} WHERE document_id = ?", (document_id,))
+                return True
+
+            text_rowid = None
+            if text.strip():
+                text_rowid = cursor.execute(f"INSERT INTO {INDEX_TABLE} (body) VALUES (?)", (text,)).lastrowid
+            cursor.execute(
+                f"INSERT INTO {STATE_TABLE} (document_id, version, blob_hash, text_rowid, chars, error, indexed_at) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(document_id) DO UPDATE SET "
+                f"version = excluded.version, blob_hash = excluded.blob_hash, text_rowid = excluded.text_rowid, "
+                f"chars = excluded.chars, error = excluded.error, indexed_at = excluded.indexed_at",
+                (document_id, document.get('version'), document.get('blob_hash'), text_rowid, len(text), error,
+                 datetime.utcnow().isoformat())
+            )
+        self.documents_indexed += 1
+        return True
+
+    # ==================== SEARCH ====================
+
+    def search(self, query: str, project_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Documents whose current version's text matches every word, best match first"""
+        match = match_query(query)
+        if not match:
+            return []
+
+        sql = (
+            f"SELECT d.id, snippet({INDEX_TABLE}, 0, '[', ']', '…', 12) AS snippet, "
+            f"bm25({INDEX_TABLE}) AS score "
+            f"FROM {INDEX_TABLE} JOIN {STATE_TABLE} s ON s.text_rowid = {INDEX_TABLE}.rowid "
+            f"JOIN documents d ON d.id = s.document_id AND d.version IS s.version "
+            f"WHERE {INDEX_TABLE} MATCH ?"
+        )
+        params: List[Any] = [match]
+        if project_id:
+            sql += " AND d.project_id = ?"
+            params.append(project_id)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        results = []
+        for row in self.data_layer.fetchall(sql, tuple(params)):
+            document = self.data_layer.get('documents', row['id'])
+            if document:
+                document.update(snippet=row['snippet'], score=row['score'])
+                results.append(document)
+        return results
+
+    def get_status(self) -> Dict[str, Any]:
+        """Queue length and totals"""
+        with self._wake:
+            pending = len(self._pending)
+        totals = self.data_layer.fetchone(
+            f"SELECT COUNT(*) AS documents, COALESCE(SUM(chars), 0) AS chars, "
+            f"SUM(error IS NOT NULL) AS errors FROM {STATE_TABLE}"
+        )
+        return {'pending': pending, 'documents_indexed': self.documents_indexed,
+                'last_error': self.last_error, **totals}
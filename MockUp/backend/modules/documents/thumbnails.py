@@ -0,0 +1,161 @@
+"""
+Thumbnails
+Preview images for photo and drawing documents, rendered in worker processes
+
+Every size is rendered from one decode of the original and cached next to
+its blob (<blob>.thumb-<size>.jpg), so documents sharing content share
+previews and the cache is removed with the blob. Uploads queue a render
+straight away; anything not rendered yet is rendered on first request.
+
+Renders run in the shared worker pool (workers.py), so decoding large
+photos never holds the GIL of the API process. Concurrent requests for the same blob wait on a single
+render (single-flight), and at most MAX_PENDING renders are queued: an
+upload that finds the queue full skips the eager render (the first request
+renders it), and a request waits at most QUEUE_WAIT_SECONDS for room before
+giving up (503 with Retry-After), so a bulk photo import cannot tie up the
+API threads.
+
+Pillow is optional: without it there are no previews.
+"""
+
+import os
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Previews are disabled without Pillow
+    Image = None
+
+from . import workers
+from .blobs import BlobStore
+
+
+THUMBNAIL_SIZES = (128, 512, 1024)
+THUMBNAIL_TYPES = ('photo', 'drawing')
+JPEG_QUALITY = 82
+
+MAX_PENDING = 16
+QUEUE_WAIT_SECONDS = 1
+WAIT_SECONDS = 30
+
+QUEUE_FULL = 'Thumbnail queue is full, try again shortly'
+
+
+def render_thumbnails(source: str, targets: Dict[int, str]) -> List[int]:
+    """Worker process: decode the image once and write every size, largest first"""
+    with Image.open(source) as original:
+        largest = max(targets)
+        # JPEG decoders can scale down while decoding: far less work for large photos
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            # Drawings often have transparent backgrounds: flatten onto white
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        for size in sorted(targets, reverse=True):
+            image.thumbnail((size, size))
+            partial = f"{targets[size]}.partial"
+            image.save(partial, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+            os.replace(partial, targets[size])
+    return sorted(targets)
+
+
+class ThumbnailService:
+    """Cached, single-flight thumbnail rendering on a bounded process pool"""
+
+    def __init__(self, blobs: BlobStore, max_pending: int = MAX_PENDING):
+        self.blobs = blobs
+        self.available = Image is not None
+        self._started = False
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Register with the shared worker pool"""
+        if not self._started:
+            self._started = True
+            workers.acquire()
+
+    def stop(self):
+        """Give up the worker pool (its processes stop once no service uses them)"""
+        if self._started:
+            self._started = False
+            workers.release()
+
+    def path(self, blob_hash: str, size: int) -> str:
+        """Cached thumbnail file"""
+        return self.blobs.derived_path(blob_hash, f"thumb-{size}.jpg")
+
+    def supports(self, document) -> bool:
+        """Whether the document gets previews"""
+        return (self.available
+                and document.get('document_type') in THUMBNAIL_TYPES
+                and (document.get('content_type') or '').startswith('image/'))
+
+    # ==================== RENDERING ====================
+
+    def schedule(self, blob_hash: str) -> Optional[Future]:
+        """Render in the background if there is room in the queue (never blocks)"""
+        if all(os.path.exists(self.path(blob_hash, size)) for size in THUMBNAIL_SIZES):
+            return None
+        return self._submit(blob_hash, wait=None)
+
+    def get(self, blob_hash: str, size: int, timeout: float = WAIT_SECONDS) -> str:
+        """Path of the thumbnail, rendering it (or waiting for the render in progress) if needed"""
+        path = self.path(blob_hash, size)
+        if os.path.exists(path):
+            return path
+
+        future = self._submit(blob_hash, wait=min(timeout, QUEUE_WAIT_SECONDS))
+        if future is None:
+            raise RuntimeError(QUEUE_FULL)
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            raise RuntimeError(QUEUE_FULL)
+        except Exception:
+            raise ValueError('Could not render a preview of this file')
+        return path
+
+    def _submit(self, blob_hash: str, wait: Optional[float]) -> Optional[Future]:
+        """The render in progress for blob_hash, or a new one once a queue slot is free"""
+        with self._lock:
+            future = self._inflight.get(blob_hash)
+        if future:
+            return future
+
+        acquired = self._slots.acquire(timeout=wait) if wait else self._slots.acquire(blocking=False)
+        if not acquired:
+            return None
+
+        with self._lock:
+            future = self._inflight.get(blob_hash)
+            if future:
+                self._slots.release()
+                return future
+
+            targets = {size: self.path(blob_hash, size) for size in THUMBNAIL_SIZES}
+            try:
+                future = workers.submit(render_thumbnails, self.blobs.path(blob_hash), targets)
+            except Exception:
+                self._slots.release()
+                raise
+            self._inflight[blob_hash] = future
+
+        future.add_done_callback(lambda _: self._finished(blob_hash))
+        return future
+
+    def _finished(self, blob_hash: str):
+        with self._lock:
+            self._inflight.pop(blob_hash, None)
+        self._slots.release()
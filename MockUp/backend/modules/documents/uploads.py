@@ -0,0 +1,361 @@
+"""
+Chunked Uploads
+Resumable upload sessions for large document files
+
+A session stages the file in one preallocated file next to the blob store.
+Each chunk is written in place at its offset (os.pwrite) while its SHA-256
+is computed, and its byte range is only recorded once that checksum matches,
+so a chunk cut off by a dropped connection is simply sent again. The client
+can ask which ranges have arrived and resume from the first gap.
+
+Chunks that arrive in order also feed a running hash of the whole file, so
+commit normally finishes without reading the file back; only bytes that
+arrived out of order (or before a restart) are re-read. Commit renames the
+staged file into the blob store and points the document at it in one
+transaction. It only starts while no chunk writer is open, and no writer
+opens while it runs, so nothing can write into the file once it is hashed
+or has become a shared blob.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from .blobs import READ_CHUNK_SIZE, BlobStore
+
+
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+SESSION_TTL = timedelta(hours=24)
+
+STAGED_SUFFIX = '.upload'
+
+
+def _merge_ranges(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Add [start, end) to sorted, non-overlapping ranges"""
+    merged = []
+    for low, high in sorted(ranges + [[start, end]]):
+        if merged and low <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return merged
+
+
+def _subtract_range(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Remove [start, end) from ranges"""
+    remaining = []
+    for low, high in ranges:
+        if low < start:
+            remaining.append([low, min(high, start)])
+        if high > end:
+            remaining.append([max(low, end), high])
+    return remaining
+
+
+def _overlaps(ranges: List[List[int]], start: int, end: int) -> bool:
+    return any(low < end and start < high for low, high in ranges)
+
+
+class ChunkWriter:
+    """Writes one chunk's bytes in place and checksums them"""
+
+    def __init__(self, path: str, session: Dict[str, Any], offset: int,
+                 running: Optional[Tuple[Any, int]], on_release: Callable[[], None]):
+        self.session_id = session['id']
+        self.offset = offset
+        self.limit = min(session['total_size'] - offset, MAX_CHUNK_BYTES)
+        self.size = 0
+        self.overflow = False
+        self._fd = os.open(path, os.O_WRONLY)
+        self._on_release = on_release
+        self._hash = hashlib.sha256()
+        # Running whole-file hash, continued only when this chunk starts where it stopped
+        self.running = running[0].copy() if running and running[1] == offset else None
+
+    def write(self, data: bytes) -> int:
+        if self.size + len(data) > self.limit:
+            self.overflow = True
+            return 0
+        written = 0
+        while written < len(data):
+            written += os.pwrite(self._fd, data[written:], self.offset + self.size + written)
+        self._hash.update(data)
+        if self.running is not None:
+            self.running.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def close(self) -> str:
+        """Flush the written bytes and return the chunk's SHA-256"""
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        return self._hash.hexdigest()
+
+    def discard(self):
+        """Close the file if still open and stop counting as a writer of the session"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._on_release:
+            self._on_release()
+            self._on_release = None
+
+
+class UploadSessions:
+    """Upload session bookkeeping (upload_sessions table) and staged files"""
+
+    def __init__(self, data_layer, blobs: BlobStore):
+        self.data_layer = data_layer
+        self.blobs = blobs
+        # session id -> (hash of bytes [0, offset), offset): lost on restart, which only costs a re-read
+        self._running: Dict[str, Tuple[Any, int]] = {}
+        # Open chunk writers per session, and sessions being committed (never both)
+        self._writers: Dict[str, int] = {}
+        self._committing: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def staged_path(self, session_id: str) -> str:
+        return os.path.join(self.blobs.temp_dir, f"{session_id}{STAGED_SUFFIX}")
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Session with the next offset the client should send"""
+        session = self.data_layer.get('upload_sessions', session_id)
+        if session:
+            received = session['received']
+            session['next_offset'] = received[0][1] if received and received[0][0] == 0 else 0
+        return session
+
+    # ==================== SESSIONS ====================
+
+    def create(self, document_id: str, total_size: int, sha256: Optional[str] = None,
+               content_type: Optional[str] = None) -> Dict[str, Any]:
+        """Open a session and preallocate its staging file"""
+        if total_size < 0:
+            raise ValueError('size must not be negative')
+        self.expire()
+
+        now = datetime.utcnow()
+        session = {
+            'id': str(uuid4()),
+            'document_id': document_id,
+            'total_size': total_size,
+            'sha256': sha256.lower() if sha256 else None,
+            'content_type': content_type,
+            'received': [],
+            'bytes_received': 0,
+            'status': 'open',
+            'expires_at': (now + SESSION_TTL).isoformat(),
+            'created_at': now.isoformat(),
+            'updated_at': now.isoformat()
+        }
+
+        os.makedirs(self.blobs.temp_dir, exist_ok=True)
+        with open(self.staged_path(session['id']), 'wb') as staged:
+            staged.truncate(total_size)
+            if total_size and hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(staged.fileno(), 0, total_size)
+
+        self.data_layer.insert('upload_sessions', session)
+        with self._lock:
+            self._running[session['id']] = (hashlib.sha256(), 0)
+        return self.get(session['id'])
+
+    def _open_session(self, session_id: str) -> Dict[str, Any]:
+        session = self.data_layer.get('upload_sessions', session_id)
+        if not session:
+            raise LookupError('Upload session not found')
+        if session['status'] != 'open':
+            raise ValueError(f"Upload session is {session['status']}")
+        if session['expires_at'] < datetime.utcnow().isoformat():
+            raise ValueError('Upload session has expired')
+        return session
+
+    def open_chunk(self, session_id: str, offset: int) -> ChunkWriter:
+        """Writer for a chunk starting at offset"""
+        session = self._open_session(session_id)
+        if offset < 0 or offset > session['total_size']:
+            raise ValueError('offset is outside the upload')
+        with self._lock:
+            if session_id in self._committing:
+                raise ValueError('Upload session is being committed')
+            self._writers[session_id] = self._writers.get(session_id, 0) + 1
+            running = self._running.get(session_id)
+
+        try:
+            return ChunkWriter(self.staged_path(session_id), session, offset, running,
+                               lambda: self._release_writer(session_id))
+        except FileNotFoundError:
+            # Committed (or discarded) since the session was read
+            self._release_writer(session_id)
+            raise ValueError('Upload session is no longer open')
+        except Exception:
+            self._release_writer(session_id)
+            raise
+
+    def _release_writer(self, session_id: str):
+        with self._lock:
+            remaining = self._writers.get(session_id, 0) - 1
+            if remaining > 0:
+                self._writers[session_id] = remaining
+            else:
+                self._writers.pop(session_id, None)
+
+    def finish_chunk(self, writer: ChunkWriter, sha256: str) -> Dict[str, Any]:
+        """Record a written chunk if its checksum matches; returns the session"""
+        # The writer counts as open until its range is recorded or rejected
+        try:
+            return self._finish_chunk(writer, sha256)
+        finally:
+            writer.discard()
+
+    def _finish_chunk(self, writer: ChunkWriter, sha256: str) -> Dict[str, Any]:
+        digest = writer.close()
+        if writer.overflow:
+            self._reject_chunk(writer)
+            raise ValueError(f'Chunk extends past the end of the upload or exceeds {MAX_CHUNK_BYTES} bytes')
+        if not sha256 or digest != sha256.lower():
+            self._reject_chunk(writer)
+            raise ValueError('Chunk checksum mismatch: send the chunk again')
+
+        start, end = writer.offset, writer.offset + writer.size
+        with self._lock, self.data_layer.transaction():
+            session = self._open_session(writer.session_id)
+            if writer.size:
+                rewritten = _overlaps(session['received'], start, end)
+                received = _merge_ranges(session['received'], start, end)
+                self.data_layer.update('upload_sessions', session['id'], {
+                    'received': received,
+                    'bytes_received': sum(high - low for low, high in received),
+                    'expires_at': (datetime.utcnow() + SESSION_TTL).isoformat()
+                })
+
+                if rewritten:
+                    # Bytes already hashed may have changed: hash from disk at commit
+                    self._running.pop(session['id'], None)
+                elif writer.running is not None:
+                    current = self._running.get(session['id'])
+                    if current and current[1] == start:
+                        self._running[session['id']] = (writer.running, end)
+        return self.get(writer.session_id)
+
+    def _reject_chunk(self, writer: ChunkWriter):
+        """A bad chunk was written in place: whatever it overwrote must be sent again"""
+        start, end = writer.offset, writer.offset + writer.size
+        if not writer.size:
+            return
+        with self._lock, self.data_layer.transaction():
+            session = self._open_session(writer.session_id)
+            if _overlaps(session['received'], start, end):
+                received = _subtract_range(session['received'], start, end)
+                self.data_layer.update('upload_sessions', session['id'], {
+                    'received': received,
+                    'bytes_received': sum(high - low for low, high in received)
+                })
+            running = self._running.get(session['id'])
+            if running and running[1] > start:
+                self._running.pop(session['id'], None)
+
+    def _content_hash(self, session: Dict[str, Any]) -> str:
+        """Whole-file SHA-256, reading back only what the running hash has not seen"""
+        with self._lock:
+            hasher, hashed = self._running.get(session['id']) or (hashlib.sha256(), 0)
+            hasher = hasher.copy()
+
+        if hashed < session['total_size']:
+            with open(self.staged_path(session['id']), 'rb') as staged:
+                staged.seek(hashed)
+                while True:
+                    chunk = staged.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def commit(self, session_id: str, attach) -> Dict[str, Any]:
+        """
+        Move a complete upload into the blob store
+
+        attach(stage) points the document at the blob inside the caller's
+        transaction: stage() stores the file and returns {'hash', 'size'}.
+        Refused while a chunk is still being written; chunks are refused
+        until it finishes.
+        """
+        with self._lock:
+            if self._writers.get(session_id):
+                raise ValueError('Chunks are still being written: commit once they have finished')
+            if session_id in self._committing:
+                raise ValueError('Upload session is being committed')
+            self._committing.add(session_id)
+
+        try:
+            return self._commit(session_id, attach)
+        finally:
+            with self._lock:
+                self._committing.discard(session_id)
+
+    def _commit(self, session_id: str, attach) -> Dict[str, Any]:
+        session = self._open_session(session_id)
+        if session['bytes_received'] != session['total_size']:
+            raise ValueError(
+                f"Upload incomplete: {session['bytes_received']} of {session['total_size']} bytes received"
+            )
+
+        blob_hash = self._content_hash(session)
+        if session['sha256'] and blob_hash != session['sha256']:
+            raise ValueError('Upload checksum mismatch: the assembled file differs from the declared sha256')
+
+        def stage():
+            # Re-checked in the transaction, so a concurrent commit or abort wins cleanly
+            if self._open_session(session_id)['bytes_received'] != session['total_size']:
+                raise ValueError('Upload changed while committing')
+            blob = self.blobs.store_staged(self.staged_path(session_id), blob_hash, session['total_size'])
+            self.data_layer.update('upload_sessions', session_id, {'status': 'committed', 'blob_hash': blob_hash})
+            return blob
+
+        result = attach(stage, session)
+        with self._lock:
+            self._running.pop(session_id, None)
+        return result
+
+    def abort(self, session_id: str) -> bool:
+        """Discard an open session and its staged bytes"""
+        self._open_session(session_id)
+        self.data_layer.update('upload_sessions', session_id, {'status': 'aborted'})
+        self._remove_staged(session_id)
+        return True
+
+    def expire(self) -> int:
+        """Close open sessions that have not received a chunk within the TTL"""
+        stale = self.data_layer.fetchall(
+            "SELECT id FROM upload_sessions WHERE status = 'open' AND expires_at < ?",
+            (datetime.utcnow().isoformat(),)
+        )
+        for row in stale:
+            self.data_layer.update('upload_sessions', row['id'], {'status': 'expired'})
+            self._remove_staged(row['id'])
+
+        # Running hashes of sessions closed elsewhere (the maintenance sweep)
+        with self._lock:
+            tracked = list(self._running)
+        if tracked:
+            still_open = {row['id'] for row in self.data_layer.fetchall(
+                f"SELECT id FROM upload_sessions WHERE status = 'open' AND id IN ({', '.join('?' for _ in tracked)})",
+                tuple(tracked)
+            )}
+            with self._lock:
+                for session_id in set(tracked) - still_open:
+                    self._running.pop(session_id, None)
+        return len(stale)
+
+    def _remove_staged(self, session_id: str):
+        with self._lock:
+            self._running.pop(session_id, None)
+        try:
+            os.remove(self.staged_path(session_id))
+        except FileNotFoundError:
+            pass
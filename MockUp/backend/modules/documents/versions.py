@@ -0,0 +1,94 @@
+"""
+Document Versions
+Version history reads: any earlier version, or the versions current at a point in time
+
+document_versions holds one row per version of a document, written by
+triggers on documents (so uploads, clones, imports and replication all
+record history the same way) and keyed '<document id>:<version>'. The
+documents row is the "latest" pointer: documents.version names the current
+row, and the unique (document_id, version) index makes the join a direct
+lookup. Listing the latest version of every drawing in a project is one
+query over idx_documents_project_type_version, however many revisions each
+drawing has; reading as of a date walks the same index backwards per
+document.
+
+Older versions keep their blobs, because version rows count as blob
+references.
+"""
+
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from data.dates import parse_date
+
+
+# Columns that differ between versions of a document
+VERSION_FIELDS = ('version', 'filename', 'blob_hash', 'file_size', 'content_type')
+
+
+def as_of_bound(as_of: str) -> str:
+    """Upper bound for created_at: a bare date includes that whole day"""
+    parsed = parse_date(as_of)
+    if parsed is None:
+        raise ValueError(f"Invalid as_of date: {as_of}")
+    if len(as_of.strip()) == 10:
+        return (parsed + timedelta(days=1) - timedelta(microseconds=1)).isoformat()
+    return parsed.isoformat()
+
+
+def _select(data_layer) -> str:
+    """Documents columns with the version columns taken from the joined version row (v)"""
+    columns = [f"d.{c}" for c in data_layer.columns('documents') if c not in VERSION_FIELDS]
+    columns += [f"v.{c}" for c in VERSION_FIELDS]
+    columns += ['d.version AS current_version', 'v.created_at AS version_created_at']
+    return f"SELECT {', '.join(columns)} FROM documents d JOIN document_versions v ON "
+
+
+def _version_join(as_of: Optional[str]) -> Tuple[str, tuple]:
+    """Join condition picking the current version, or the newest one created by as_of"""
+    if as_of is None:
+        return "v.document_id = d.id AND v.version = d.version", ()
+    return (
+        "v.id = (SELECT id FROM document_versions WHERE document_id = d.id AND created_at <= ? "
+        "ORDER BY version DESC LIMIT 1)",
+        (as_of_bound(as_of),)
+    )
+
+
+def history(data_layer, document_id: str) -> List[Dict[str, Any]]:
+    """Every version of a document, newest first"""
+    return data_layer.fetch_records(
+        "SELECT * FROM document_versions WHERE document_id = ? ORDER BY version DESC",
+        (document_id,)
+    )
+
+
+def document_at(data_layer, document_id: str, version: Optional[int] = None,
+                as_of: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    The document as it was at a version, or as of a date
+
+    Returns the document row with the version's file fields, plus
+    current_version and version_created_at; None if there was no such
+    version (or the document did not exist yet at as_of).
+    """
+    if version is not None:
+        join, params = "v.document_id = d.id AND v.version = ?", (int(version),)
+    else:
+        join, params = _version_join(as_of)
+
+    rows = data_layer.fetch_records(f"{_select(data_layer)}{join} WHERE d.id = ?", params + (document_id,))
+    return rows[0] if rows else None
+
+
+def latest(data_layer, project_id: str, document_type: Optional[str] = None,
+           as_of: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Latest version (or the version current at as_of) of each of a project's documents"""
+    join, params = _version_join(as_of)
+    sql = f"{_select(data_layer)}{join} WHERE d.project_id = ?"
+    params += (project_id,)
+    if document_type:
+        sql += " AND d.document_type = ?"
+        params += (document_type,)
+    sql += " ORDER BY d.document_type, d.version DESC"
+    return data_layer.fetch_records(sql, params)
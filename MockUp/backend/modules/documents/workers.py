@@ -0,0 +1,58 @@
+"""
+Document Workers
+The process pool shared by thumbnail rendering and text extraction
+
+One pool serves every ThumbnailService and TextIndexer in the process (one
+of each per database, so several with sharded storage). The pool is created
+on the first submit, which only happens once the server has started.
+Workers use the spawn start method, because forking a threaded server can
+deadlock the child. A spawned worker re-imports the main module, which
+therefore must not open the database at import (main.py builds the
+orchestrator in its startup hook). Submitted functions must be top-level,
+so they can be pickled.
+
+Services register with acquire() and give the pool up with release(). The
+workers are shut down when the last service releases it.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+
+MAX_WORKERS = max(1, min(2, (os.cpu_count() or 2) // 2))
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_users = 0
+
+
+def acquire():
+    """Register a service that submits work"""
+    global _users
+    with _lock:
+        _users += 1
+
+
+def release():
+    """Unregister a service; the last one out shuts the workers down"""
+    global _executor, _users
+    with _lock:
+        _users = max(0, _users - 1)
+        if _users:
+            return
+        executor, _executor = _executor, None
+    if executor:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(fn: Callable, *args: Any) -> Future:
+    """Run a top-level function in a worker process"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        executor = _executor
+    return executor.submit(fn, *args)
@@ -0,0 +1,4 @@
+"""Graph Module"""
+from .handlers import GraphModule
+
+__all__ = ['GraphModule']
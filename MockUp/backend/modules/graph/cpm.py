@@ -0,0 +1,309 @@
+"""
+Critical Path Method
+Earliest/latest start and finish, total/free float and the critical path
+
+Durations are whole days:
+- tasks use estimated_hours (HOURS_PER_DAY per day), else start_date..due_date,
+  else DEFAULT_TASK_DAYS
+- milestones are zero-duration events
+
+A task's start_date is a "start no earlier than" constraint. A task's due_date
+and a milestone's target_date are deadlines, so late work shows as negative
+float. When one node changes only its downstream subgraph is re-run forwards
+and only nodes whose late start moves are re-run backwards.
+"""
+
+import heapq
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from data.dates import parse_date
+
+
+HOURS_PER_DAY = 8
+DEFAULT_TASK_DAYS = 1
+
+
+def node_inputs(table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Duration and date constraints for a task or milestone row"""
+    if table == 'milestones':
+        return {
+            'duration': 0,
+            'start': None,
+            'deadline': parse_date(row.get('target_date'))
+        }
+
+    start = parse_date(row.get('start_date'))
+    due = parse_date(row.get('due_date'))
+    hours = row.get('estimated_hours')
+
+    if hours:
+        duration = max(1, math.ceil(float(hours) / HOURS_PER_DAY))
+    elif start and due:
+        duration = max(1, (due.date() - start.date()).days)
+    else:
+        duration = DEFAULT_TASK_DAYS
+
+    return {'duration': duration, 'start': start, 'deadline': due}
+
+
+class CriticalPathSchedule:
+    """CPM results for one project graph, updated incrementally"""
+
+    def __init__(self, graph: 'DependencyGraph', project_start: Optional[datetime]):
+        self.graph = graph
+        self.project_start = project_start
+
+        self.inputs: Dict[str, Dict[str, Any]] = {}
+        self.origin: datetime = datetime.utcnow()
+        self.origin_constrained = False  # False: day zero is just today, for lack of any start
+        self.order: List[str] = []
+        self.position: Dict[str, int] = {}
+
+        self.es: Dict[str, int] = {}
+        self.ef: Dict[str, int] = {}
+        self.ls: Dict[str, int] = {}
+        self.lf: Dict[str, int] = {}
+        self.total_float: Dict[str, int] = {}
+        self.free_float: Dict[str, int] = {}
+        self.finish = 0
+
+        self.full_recomputes = 0
+        self.incremental_updates = 0
+        self.last_update_size = 0
+
+    # ==================== FULL COMPUTE ====================
+
+    def recompute(self):
+        """Run both passes over every node"""
+        self._set_origin()
+        self._reorder()
+
+        self.es.clear()
+        self.ef.clear()
+        for node_id in self.order:
+            self._forward(node_id)
+
+        self.finish = max(self.ef.values(), default=0)
+
+        self.ls.clear()
+        self.lf.clear()
+        for node_id in reversed(self.order):
+            self._backward(node_id)
+
+        self._floats(self.order)
+        self.full_recomputes += 1
+        self.last_update_size = len(self.order)
+
+    def _set_origin(self):
+        """Day zero: project start, pulled back to the earliest start constraint"""
+        starts = [i['start'] for i in self.inputs.values() if i['start']]
+        candidates = starts + ([self.project_start] if self.project_start else [])
+        origin = min(candidates) if candidates else datetime.utcnow()
+        self.origin = datetime(origin.year, origin.month, origin.day)
+        self.origin_constrained = bool(candidates)
+
+    def _moves_origin(self, previous: Optional[Dict[str, Any]], inputs: Dict[str, Any]) -> bool:
+        """Whether replacing a node's inputs changes day zero"""
+        start = inputs['start']
+        if start and (start < self.origin or not self.origin_constrained):
+            return True
+
+        # The node that set day zero moved later or lost its start
+        old_start = previous['start'] if previous else None
+        return (old_start is not None and old_start.date() == self.origin.date()
+                and (start is None or start.date() != old_start.date()))
+
+    def _reorder(self):
+        """Refresh the topological order after edge changes"""
+        self.order = [n for n in self.graph.topological_order() if n in self.inputs]
+        self.position = {node_id: i for i, node_id in enumerate(self.order)}
+
+    # ==================== INCREMENTAL UPDATE ====================
+
+    def set_inputs(self, node_id: str, inputs: Dict[str, Any], previous_blockers: Set[str]):
+        """
+        Replace one node's inputs and re-run only what it affects
+
+        previous_blockers is the node's blocker set before the write, so
+        nodes that lost this dependent are re-run backwards too.
+        """
+        previous = self.inputs.get(node_id)
+        self.inputs[node_id] = inputs
+
+        blockers = self.graph.blockers.get(node_id, set())
+        edges_changed = blockers != previous_blockers
+
+        # Day zero moving shifts every offset
+        if self._moves_origin(previous, inputs):
+            self.recompute()
+            return
+
+        if edges_changed or previous is None or node_id not in self.position:
+            self._reorder()
+
+        if node_id not in self.position:
+            self.recompute()  # Node left the acyclic order - rebuild
+            return
+
+        forward_changed = self._propagate_forward({node_id})
+        old_finish = self.finish
+        self.finish = max(self.ef.values(), default=0)
+
+        if self.finish != old_finish:
+            # Every late date hangs off the project finish
+            self.ls.clear()
+            self.lf.clear()
+            for other in reversed(self.order):
+                self._backward(other)
+            self._floats(self.order)
+            self.last_update_size = len(self.order)
+        else:
+            upstream = (blockers | previous_blockers) & self.position.keys()
+            backward_changed = self._propagate_backward({node_id} | upstream)
+
+            touched = forward_changed | backward_changed | upstream
+            for changed in forward_changed:
+                touched |= self.graph.blockers.get(changed, set()) & self.position.keys()
+            self._floats(touched)
+            self.last_update_size = len(touched)
+
+        self.incremental_updates += 1
+
+    def remove(self, node_id: str):
+        """Drop a node and rebuild"""
+        self.inputs.pop(node_id, None)
+        self.recompute()
+
+    def _propagate_forward(self, seeds: Set[str]) -> Set[str]:
+        """Forward pass over the downstream subgraph, stopping where nothing moves"""
+        heap = [(self.position[n], n) for n in seeds if n in self.position]
+        heapq.heapify(heap)
+        queued = {n for _, n in heap}
+        changed = set()
+
+        while heap:
+            _, node_id = heapq.heappop(heap)
+            before = (self.es.get(node_id), self.ef.get(node_id))
+            self._forward(node_id)
+
+            if (self.es[node_id], self.ef[node_id]) != before or node_id in seeds:
+                changed.add(node_id)
+                for dependent in self.graph.dependents.get(node_id, ()):
+                    if dependent in self.position and dependent not in queued:
+                        queued.add(dependent)
+                        heapq.heappush(heap, (self.position[dependent], dependent))
+
+        return changed
+
+    def _propagate_backward(self, seeds: Set[str]) -> Set[str]:
+        """Backward pass over the upstream subgraph, stopping where nothing moves"""
+        heap = [(-self.position[n], n) for n in seeds if n in self.position]
+        heapq.heapify(heap)
+        queued = {n for _, n in heap}
+        changed = set()
+
+        while heap:
+            _, node_id = heapq.heappop(heap)
+            before = (self.ls.get(node_id), self.lf.get(node_id))
+            self._backward(node_id)
+
+            if (self.ls[node_id], self.lf[node_id]) != before or node_id in seeds:
+                changed.add(node_id)
+                for blocker in self.graph.blockers.get(node_id, ()):
+                    if blocker in self.position and blocker not in queued:
+                        queued.add(blocker)
+                        heapq.heappush(heap, (-self.position[blocker], blocker))
+
+        return changed
+
+    # ==================== PASSES ====================
+
+    def _offset(self, value: Optional[datetime]) -> Optional[int]:
+        """Whole days from day zero"""
+        if value is None:
+            return None
+        return (value.date() - self.origin.date()).days
+
+    def _forward(self, node_id: str):
+        """ES = latest predecessor finish (or start constraint)"""
+        inputs = self.inputs[node_id]
+        es = self._offset(inputs['start']) or 0
+        for blocker in self.graph.blockers.get(node_id, ()):
+            if blocker in self.ef:
+                es = max(es, self.ef[blocker])
+
+        self.es[node_id] = es
+        self.ef[node_id] = es + inputs['duration']
+
+    def _backward(self, node_id: str):
+        """LF = earliest successor late start, capped by the node's deadline"""
+        inputs = self.inputs[node_id]
+        lf = self.finish
+        for dependent in self.graph.dependents.get(node_id, ()):
+            if dependent in self.ls:
+                lf = min(lf, self.ls[dependent])
+
+        deadline = self._offset(inputs['deadline'])
+        if deadline is not None:
+            lf = min(lf, deadline)
+
+        self.lf[node_id] = lf
+        self.ls[node_id] = lf - inputs['duration']
+
+    def _floats(self, node_ids):
+        """Total float = LS - ES; free float = earliest successor ES - EF"""
+        for node_id in node_ids:
+            if node_id not in self.position:
+                continue
+
+            self.total_float[node_id] = self.ls[node_id] - self.es[node_id]
+
+            successor_starts = [
+                self.es[d] for d in self.graph.dependents.get(node_id, ()) if d in self.es
+            ]
+            next_start = min(successor_starts) if successor_starts else self.finish
+            self.free_float[node_id] = next_start - self.ef[node_id]
+
+    # ==================== OUTPUT ====================
+
+    def _date(self, offset: int) -> str:
+        """Day offset as an ISO date"""
+        return (self.origin + timedelta(days=offset)).date().isoformat()
+
+    def critical_path(self) -> List[str]:
+        """Nodes with no (or negative) total float, in dependency order"""
+        return [n for n in self.order if self.total_float.get(n, 1) <= 0]
+
+    def to_dict(self, include_nodes: bool = True) -> Dict[str, Any]:
+        """Serialisable schedule"""
+        result = {
+            'project_start': self._date(0),
+            'project_finish': self._date(self.finish),
+            'duration_days': self.finish,
+            'critical_path': self.critical_path(),
+            'stats': {
+                'nodes': len(self.order),
+                'full_recomputes': self.full_recomputes,
+                'incremental_updates': self.incremental_updates,
+                'last_update_size': self.last_update_size
+            }
+        }
+
+        if include_nodes:
+            result['nodes'] = {
+                node_id: {
+                    'duration_days': self.inputs[node_id]['duration'],
+                    'earliest_start': self._date(self.es[node_id]),
+                    'earliest_finish': self._date(self.ef[node_id]),
+                    'latest_start': self._date(self.ls[node_id]),
+                    'latest_finish': self._date(self.lf[node_id]),
+                    'total_float': self.total_float[node_id],
+                    'free_float': self.free_float[node_id],
+                    'critical': self.total_float[node_id] <= 0
+                }
+                for node_id in self.order
+            }
+
+        return result
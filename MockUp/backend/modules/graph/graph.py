@@ -0,0 +1,380 @@
+"""
+Dependency Graph
+In-memory graph of tasks.blocked_by and milestones.dependencies per project
+
+Edges point from a blocker to the node it blocks. Each project's graph is
+built from one query per table on first use and then kept current from data
+layer writes. Writes that would close a cycle are rejected before they reach
+the database: the check runs under the data layer's lock, together with the
+write, so two concurrent writes cannot each pass it and commit a cycle.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from data.dates import parse_date
+
+from .cpm import CriticalPathSchedule, node_inputs
+
+
+# Tables that contribute nodes, and how to read them
+NODE_SOURCES = {
+    'tasks': {
+        'kind': 'task',
+        'name_column': 'title',
+        'edges_column': 'blocked_by',
+        'done_statuses': ['done']
+    },
+    'milestones': {
+        'kind': 'milestone',
+        'name_column': 'name',
+        'edges_column': 'dependencies',
+        'done_statuses': ['completed', 'cancelled']
+    }
+}
+
+DEFAULT_PROJECT_ID = 'default-project'
+
+
+class DependencyCycleError(ValueError):
+    """Raised when a write would make the dependency graph cyclic"""
+
+    def __init__(self, path: List[str]):
+        self.path = path
+        super().__init__(f"Dependency cycle: {' -> '.join(path)}")
+
+
+class DependencyGraph:
+    """Blocker/dependent adjacency for one project"""
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.blockers: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+
+    # ==================== MUTATION ====================
+
+    def set_node(self, node_id: str, kind: str, name: str, status: str, done: bool,
+                 blockers: Iterable[str], check_cycles: bool = True):
+        """Add or replace a node and its incoming edges"""
+        new_blockers = {b for b in blockers if b and b != node_id}
+
+        if check_cycles:
+            path = self.find_cycle(node_id, new_blockers)
+            if path:
+                raise DependencyCycleError(path)
+
+        for blocker in self.blockers.get(node_id, set()) - new_blockers:
+            self.dependents.get(blocker, set()).discard(node_id)
+        for blocker in new_blockers:
+            self.dependents.setdefault(blocker, set()).add(node_id)
+
+        self.blockers[node_id] = new_blockers
+        self.dependents.setdefault(node_id, set())
+        self.nodes[node_id] = {'id': node_id, 'kind': kind, 'name': name, 'status': status, 'done': done}
+
+    def remove_node(self, node_id: str):
+        """Drop a node; edges from it to remaining dependents are kept as dangling references"""
+        for blocker in self.blockers.pop(node_id, set()):
+            self.dependents.get(blocker, set()).discard(node_id)
+
+        self.nodes.pop(node_id, None)
+        if not self.dependents.get(node_id):
+            self.dependents.pop(node_id, None)
+
+    def find_cycle(self, node_id: str, new_blockers: Set[str],
+                   extra_dependents: Optional[Dict[str, Set[str]]] = None,
+                   ignored: Optional[Set[Tuple[str, str]]] = None) -> Optional[List[str]]:
+        """
+        Path that would form a cycle if node_id were blocked by new_blockers
+
+        A cycle exists when a proposed blocker is already downstream of node_id,
+        so only node_id's dependents are searched. extra_dependents adds edges
+        not applied to the graph yet; ignored drops (blocker, dependent) edges
+        known to be stale.
+        """
+        if not new_blockers:
+            return None
+
+        parents: Dict[str, Optional[str]] = {node_id: None}
+        queue = deque([node_id])
+
+        while queue:
+            current = queue.popleft()
+            if current in new_blockers:
+                path = [current]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                # node_id -> ... -> blocker, then blocker -> node_id closes the loop
+                return list(reversed(path)) + [node_id]
+
+            dependents = self.dependents.get(current, ())
+            if extra_dependents and current in extra_dependents:
+                dependents = set(dependents) | extra_dependents[current]
+            for dependent in dependents:
+                if dependent not in parents and not (ignored and (current, dependent) in ignored):
+                    parents[dependent] = current
+                    queue.append(dependent)
+
+        return None
+
+    # ==================== QUERIES ====================
+
+    def is_done(self, node_id: str) -> bool:
+        """Done nodes, and references to missing nodes, no longer block"""
+        node = self.nodes.get(node_id)
+        return node is None or node['done']
+
+    def topological_order(self) -> List[str]:
+        """Kahn's algorithm over known nodes (blockers first)"""
+        in_degree = {
+            node_id: sum(1 for b in self.blockers.get(node_id, ()) if b in self.nodes)
+            for node_id in self.nodes
+        }
+        queue = deque(sorted(n for n, degree in in_degree.items() if degree == 0))
+        order = []
+
+        while queue:
+            current = queue.popleft()
+            order.append(current)
+            for dependent in sorted(self.dependents.get(current, ())):
+                if dependent in in_degree:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        queue.append(dependent)
+
+        return order
+
+    def transitive(self, node_id: str, direction: str) -> List[str]:
+        """All upstream ('blockers') or downstream ('dependents') nodes, nearest first"""
+        adjacency = self.blockers if direction == 'blockers' else self.dependents
+        seen = {node_id}
+        queue = deque([node_id])
+        result = []
+
+        while queue:
+            current = queue.popleft()
+            for neighbour in sorted(adjacency.get(current, ())):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    result.append(neighbour)
+                    queue.append(neighbour)
+
+        return result
+
+    def unblocked_by(self, node_id: str) -> List[str]:
+        """
+        Open dependents whose only remaining open blocker is node_id
+
+        Cost is proportional to node_id's dependents and their blockers.
+        """
+        unblocked = []
+        for dependent in sorted(self.dependents.get(node_id, ())):
+            if dependent not in self.nodes or self.is_done(dependent):
+                continue
+            if all(b == node_id or self.is_done(b) for b in self.blockers.get(dependent, ())):
+                unblocked.append(dependent)
+        return unblocked
+
+    def edges(self) -> List[Dict[str, str]]:
+        """Edge list (blocker -> dependent) between known nodes"""
+        return [
+            {'from': blocker, 'to': node_id}
+            for node_id in sorted(self.nodes)
+            for blocker in sorted(self.blockers.get(node_id, ()))
+            if blocker in self.nodes
+        ]
+
+
+class GraphRegistry:
+    """Per-project graphs (and CPM schedules) kept current from data layer writes"""
+
+    def __init__(self, data_layer):
+        self.data_layer = data_layer
+        self.graphs: Dict[str, DependencyGraph] = {}
+        self.schedules: Dict[str, CriticalPathSchedule] = {}
+        self.node_projects: Dict[str, str] = {}
+        # The data layer's lock: write validation runs under it, and a lock of
+        # our own would be taken in the opposite order by the write listener
+        self.lock = data_layer.lock
+
+        # Edges accepted by the validator whose write is not applied to the graph
+        # yet (listeners run after the write releases the lock): id -> (project, blockers)
+        self.unconfirmed: Dict[str, Tuple[str, Set[str]]] = {}
+
+    def attach(self):
+        """Subscribe to data layer writes"""
+        self.data_layer.add_validator(self._validate_write)
+        self.data_layer.add_listener(self._on_write)
+
+    def detach(self):
+        """Unsubscribe from data layer writes"""
+        self.data_layer.remove_validator(self._validate_write)
+        self.data_layer.remove_listener(self._on_write)
+
+    def get(self, project_id: str) -> DependencyGraph:
+        """Graph for a project, built on first use"""
+        with self.lock:
+            graph = self.graphs.get(project_id)
+            if graph is None:
+                graph = self._build(project_id)
+                self.graphs[project_id] = graph
+            return graph
+
+    def get_schedule(self, project_id: str):
+        """CPM schedule for a project, computed in full on first use"""
+        with self.lock:
+            schedule = self.schedules.get(project_id)
+            if schedule is None:
+                graph = self.get(project_id)
+                project = self.data_layer.get('projects', project_id)
+                schedule = CriticalPathSchedule(graph, parse_date(project.get('start_date')) if project else None)
+
+                for table in NODE_SOURCES:
+                    for row in self.data_layer.query(table, {'project_id': project_id}):
+                        schedule.inputs[row['id']] = node_inputs(table, row)
+
+                schedule.recompute()
+                self.schedules[project_id] = schedule
+            return schedule
+
+    def _build(self, project_id: str) -> DependencyGraph:
+        """One query per node table"""
+        graph = DependencyGraph(project_id)
+
+        for table, source in NODE_SOURCES.items():
+            rows = self.data_layer.query(table, {'project_id': project_id})
+            for row in rows:
+                self._apply_row(graph, table, row, check_cycles=False)
+
+        return graph
+
+    def _apply_row(self, graph: DependencyGraph, table: str, row: Dict[str, Any], check_cycles: bool):
+        """Insert/replace a node from a stored row"""
+        source = NODE_SOURCES[table]
+        blockers = row.get(source['edges_column']) or []
+        if not isinstance(blockers, list):
+            blockers = []
+
+        graph.set_node(
+            row['id'],
+            kind=source['kind'],
+            name=row.get(source['name_column']),
+            status=row.get('status'),
+            done=row.get('status') in source['done_statuses'],
+            blockers=blockers,
+            check_cycles=check_cycles
+        )
+        self.node_projects[row['id']] = graph.project_id
+
+    def _project_for(self, table: str, record_id: str, data: Dict[str, Any]) -> Optional[str]:
+        """Project of a record being written"""
+        if data.get('project_id'):
+            return data['project_id']
+        if record_id in self.node_projects:
+            return self.node_projects[record_id]
+
+        row = self.data_layer.fetchone(f"SELECT project_id FROM {table} WHERE id = ?", (record_id,))
+        if row:
+            return row['project_id']
+        return DEFAULT_PROJECT_ID if table == 'tasks' else None
+
+    def _validate_write(self, table: str, operation: str, record_id: str, data: Dict[str, Any]):
+        """
+        Reject writes whose new edges would close a cycle
+
+        Called by the data layer under its lock, just before the write. The
+        graph may lag the database by writes whose listeners have not run:
+        their accepted edges (unconfirmed) are searched too, and a cycle
+        found is checked edge by edge against the database, skipping edges
+        already removed there, before the write is rejected.
+        """
+        source = NODE_SOURCES.get(table)
+        if not source or source['edges_column'] not in data:
+            return
+
+        blockers = data[source['edges_column']] or []
+        if not isinstance(blockers, list) or not blockers:
+            return
+
+        project_id = self._project_for(table, record_id, data)
+        if not project_id:
+            return
+
+        new_blockers = {b for b in blockers if b and b != record_id}
+        with self.lock:
+            graph = self.get(project_id)
+            pending: Dict[str, Set[str]] = {}
+            for node_id, (node_project, node_blockers) in self.unconfirmed.items():
+                if node_project == project_id and node_id != record_id:
+                    for blocker in node_blockers:
+                        pending.setdefault(blocker, set()).add(node_id)
+
+            stale: Set[Tuple[str, str]] = set()
+            while True:
+                path = graph.find_cycle(record_id, new_blockers, pending, stale)
+                if not path:
+                    break
+                # The path's edges up to the proposed one (its last)
+                removed = {edge for edge in zip(path, path[1:-1]) if not self._stored_edge(*edge)}
+                if not removed:
+                    raise DependencyCycleError(path)
+                stale |= removed
+
+            self.unconfirmed[record_id] = (project_id, new_blockers)
+
+    def _stored_edge(self, blocker: str, dependent: str) -> bool:
+        """Whether the database has dependent blocked by blocker"""
+        for table, source in NODE_SOURCES.items():
+            row = self.data_layer.get(table, dependent)
+            if row:
+                edges = row.get(source['edges_column']) or []
+                return isinstance(edges, list) and blocker in edges
+        return False
+
+    def _on_write(self, table: str, operation: str, record_id: str):
+        """Apply a committed write to the loaded graph and schedule (if any)"""
+        if table == 'projects':
+            with self.lock:
+                self.schedules.pop(record_id, None)  # Start date may have moved
+                if operation == 'delete':
+                    graph = self.graphs.pop(record_id, None)
+                    for node_id in (graph.nodes if graph else ()):
+                        self.node_projects.pop(node_id, None)
+            return
+
+        if table not in NODE_SOURCES:
+            return
+
+        with self.lock:
+            self.unconfirmed.pop(record_id, None)  # The graph now has the stored edges
+
+            if operation == 'delete':
+                project_id = self.node_projects.pop(record_id, None)
+                if project_id in self.graphs:
+                    self.graphs[project_id].remove_node(record_id)
+                if project_id in self.schedules:
+                    self.schedules[project_id].remove(record_id)
+                return
+
+            row = self.data_layer.get(table, record_id)
+            if not row:
+                return
+
+            previous_project = self.node_projects.get(record_id)
+            if previous_project and previous_project != row['project_id']:
+                if previous_project in self.graphs:
+                    self.graphs[previous_project].remove_node(record_id)
+                if previous_project in self.schedules:
+                    self.schedules[previous_project].remove(record_id)
+
+            graph = self.graphs.get(row['project_id'])
+            if graph is not None:
+                previous_blockers = set(graph.blockers.get(record_id, set()))
+                self._apply_row(graph, table, row, check_cycles=False)
+
+                schedule = self.schedules.get(row['project_id'])
+                if schedule is not None:
+                    schedule.set_inputs(record_id, node_inputs(table, row), previous_blockers)
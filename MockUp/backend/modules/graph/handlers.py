@@ -0,0 +1,164 @@
+"""
+Graph Module Handler
+Serves dependency queries over tasks.blocked_by and milestones.dependencies
+"""
+from typing import Dict, Any
+
+from .graph import GraphRegistry
+
+
+class GraphModule:
+    """Handler for dependency graph operations"""
+
+    def __init__(self):
+        self.name = "graph"
+        self.version = "1.0.0"
+        self.registry = None
+
+    def attach(self, data_layer: Any):
+        """Keep project graphs current from data layer writes"""
+        self.registry = GraphRegistry(data_layer)
+        self.registry.attach()
+
+    def detach(self):
+        """Stop listening for writes"""
+        if self.registry:
+            self.registry.detach()
+            self.registry = None
+
+    def handle(self, request: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """
+        Route graph requests to appropriate handlers
+
+        Args:
+            request: Dictionary containing action and parameters
+            data_layer: Database abstraction layer
+
+        Returns:
+            Dictionary with success status and data/error
+        """
+        action = request.get('action')
+
+        if action == 'get':
+            return self._get_graph(request.get('project_id'))
+        elif action == 'order':
+            return self._get_order(request.get('project_id'))
+        elif action == 'blockers':
+            return self._get_related(request.get('project_id'), request.get('id'), 'blockers', request.get('transitive', False))
+        elif action == 'dependents':
+            return self._get_related(request.get('project_id'), request.get('id'), 'dependents', request.get('transitive', False))
+        elif action == 'unblocks':
+            return self._get_unblocks(request.get('project_id'), request.get('id'))
+        elif action == 'critical_path':
+            return self._get_critical_path(request.get('project_id'), request.get('include_nodes', True))
+        else:
+            return {'success': False, 'error': f'Unknown action: {action}'}
+
+    def _get_graph(self, project_id: str) -> Dict[str, Any]:
+        """Nodes, edges and topological order for a project"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'project_id required'}
+
+            graph = self.registry.get(project_id)
+            with self.registry.lock:
+                nodes = [graph.nodes[node_id] for node_id in sorted(graph.nodes)]
+                edges = graph.edges()
+                order = graph.topological_order()
+
+            return {
+                'success': True,
+                'data': {
+                    'project_id': project_id,
+                    'nodes': nodes,
+                    'edges': edges,
+                    'order': order,
+                    'node_count': len(nodes),
+                    'edge_count': len(edges)
+                }
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_order(self, project_id: str) -> Dict[str, Any]:
+        """Topological order (blockers before the work they block)"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'project_id required'}
+
+            graph = self.registry.get(project_id)
+            with self.registry.lock:
+                order = graph.topological_order()
+
+            return {'success': True, 'data': order, 'count': len(order)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_related(self, project_id: str, node_id: str, direction: str, transitive: bool) -> Dict[str, Any]:
+        """Direct or transitive blockers/dependents of a node"""
+        try:
+            if not project_id or not node_id:
+                return {'success': False, 'error': 'project_id and node id required'}
+
+            graph = self.registry.get(project_id)
+            with self.registry.lock:
+                if node_id not in graph.nodes:
+                    return {'success': False, 'error': 'Node not found'}
+
+                if transitive:
+                    related = graph.transitive(node_id, direction)
+                else:
+                    adjacency = graph.blockers if direction == 'blockers' else graph.dependents
+                    related = sorted(adjacency.get(node_id, ()))
+
+                nodes = [graph.nodes[n] for n in related if n in graph.nodes]
+
+            return {'success': True, 'data': nodes, 'count': len(nodes)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_unblocks(self, project_id: str, node_id: str) -> Dict[str, Any]:
+        """Open nodes that become unblocked once node_id is finished"""
+        try:
+            if not project_id or not node_id:
+                return {'success': False, 'error': 'project_id and node id required'}
+
+            graph = self.registry.get(project_id)
+            with self.registry.lock:
+                if node_id not in graph.nodes:
+                    return {'success': False, 'error': 'Node not found'}
+                nodes = [graph.nodes[n] for n in graph.unblocked_by(node_id)]
+
+            return {'success': True, 'data': nodes, 'count': len(nodes)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_critical_path(self, project_id: str, include_nodes: bool) -> Dict[str, Any]:
+        """CPM dates, floats and the critical path for a project"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'project_id required'}
+
+            schedule = self.registry.get_schedule(project_id)
+            with self.registry.lock:
+                data = schedule.to_dict(include_nodes=include_nodes)
+
+            return {'success': True, 'data': data}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_info(self) -> Dict[str, Any]:
+        """Return module information"""
+        return {
+            'name': self.name,
+            'version': self.version,
+            'description': 'Dependency graph with cycle detection, ordering, unblock queries and critical path',
+            'actions': [
+                'get',
+                'order',
+                'blockers',
+                'dependents',
+                'unblocks',
+                'critical_path'
+            ]
+        }
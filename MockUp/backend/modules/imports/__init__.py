@@ -0,0 +1,4 @@
+"""Imports Module"""
+from .handlers import ImportsModule
+
+__all__ = ['ImportsModule']
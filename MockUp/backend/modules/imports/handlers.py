@@ -0,0 +1,104 @@
+"""
+Imports Module Handler
+Bulk CSV/NDJSON imports into project tables
+"""
+from typing import Dict, Any
+
+from .pipeline import ImportRunner
+
+
+class ImportsModule:
+    """Handler for bulk import jobs"""
+
+    def __init__(self):
+        self.name = "imports"
+        self.version = "1.0.0"
+
+    def handle(self, request: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """
+        Route import requests to appropriate handlers
+
+        Args:
+            request: Dictionary containing action and parameters
+            data_layer: Database abstraction layer
+
+        Returns:
+            Dictionary with success status and data/error
+        """
+        action = request.get('action')
+        runner = ImportRunner(data_layer)
+
+        if action == 'create':
+            return self._create_job(request.get('table'), request.get('format'), request.get('options', {}), runner)
+        elif action == 'run':
+            return self._run_job(request.get('id'), request.get('schema'), runner)
+        elif action == 'get':
+            return self._get_job(request.get('id'), runner)
+        elif action == 'list':
+            return self._list_jobs(request.get('filters', {}), data_layer)
+        else:
+            return {'success': False, 'error': f'Unknown action: {action}'}
+
+    def _create_job(self, table: str, source_format: str, options: Dict[str, Any],
+                    runner: ImportRunner) -> Dict[str, Any]:
+        """Register a job and return the path its upload should be written to"""
+        try:
+            return {'success': True, 'data': runner.create_job(table, source_format, options)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _run_job(self, job_id: str, schema: Any, runner: ImportRunner) -> Dict[str, Any]:
+        """
+        Run (or resume) a job
+
+        schema is the table's *Create model; rows are validated against it.
+        """
+        try:
+            if not job_id:
+                return {'success': False, 'error': 'Import job ID required'}
+            if schema is None:
+                return {'success': False, 'error': 'Import schema required'}
+
+            return {'success': True, 'data': runner.run(job_id, schema)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_job(self, job_id: str, runner: ImportRunner) -> Dict[str, Any]:
+        """Get a job's progress and row errors"""
+        try:
+            if not job_id:
+                return {'success': False, 'error': 'Import job ID required'}
+
+            job = runner.get_job(job_id)
+            if not job:
+                return {'success': False, 'error': 'Import job not found'}
+
+            return {'success': True, 'data': job}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _list_jobs(self, filters: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """List jobs (newest first) without their error lists"""
+        try:
+            jobs = data_layer.query('import_jobs', filters)
+            jobs.sort(key=lambda j: j.get('created_at') or '', reverse=True)
+            for job in jobs:
+                job.pop('errors', None)
+
+            return {'success': True, 'data': jobs, 'count': len(jobs)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_info(self) -> Dict[str, Any]:
+        """Return module information"""
+        return {
+            'name': self.name,
+            'version': self.version,
+            'description': 'Batched, resumable CSV/NDJSON imports validated against the API models',
+            'actions': [
+                'create',
+                'run',
+                'get',
+                'list'
+            ]
+        }
@@ -0,0 +1,257 @@
+"""
+Import Pipeline
+Batched CSV/NDJSON imports with per-row validation and resumable progress
+
+The uploaded file is read row by row from disk. Each row is mapped onto the
+table's *Create model fields, validated by that model, and collected into
+batches. A batch is inserted with one executemany, and the job's progress
+is updated in the same transaction. A crash therefore resumes exactly after
+the last committed batch. If the batch insert fails (a CHECK constraint or
+a dependency cycle, say), it is retried row by row under savepoints so only
+the offending rows are rejected.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, get_args, get_origin
+from uuid import uuid4
+
+from pydantic import ValidationError
+
+from modules.tasks.handlers import FIELD_COLUMNS as TASK_FIELD_COLUMNS
+
+
+IMPORTABLE_TABLES = ('tasks', 'budget_items', 'documents', 'contacts', 'milestones', 'materials')
+SOURCE_FORMATS = ('csv', 'ndjson')
+
+# Model field -> column, where they differ
+FIELD_RENAMES = {'tasks': TASK_FIELD_COLUMNS}
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+MAX_STORED_ERRORS = 1000
+
+# Separator for list fields (tags, dependencies) in CSV cells
+LIST_SEPARATOR = ';'
+
+
+def read_rows(path: str, source_format: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """(row number, values, parse error) per record, streamed from disk"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if source_format == 'csv':
+            for number, values in enumerate(csv.DictReader(f), start=1):
+                yield number, values, None
+            return
+
+        number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                values = json.loads(line)
+            except ValueError as e:
+                yield number, None, f'Invalid JSON: {e}'
+                continue
+            if isinstance(values, dict):
+                yield number, values, None
+            else:
+                yield number, None, 'Expected a JSON object'
+
+
+def _is_list_field(schema, field: str) -> bool:
+    """Whether a model field is a List (or Optional[List])"""
+    annotation = schema.model_fields[field].annotation
+    if get_origin(annotation) is Union:
+        return any(get_origin(arg) is list for arg in get_args(annotation))
+    return get_origin(annotation) is list
+
+
+def map_record(values: Dict[str, Any], mapping: Dict[str, str], schema,
+               defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rename source columns to model fields and clean CSV strings
+
+    Empty cells are dropped so model defaults apply, and list fields accept
+    a JSON array or LIST_SEPARATOR-separated values. Unknown columns are ignored.
+    """
+    record = {}
+    for column, value in values.items():
+        field = mapping.get(column, column)
+        if field not in schema.model_fields:
+            continue
+
+        if isinstance(value, str):
+            value = value.strip()
+            if value == '':
+                continue
+            if _is_list_field(schema, field):
+                value = json.loads(value) if value.startswith('[') else [
+                    part.strip() for part in value.split(LIST_SEPARATOR) if part.strip()
+                ]
+        record[field] = value
+
+    for field, value in defaults.items():
+        if field in schema.model_fields and field not in record and value is not None:
+            record[field] = value
+    return record
+
+
+def to_row(table: str, model, project_id: Optional[str]) -> Dict[str, Any]:
+    """Validated model -> row for the table"""
+    renames = FIELD_RENAMES.get(table, {})
+    row = {renames.get(k, k): v for k, v in model.model_dump().items()}
+
+    if project_id and 'project_id' not in row:
+        row['project_id'] = project_id
+
+    now = datetime.utcnow().isoformat()
+    row.update({'id': str(uuid4()), 'created_at': now, 'updated_at': now})
+    return row
+
+
+def describe_error(error: Exception) -> str:
+    """One-line message for a rejected row"""
+    if isinstance(error, ValidationError):
+        return '; '.join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+class ImportRunner:
+    """Creates, runs and resumes import jobs"""
+
+    def __init__(self, data_layer):
+        self.data_layer = data_layer
+
+    def import_dir(self) -> str:
+        """Where uploaded files are kept until their job completes"""
+        path = os.path.join(self.data_layer.data_dir, 'imports')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def create_job(self, table: str, source_format: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Register a job; the caller writes the upload to its source_path"""
+        if table not in IMPORTABLE_TABLES:
+            raise ValueError(f"Table cannot be imported: {table}")
+        if source_format not in SOURCE_FORMATS:
+            raise ValueError(f"Unsupported format: {source_format}")
+
+        job_id = str(uuid4())
+        now = datetime.utcnow().isoformat()
+        return self.data_layer.create('import_jobs', {
+            'id': job_id,
+            'table_name': table,
+            'source_format': source_format,
+            'source_path': os.path.join(self.import_dir(), f"{job_id}.{source_format}"),
+            'options': options,
+            'status': 'pending',
+            'created_at': now,
+            'updated_at': now
+        })
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job record, including stored row errors"""
+        return self.data_layer.get('import_jobs', job_id)
+
+    def run(self, job_id: str, schema) -> Dict[str, Any]:
+        """Import rows after the last committed batch; safe to call again after a failure"""
+        job = self.get_job(job_id)
+        if not job:
+            raise ValueError('Import job not found')
+        if job['status'] == 'completed':
+            return job
+        if not os.path.exists(job['source_path']):
+            raise ValueError('Import source file is missing')
+
+        options = job.get('options') or {}
+        mapping = options.get('mapping') or {}
+        project_id = options.get('project_id')
+        batch_size = min(max(int(options.get('batch_size') or DEFAULT_BATCH_SIZE), 1), MAX_BATCH_SIZE)
+        defaults = {'project_id': project_id}
+
+        self._set_status(job_id, 'running', None)
+        skip = job['rows_processed']
+        errors = list(job.get('errors') or [])
+
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        rejected: List[Dict[str, Any]] = []
+        last_number = skip
+
+        try:
+            for number, values, parse_error in read_rows(job['source_path'], job['source_format']):
+                if number <= skip:
+                    continue
+                last_number = number
+
+                if parse_error:
+                    rejected.append({'row': number, 'error': parse_error})
+                else:
+                    try:
+                        record = map_record(values, mapping, schema, defaults)
+                        batch.append((number, to_row(job['table_name'], schema.model_validate(record), project_id)))
+                    except (ValidationError, ValueError) as e:
+                        rejected.append({'row': number, 'error': describe_error(e)})
+
+                if len(batch) + len(rejected) >= batch_size:
+                    self._commit_batch(job, batch, rejected, errors, last_number)
+                    batch, rejected = [], []
+
+            self._commit_batch(job, batch, rejected, errors, last_number)
+        except Exception as e:
+            self._set_status(job_id, 'failed', str(e))
+            return self.get_job(job_id)
+
+        self._set_status(job_id, 'completed', None)
+        os.remove(job['source_path'])
+        return self.get_job(job_id)
+
+    def _commit_batch(self, job: Dict[str, Any], batch: List[Tuple[int, Dict[str, Any]]],
+                      rejected: List[Dict[str, Any]], errors: List[Dict[str, Any]], last_number: int):
+        """Insert a batch and record progress atomically"""
+        table = job['table_name']
+
+        try:
+            with self.data_layer.transaction():
+                self.data_layer.insert_many(table, [row for _, row in batch])
+                self._save_progress(job, last_number, len(batch), rejected, errors)
+            return
+        except (sqlite3.Error, ValueError):
+            pass  # Find the bad rows below
+
+        with self.data_layer.transaction() as cursor:
+            imported = 0
+            for number, row in batch:
+                cursor.execute('SAVEPOINT import_row')
+                try:
+                    self.data_layer.insert(table, row)
+                    imported += 1
+                except (sqlite3.Error, ValueError) as e:
+                    cursor.execute('ROLLBACK TO import_row')
+                    rejected.append({'row': number, 'error': describe_error(e)})
+                cursor.execute('RELEASE import_row')
+
+            rejected.sort(key=lambda r: r['row'])
+            self._save_progress(job, last_number, imported, rejected, errors)
+
+    def _save_progress(self, job: Dict[str, Any], last_number: int, imported: int,
+                       rejected: List[Dict[str, Any]], errors: List[Dict[str, Any]]):
+        """Advance the job's counters (runs inside the batch transaction)"""
+        stored = errors + rejected[:max(0, MAX_STORED_ERRORS - len(errors))]
+        self.data_layer.execute(
+            "UPDATE import_jobs SET rows_processed = ?, rows_imported = rows_imported + ?, "
+            "rows_failed = rows_failed + ?, errors = ?, updated_at = ? WHERE id = ?",
+            (last_number, imported, len(rejected), json.dumps(stored), datetime.utcnow().isoformat(), job['id'])
+        )
+        errors[:] = stored
+
+    def _set_status(self, job_id: str, status: str, last_error: Optional[str]):
+        """Update job status"""
+        self.data_layer.execute(
+            "UPDATE import_jobs SET status = ?, last_error = ?, updated_at = ? WHERE id = ?",
+            (status, last_error, datetime.utcnow().isoformat(), job_id)
+        )
@@ -0,0 +1,4 @@
+"""Maintenance Module"""
+from .handlers import MaintenanceModule
+
+__all__ = ['MaintenanceModule']
@@ -0,0 +1,291 @@
+"""
+Online Backups
+Hot snapshots of the live database using the SQLite backup API
+
+The copy is made from a snapshot() read connection, a few hundred pages per
+step. Under WAL the snapshot stays fixed for the whole copy, so writers on
+the main connection carry on between steps and the backup never restarts.
+Each copy is written to a .partial file, checked with PRAGMA integrity_check
+and only then renamed into place. The newest keep backups are retained.
+
+Archived projects live in a second file (data/archive.py). Each backup gets
+a copy of it, aven-<time>.archive.db, taken while archive moves are held
+off and the database snapshot is pinned, so the pair matches. It is
+verified, rotated and listed together with its backup.
+
+With sharded storage (data/shards.py) the database is the catalog, and a
+backup also copies every project's shard into aven-<time>.shards/, one
+<project id>.db each. Each shard copy is consistent on its own; shards are
+copied one after another, not at one instant.
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+
+DEFAULT_INTERVAL_SECONDS = 24 * 60 * 60
+DEFAULT_KEEP = 7
+
+# Pages copied per backup step, and the pause that lets writers in between steps
+PAGES_PER_STEP = 256
+STEP_SLEEP_SECONDS = 0.005
+
+BACKUP_PREFIX = 'aven-'
+BACKUP_SUFFIX = '.db'
+ARCHIVE_SUFFIX = '.archive.db'
+SHARDS_SUFFIX = '.shards'
+PARTIAL_SUFFIX = '.partial'
+
+
+class BackupService:
+    """Scheduled and on-demand backups with rotation and verification"""
+
+    def __init__(self, data_layer, backup_dir: Optional[str] = None,
+                 interval_seconds: int = DEFAULT_INTERVAL_SECONDS, keep: int = DEFAULT_KEEP):
+        self.data_layer = data_layer
+        self.backup_dir = backup_dir or os.path.join(data_layer.data_dir, 'backups')
+        self.interval_seconds = interval_seconds
+        self.keep = keep
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._worker: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+        self._trigger_lock = threading.Lock()
+
+        self.progress: Dict[str, Any] = {'state': 'idle'}
+        self.next_run: Optional[datetime] = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Start the schedule thread"""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='backup', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the schedule and wait for a running backup to finish"""
+        self._stopped.set()
+        self._wake.set()
+
+        for thread in (self._thread, self._worker):
+            if thread:
+                thread.join(timeout=30)
+        self._thread = None
+        self._worker = None
+
+    def _run(self):
+        """Back up whenever the newest backup is older than the interval"""
+        while not self._stopped.is_set():
+            self.next_run = self._next_run_time()
+            timeout = max(0.0, (self.next_run - datetime.utcnow()).total_seconds())
+
+            if self._wake.wait(timeout):
+                self._wake.clear()
+                continue  # Stop, or reschedule after a manual backup
+            if self._stopped.is_set():
+                return
+
+            try:
+                self.run_backup('scheduled')
+            except Exception as e:
+                print(f"⚠️  Scheduled backup failed: {e}")
+
+    def _next_run_time(self) -> datetime:
+        """Interval after the newest backup (now, when there is none)"""
+        backups = self.list_backups()
+        if not backups:
+            return datetime.utcnow()
+        return datetime.fromisoformat(backups[0]['created_at']) + timedelta(seconds=self.interval_seconds)
+
+    # ==================== BACKUPS ====================
+
+    def trigger(self) -> Dict[str, Any]:
+        """Start a backup in the background; returns progress (already running is not an error)"""
+        with self._trigger_lock:
+            if self._run_lock.locked() or (self._worker and self._worker.is_alive()):
+                return self.get_progress()
+
+            self.progress = {'state': 'running', 'trigger': 'manual', 'pages_total': 0, 'pages_done': 0, 'percent': 0.0}
+            self._worker = threading.Thread(target=self._run_manual, name='backup-manual', daemon=True)
+            self._worker.start()
+        return self.get_progress()
+
+    def _run_manual(self):
+        try:
+            self.run_backup('manual')
+        except Exception as e:
+            print(f"⚠️  Backup failed: {e}")
+        self._wake.set()
+
+    def run_backup(self, trigger: str = 'manual') -> Dict[str, Any]:
+        """Copy, verify and rotate; returns the final progress record"""
+        with self._run_lock:
+            started = datetime.utcnow()
+            os.makedirs(self.backup_dir, exist_ok=True)
+            name = f"{BACKUP_PREFIX}{started.strftime('%Y%m%dT%H%M%S%fZ')}{BACKUP_SUFFIX}"
+            path = os.path.join(self.backup_dir, name)
+            partial = path + PARTIAL_SUFFIX
+            archive_path = self._archive_path(path)
+            archive_partial = archive_path + PARTIAL_SUFFIX
+            shards_path = self._shards_path(path)
+            shards_partial = shards_path + PARTIAL_SUFFIX
+
+            self.progress = {
+                'state': 'running',
+                'trigger': trigger,
+                'started_at': started.isoformat(),
+                'pages_total': 0,
+                'pages_done': 0,
+                'percent': 0.0
+            }
+
+            try:
+                has_archive = self._copy(partial, archive_partial)
+                shard_copies = self._copy_shards(shards_partial)
+                self.progress['state'] = 'verifying'
+                for copy in [partial] + ([archive_partial] if has_archive else []) + (shard_copies or []):
+                    integrity = self._verify(copy)
+                    if integrity != 'ok':
+                        raise RuntimeError(f"Integrity check failed: {integrity}")
+                # The archive and shards first: a listed backup is always complete
+                if has_archive:
+                    os.replace(archive_partial, archive_path)
+                if shard_copies is not None:
+                    os.replace(shards_partial, shards_path)
+                os.replace(partial, path)
+            except Exception as e:
+                for leftover in (partial, archive_partial):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+                shutil.rmtree(shards_partial, ignore_errors=True)
+                self._finish(started, state='failed', error=str(e))
+                raise
+
+            self._finish(started, state='completed', path=path, size_bytes=os.path.getsize(path),
+                         integrity='ok', removed=self._rotate())
+            return self.get_progress()
+
+    def _archive_path(self, backup_path: str) -> str:
+        return backup_path[:-len(BACKUP_SUFFIX)] + ARCHIVE_SUFFIX
+
+    def _shards_path(self, backup_path: str) -> str:
+        return backup_path[:-len(BACKUP_SUFFIX)] + SHARDS_SUFFIX
+
+    def _copy(self, target_path: str, archive_target_path: str) -> bool:
+        """Page-stepped copy from a fixed read snapshot, plus the archive; False when there is no archive"""
+        def on_progress(status, remaining, total):
+            self.progress.update({
+                'pages_total': total,
+                'pages_done': total - remaining,
+                'percent': round((total - remaining) / total * 100, 1) if total else 100.0
+            })
+
+        target = sqlite3.connect(target_path)
+        try:
+            with ExitStack() as stack:
+                # Pin the snapshot and copy the archive with no archive move in between
+                with self.data_layer.archive.frozen():
+                    source = stack.enter_context(self.data_layer.snapshot())
+                    has_archive = self.data_layer.archive.copy_to(archive_target_path)
+                source.backup(target, pages=PAGES_PER_STEP, progress=on_progress, sleep=STEP_SLEEP_SECONDS)
+            # A standalone file: no WAL sidecar files next to the backup
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+        return has_archive
+
+    def _copy_shards(self, target_dir: str) -> Optional[List[str]]:
+        """Copy every project shard into target_dir; returns the copies (None without sharded storage)"""
+        shards = self.data_layer.shards
+        if not shards:
+            return None
+
+        os.makedirs(target_dir)
+        copies = []
+        for project_id in shards.paths():
+            target = os.path.join(target_dir, f"{project_id}{BACKUP_SUFFIX}")
+            # A project deleted since the list was read has nothing to copy
+            if shards.copy_to(project_id, target):
+                copies.append(target)
+        return copies
+
+    def _verify(self, path: str) -> str:
+        """PRAGMA integrity_check result ('ok' when sound)"""
+        conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True)
+        try:
+            rows = conn.execute('PRAGMA integrity_check').fetchall()
+        finally:
+            conn.close()
+        return '; '.join(row[0] for row in rows)
+
+    def _rotate(self) -> List[str]:
+        """Delete backups beyond the newest keep; returns removed file names"""
+        removed = []
+        for backup in self.list_backups()[self.keep:]:
+            os.remove(os.path.join(self.backup_dir, backup['name']))
+            removed.append(backup['name'])
+            if backup['archive']:
+                os.remove(os.path.join(self.backup_dir, backup['archive']))
+                removed.append(backup['archive'])
+            if backup['shards']:
+                shutil.rmtree(os.path.join(self.backup_dir, backup['shards']))
+                removed.append(backup['shards'])
+        return removed
+
+    def _finish(self, started: datetime, **result):
+        finished = datetime.utcnow()
+        self.progress.update(result)
+        self.progress.update({
+            'finished_at': finished.isoformat(),
+            'duration_ms': round((finished - started).total_seconds() * 1000, 1)
+        })
+
+    # ==================== STATUS ====================
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Completed backups, newest first"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+
+        backups = []
+        for name in os.listdir(self.backup_dir):
+            if not (name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)) or name.endswith(ARCHIVE_SUFFIX):
+                continue
+            path = os.path.join(self.backup_dir, name)
+            stat = os.stat(path)
+            archive_path = self._archive_path(path)
+            shards_path = self._shards_path(path)
+            backups.append({
+                'name': name,
+                'size_bytes': stat.st_size,
+                'archive': os.path.basename(archive_path) if os.path.exists(archive_path) else None,
+                'shards': os.path.basename(shards_path) if os.path.isdir(shards_path) else None,
+                'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+            })
+        backups.sort(key=lambda b: b['name'], reverse=True)
+        return backups
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Current or last backup's progress"""
+        return dict(self.progress)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Progress, schedule and retained backups"""
+        return {
+            'progress': self.get_progress(),
+            'running': self._run_lock.locked(),
+            'backup_dir': self.backup_dir,
+            'interval_seconds': self.interval_seconds,
+            'keep': self.keep,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'backups': self.list_backups()
+        }
@@ -0,0 +1,128 @@
+"""
+Maintenance Module Handler
+Background upkeep of derived columns (overdue materials, delayed milestones),
+purging deleted projects and online database backups
+"""
+from typing import Dict, Any
+
+from .backup import BackupService
+from .jobs import MaintenanceScheduler
+from .purge import ProjectPurger
+
+
+class MaintenanceModule:
+    """Handler for background maintenance operations"""
+
+    def __init__(self):
+        self.name = "maintenance"
+        self.version = "1.0.0"
+        self.scheduler = None
+        self.purger = None
+        self.backups = None
+
+    def attach(self, data_layer: Any):
+        """Start the maintenance scheduler, project purge and (for a database file) backup schedule"""
+        # Status transitions and purges are replicated from the primary, not made on a standby
+        if not data_layer.read_only:
+            self.scheduler = MaintenanceScheduler(data_layer)
+            self.scheduler.start()
+            self.purger = ProjectPurger(data_layer)
+            self.purger.start()
+
+        # A memory database's data directory is temporary and removed with it,
+        # so backups written there would be lost: none are taken
+        if not data_layer.in_memory:
+            self.backups = BackupService(data_layer)
+            self.backups.start()
+
+    def detach(self):
+        """Stop background work"""
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
+        if self.purger:
+            self.purger.stop()
+            self.purger = None
+        if self.backups:
+            self.backups.stop()
+            self.backups = None
+
+    def handle(self, request: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """
+        Route maintenance requests to appropriate handlers
+
+        Args:
+            request: Dictionary containing action and parameters
+            data_layer: Database abstraction layer
+
+        Returns:
+            Dictionary with success status and data/error
+        """
+        action = request.get('action')
+
+        if action == 'status':
+            return self._get_status()
+        elif action == 'run':
+            return self._run_now()
+        elif action == 'purge_status':
+            return self._get_purge_status()
+        elif action == 'backup':
+            return self._start_backup()
+        elif action == 'backup_status':
+            return self._get_backup_status()
+        else:
+            return {'success': False, 'error': f'Unknown action: {action}'}
+
+    def _get_status(self) -> Dict[str, Any]:
+        """Get scheduler state"""
+        if not self.scheduler:
+            return {'success': False, 'error': 'Maintenance scheduler not running'}
+        return {'success': True, 'data': self.scheduler.get_status()}
+
+    def _run_now(self) -> Dict[str, Any]:
+        """Run a sweep immediately"""
+        try:
+            if not self.scheduler:
+                return {'success': False, 'error': 'Maintenance scheduler not running'}
+            return {'success': True, 'data': self.scheduler.run_once()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_purge_status(self) -> Dict[str, Any]:
+        """Deleted projects still being purged, and purge totals"""
+        try:
+            if not self.purger:
+                return {'success': False, 'error': 'Project purge not running'}
+            return {'success': True, 'data': self.purger.get_status()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _start_backup(self) -> Dict[str, Any]:
+        """Start a backup in the background"""
+        try:
+            if not self.backups:
+                return {'success': False, 'error': 'Backup service not running'}
+            return {'success': True, 'data': self.backups.trigger()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_backup_status(self) -> Dict[str, Any]:
+        """Backup progress, schedule and retained backups"""
+        if not self.backups:
+            return {'success': False, 'error': 'Backup service not running'}
+        return {'success': True, 'data': self.backups.get_status()}
+
+    def get_info(self) -> Dict[str, Any]:
+        """Return module information"""
+        return {
+            'name': self.name,
+            'version': self.version,
+            'description': 'Scheduled status transitions, deleted project purging and online database backups',
+            'actions': [
+                'status',
+                'run',
+                'purge_status',
+                'backup',
+                'backup_status'
+            ]
+        }
@@ -0,0 +1,171 @@
+"""
+Maintenance Jobs
+Background transitions that keep derived status columns current
+
+Materials past their delivery date become 'overdue' and milestones past
+their target date become 'delayed'. The status replaced is kept in
+auto_status_from, and a row rescheduled into the future gets it back; a
+status set by hand (including 'overdue'/'delayed' themselves) is never
+rewritten. Sweeps run on an interval and just after each UTC day boundary,
+and single rows are re-checked when they are written. With sharded storage
+a sweep also covers every project shard (rows written in a shard are
+re-checked at the next sweep).
+
+Each sweep also expires chunked upload sessions idle past their TTL, which
+removes their preallocated staging files.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from modules.documents.blobs import BlobStore
+from modules.documents.uploads import UploadSessions
+
+
+DEFAULT_INTERVAL_SECONDS = 15 * 60
+
+# (table, description, SQL) - every statement takes (updated_at, now)
+STATUS_TRANSITIONS = [
+    (
+        'materials', 'overdue',
+        "UPDATE materials SET auto_status_from = delivery_status, delivery_status = 'overdue', updated_at = ? "
+        "WHERE delivery_status IN ('ordered', 'in-transit') "
+        "AND delivery_date IS NOT NULL AND delivery_date < ?"
+    ),
+    (
+        'materials', 'rescheduled',
+        "UPDATE materials SET delivery_status = auto_status_from, auto_status_from = NULL, updated_at = ? "
+        "WHERE delivery_status = 'overdue' AND auto_status_from IS NOT NULL AND delivery_date >= ?"
+    ),
+    (
+        'milestones', 'delayed',
+        "UPDATE milestones SET auto_status_from = status, status = 'delayed', updated_at = ? "
+        "WHERE status IN ('pending', 'in-progress') "
+        "AND target_date IS NOT NULL AND target_date < ?"
+    ),
+    (
+        'milestones', 'rescheduled',
+        "UPDATE milestones SET status = auto_status_from, auto_status_from = NULL, updated_at = ? "
+        "WHERE status = 'delayed' AND auto_status_from IS NOT NULL AND target_date >= ?"
+    )
+]
+
+
+class MaintenanceScheduler:
+    """Runs status transitions on a timer and at day boundaries"""
+
+    def __init__(self, data_layer, interval_seconds: int = DEFAULT_INTERVAL_SECONDS):
+        self.data_layer = data_layer
+        self.interval_seconds = interval_seconds
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.runs = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.next_run: Optional[datetime] = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Sweep once, subscribe to writes and start the timer thread"""
+        self.run_once()
+        self.data_layer.add_listener(self._on_write)
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the timer thread"""
+        self.data_layer.remove_listener(self._on_write)
+        self._stopped.set()
+        self._wake.set()
+
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def wake(self):
+        """Run the next sweep now"""
+        self._wake.set()
+
+    def _run(self):
+        """Sleep until the next interval or day boundary, whichever is sooner"""
+        while not self._stopped.is_set():
+            self.next_run = self._next_run_time(datetime.utcnow())
+            timeout = max(0.0, (self.next_run - datetime.utcnow()).total_seconds())
+
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+            if self._stopped.is_set():
+                return
+
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️  Maintenance sweep failed: {e}")
+
+    def _next_run_time(self, now: datetime) -> datetime:
+        """Next interval tick, pulled forward to just after midnight UTC"""
+        next_interval = now + timedelta(seconds=self.interval_seconds)
+        next_midnight = datetime(now.year, now.month, now.day) + timedelta(days=1, seconds=1)
+        return min(next_interval, next_midnight)
+
+    # ==================== JOBS ====================
+
+    def run_once(self) -> Dict[str, Any]:
+        """Apply every status transition across all projects (and every shard)"""
+        started = datetime.utcnow()
+        now = started.isoformat()
+
+        changes = {f"{table}.{description}": 0 for table, description, _ in STATUS_TRANSITIONS}
+        changes['upload_sessions.expired'] = 0
+        self._transition(self.data_layer, now, changes)
+
+        shards = self.data_layer.shards
+        if shards:
+            for project_id in shards.paths():
+                with shards.using(project_id) as data_layer:
+                    if data_layer:
+                        self._transition(data_layer, now, changes)
+
+        self.runs += 1
+        self.last_run = {
+            'started_at': now,
+            'duration_ms': round((datetime.utcnow() - started).total_seconds() * 1000, 2),
+            'changes': changes
+        }
+        return self.last_run
+
+    def _transition(self, data_layer, now: str, changes: Dict[str, int]):
+        """Apply every status transition to one database, adding to the change counts"""
+        for table, description, sql in STATUS_TRANSITIONS:
+            cursor = data_layer.execute(sql, (now, now))
+            changes[f"{table}.{description}"] += cursor.rowcount
+
+        changes['upload_sessions.expired'] += UploadSessions(data_layer, BlobStore(data_layer)).expire()
+
+    def _on_write(self, table: str, operation: str, record_id: str):
+        """Re-check a single written row so filters stay exact between sweeps"""
+        if operation == 'delete':
+            return
+
+        now = datetime.utcnow().isoformat()
+        for transition_table, _, sql in STATUS_TRANSITIONS:
+            if transition_table == table:
+                self.data_layer.execute(sql + " AND id = ?", (now, now, record_id))
+
+    def get_status(self) -> Dict[str, Any]:
+        """Scheduler state and the last sweep's results"""
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval_seconds': self.interval_seconds,
+            'runs': self.runs,
+            'last_run': self.last_run,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'transitions': [f"{table}.{description}" for table, description, _ in STATUS_TRANSITIONS]
+        }
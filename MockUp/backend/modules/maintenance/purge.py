@@ -0,0 +1,157 @@
+"""
+Project Purge
+Background removal of deleted projects' records, a bounded batch at a time
+
+Deleting a project only sets projects.deleted_at, which hides it at once.
+This worker then deletes its records table by table in batches of
+PURGE_BATCH_SIZE rows, each batch its own short transaction, so a project
+with tens of thousands of rows never holds the write lock for long and API
+writes interleave with the purge. Children go before the tables they
+reference (documents before tasks, materials before contacts), so the
+ON DELETE actions that still fire (document versions, upload sessions)
+stay small. The project row goes last, then blobs left without references
+are garbage-collected. Rows are deleted with delete_where(), so listeners
+(the graph, EVM, automation and text index caches) drop each one as it
+goes, and drop the whole project with its row.
+
+Progress lives in the data itself: a restart simply carries on with the
+projects still marked deleted.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from modules.documents.blobs import BlobStore
+
+
+PURGE_BATCH_SIZE = 500
+
+# Pause between batches, so waiting writers get the lock
+BATCH_PAUSE_SECONDS = 0.02
+
+# Tables holding project records, children before the tables they reference
+# (evm_snapshots after tasks: EVM records a snapshot as tasks are removed)
+PURGE_TABLES = ('documents', 'materials', 'budget_items', 'milestones', 'tasks', 'evm_snapshots', 'contacts')
+
+
+class ProjectPurger:
+    """Deletes the records of soft-deleted projects in the background"""
+
+    def __init__(self, data_layer, batch_size: int = PURGE_BATCH_SIZE):
+        self.data_layer = data_layer
+        self.batch_size = batch_size
+        self.blobs = BlobStore(data_layer)
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.projects_purged = 0
+        self.rows_purged = 0
+        self.blobs_collected = 0
+        self.current: Optional[str] = None
+        self.last_purge: Optional[Dict[str, Any]] = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Subscribe to project writes and start purging anything already deleted"""
+        self.data_layer.add_listener(self._on_write)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='project-purge', daemon=True)
+        self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        """Stop after the batch in progress"""
+        self.data_layer.remove_listener(self._on_write)
+        self._stopped.set()
+        self._wake.set()
+
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _on_write(self, table: str, operation: str, record_id: str):
+        if table == 'projects' and operation == 'update':
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+
+            try:
+                self.purge_pending()
+            except Exception as e:
+                print(f"⚠️  Project purge failed: {e}")
+
+    # ==================== PURGING ====================
+
+    def pending(self) -> list:
+        """Ids of deleted projects whose records are not purged yet, oldest deletion first"""
+        return [row['id'] for row in self.data_layer.fetchall(
+            "SELECT id FROM projects WHERE deleted_at IS NOT NULL ORDER BY deleted_at"
+        )]
+
+    def purge_pending(self) -> int:
+        """Purge every deleted project; returns the number of projects removed"""
+        purged = 0
+        for project_id in self.pending():
+            if self._stopped.is_set():
+                break
+            if self.purge(project_id):
+                purged += 1
+
+        if purged:
+            self.blobs_collected += self.blobs.collect_garbage()
+        return purged
+
+    def purge(self, project_id: str) -> bool:
+        """Delete one deleted project's records batch by batch, then the project itself"""
+        started = datetime.utcnow()
+        self.current = project_id
+        rows = 0
+        try:
+            for table in PURGE_TABLES:
+                while True:
+                    if self._stopped.is_set():
+                        return False
+                    deleted = self.data_layer.delete_where(
+                        table, f"rowid IN (SELECT rowid FROM {table} WHERE project_id = ? LIMIT ?)",
+                        (project_id, self.batch_size)
+                    )
+                    rows += deleted
+                    self.rows_purged += deleted
+                    if deleted < self.batch_size:
+                        break
+                    time.sleep(BATCH_PAUSE_SECONDS)
+
+            # Only ever removes a project that is still marked deleted
+            self.data_layer.delete_where('projects', "id = ? AND deleted_at IS NOT NULL", (project_id,))
+        finally:
+            self.current = None
+
+        self.projects_purged += 1
+        self.last_purge = {
+            'project_id': project_id,
+            'rows': rows,
+            'started_at': started.isoformat(),
+            'duration_ms': round((datetime.utcnow() - started).total_seconds() * 1000, 2)
+        }
+        return True
+
+    def get_status(self) -> Dict[str, Any]:
+        """Purge backlog and totals"""
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'pending_projects': len(self.pending()),
+            'current_project': self.current,
+            'projects_purged': self.projects_purged,
+            'rows_purged': self.rows_purged,
+            'blobs_collected': self.blobs_collected,
+            'batch_size': self.batch_size,
+            'last_purge': self.last_purge
+        }
@@ -29,6 +29,8 @@ class MaterialsModule:
 
         if action == 'list':
             return self._list_materials(request.get('filters', {}), data_layer)
+        elif action == 'stream':
+            return self._stream_materials(request.get('filters', {}), data_layer)
         elif action == 'get':
             return self._get_material(request.get('id'), data_layer)
         elif action == 'create':
@@ -75,6 +77,17 @@ class MaterialsModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _stream_materials(self, filters: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """Iterate materials in list order without loading them all"""
+        try:
+            rows = data_layer.iter_query(
+                'materials', filters,
+                order_by='delivery_date IS NULL, delivery_date'  # Earliest first, undated last
+            )
+            return {'success': True, 'data': rows}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def _get_material(self, material_id: str, data_layer: Any) -> Dict[str, Any]:
         """Get single material by ID"""
         try:
@@ -246,33 +259,24 @@ class MaterialsModule:
             return {'success': False, 'error': str(e)}
 
     def _get_overdue(self, project_id: str, data_layer: Any) -> Dict[str, Any]:
-        """Get all materials that are overdue for delivery"""
+        """
+        Get all materials that are overdue for delivery
+
+        delivery_status is kept current by the maintenance scheduler, so this
+        is an indexed lookup rather than a scan of the project's materials.
+        """
         try:
             if not project_id:
                 return {'success': False, 'error': 'project_id required'}
 
-            # Get all materials for project
-            filters = {'project_id': project_id}
-            all_materials = data_layer.query('materials', filters)
-
-            # Filter for overdue items
-            now = datetime.utcnow().isoformat()
-            overdue_materials = []
-
-            for material in all_materials:
-                delivery_status = material.get('delivery_status', 'not-ordered')
-                delivery_date = material.get('delivery_date')
-
-                # Material is overdue if:
-                # - Has delivery date
-                # - Delivery date is in the past
-                # - Status is not 'delivered' or 'not-ordered'
-                if delivery_date and delivery_date < now:
-                    if delivery_status not in ['delivered', 'not-ordered']:
-                        overdue_materials.append(material)
+            filters = {
+                'project_id': project_id,
+                'delivery_status': 'overdue'
+            }
+            overdue_materials = data_layer.query('materials', filters)
 
             # Sort by how overdue (oldest first)
-            overdue_materials.sort(key=lambda x: x.get('delivery_date', ''))
+            overdue_materials.sort(key=lambda x: x.get('delivery_date') or '')
 
             return {
                 'success': True,
@@ -310,8 +314,6 @@ class MaterialsModule:
                 'overdue_count': 0
             }
 
-            now = datetime.utcnow().isoformat()
-
             for material in materials:
                 # Count by status
                 status = material.get('delivery_status', 'not-ordered')
@@ -332,11 +334,8 @@ class MaterialsModule:
                     summary['by_supplier'][supplier_id]['count'] += 1
                     summary['by_supplier'][supplier_id]['total_cost'] += material.get('cost', 0)
 
-                # Check for overdue
-                delivery_date = material.get('delivery_date')
-                if delivery_date and delivery_date < now:
-                    if status not in ['delivered', 'not-ordered']:
-                        summary['overdue_count'] += 1
+            # Overdue status is maintained by the maintenance scheduler
+            summary['overdue_count'] = summary['by_status']['overdue']
 
             return {
                 'success': True,
@@ -353,6 +352,7 @@ class MaterialsModule:
             'description': 'Materials procurement and delivery tracking with supplier coordination',
             'actions': [
                 'list',
+                'stream',
                 'get',
                 'create',
                 'update',
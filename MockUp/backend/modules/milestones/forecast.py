@@ -0,0 +1,195 @@
+"""
+Completion Date Forecast
+Monte Carlo simulation of the remaining UK build phases
+
+Each phase's duration is typical_duration_weeks times a lognormal multiplier.
+Multipliers are calibrated from completed milestones (actual_date vs
+target_date), per phase where there is enough history and pooled across
+phases otherwise. All simulations run as one NumPy array operation.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from data.dates import parse_date
+from uk_constants import UK_BUILD_PHASES
+
+
+DEFAULT_SIMULATIONS = 20000
+MAX_SIMULATIONS = 200000
+
+# Lognormal multiplier used when there is no history (~5% median overrun)
+DEFAULT_LOG_MU = 0.05
+DEFAULT_LOG_SIGMA = 0.25
+MIN_LOG_SIGMA = 0.05
+
+# Completed milestones needed before a phase (or the pool) is calibrated
+MIN_HISTORY = 3
+
+PERCENTILES = (50, 80, 95)
+
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+
+def _observed_log_ratios(milestones: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """log(actual/planned phase length) per phase, from completed milestones"""
+    typical_days = {p['id']: p['typical_duration_weeks'] * 7 for p in UK_BUILD_PHASES}
+    ratios: Dict[str, List[float]] = {}
+
+    for milestone in milestones:
+        phase = milestone.get('phase')
+        target = parse_date(milestone.get('target_date'))
+        actual = parse_date(milestone.get('actual_date'))
+
+        if milestone.get('status') != 'completed' or phase not in typical_days or not target or not actual:
+            continue
+
+        planned = typical_days[phase]
+        ratio = (planned + (actual - target).days) / planned
+        ratios.setdefault(phase, []).append(float(np.log(np.clip(ratio, 0.25, 5.0))))
+
+    return ratios
+
+
+def calibrate(milestones: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Lognormal (mu, sigma) per phase from milestone history"""
+    ratios = _observed_log_ratios(milestones)
+    pooled = [r for values in ratios.values() for r in values]
+
+    if len(pooled) >= MIN_HISTORY:
+        pooled_params = (float(np.mean(pooled)), max(float(np.std(pooled)), MIN_LOG_SIGMA))
+        pooled_source = 'history'
+    else:
+        pooled_params = (DEFAULT_LOG_MU, DEFAULT_LOG_SIGMA)
+        pooled_source = 'default'
+
+    phases = {}
+    for phase in UK_BUILD_PHASES:
+        samples = ratios.get(phase['id'], [])
+        if len(samples) >= MIN_HISTORY:
+            phases[phase['id']] = {
+                'mu': float(np.mean(samples)),
+                'sigma': max(float(np.std(samples)), MIN_LOG_SIGMA),
+                'source': 'phase-history',
+                'samples': len(samples)
+            }
+        else:
+            phases[phase['id']] = {
+                'mu': pooled_params[0],
+                'sigma': pooled_params[1],
+                'source': pooled_source,
+                'samples': len(samples)
+            }
+
+    return {'phases': phases, 'history_samples': len(pooled)}
+
+
+def _remaining_phases(milestones: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Phases with an open milestone, or without milestones after the last closed phase
+
+    Untracked phases that come before a closed phase are assumed done.
+    """
+    by_phase: Dict[str, List[str]] = {}
+    for milestone in milestones:
+        if milestone.get('phase'):
+            by_phase.setdefault(milestone['phase'], []).append(milestone.get('status'))
+
+    def is_closed(phase: Dict[str, Any]) -> bool:
+        statuses = by_phase.get(phase['id'])
+        return bool(statuses) and all(status in CLOSED_STATUSES for status in statuses)
+
+    phases = sorted(UK_BUILD_PHASES, key=lambda p: p['order'])
+    last_closed = max((p['order'] for p in phases if is_closed(p)), default=0)
+
+    return [
+        phase for phase in phases
+        if not is_closed(phase) and (phase['id'] in by_phase or phase['order'] > last_closed)
+    ]
+
+
+def _anchor_date(project: Optional[Dict[str, Any]], milestones: List[Dict[str, Any]],
+                 remaining: List[Dict[str, Any]]) -> datetime:
+    """
+    Simulations start from the latest completion, else the project start, else today
+
+    Remaining work cannot start in the past, so with phases left the anchor
+    is never before today (a last completion months ago would otherwise
+    forecast dates that have already gone by).
+    """
+    completed = [parse_date(m.get('actual_date')) for m in milestones if m.get('status') == 'completed']
+    completed = [d for d in completed if d]
+    if completed:
+        anchor = max(completed)
+    else:
+        start = parse_date(project.get('start_date')) if project else None
+        anchor = start or datetime.utcnow()
+
+    return max(anchor, datetime.utcnow()) if remaining else anchor
+
+
+def forecast_completion(project: Optional[Dict[str, Any]], milestones: List[Dict[str, Any]],
+                        simulations: int = DEFAULT_SIMULATIONS,
+                        seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Simulate remaining phase durations and summarise the completion date
+
+    Returns P50/P80/P95 dates, the deterministic (typical) date, the chance of
+    meeting target_completion, and per-phase duration percentiles.
+    """
+    started = time.perf_counter()
+    simulations = int(min(max(simulations, 100), MAX_SIMULATIONS))
+
+    calibration = calibrate(milestones)
+    remaining = _remaining_phases(milestones)
+    anchor = _anchor_date(project, milestones, remaining)
+
+    base_weeks = np.array([p['typical_duration_weeks'] for p in remaining], dtype=float)
+    mu = np.array([calibration['phases'][p['id']]['mu'] for p in remaining])
+    sigma = np.array([calibration['phases'][p['id']]['sigma'] for p in remaining])
+
+    # (simulations x phases) matrix of sampled durations in weeks
+    rng = np.random.default_rng(seed)
+    durations = base_weeks * np.exp(mu + sigma * rng.standard_normal((simulations, len(remaining))))
+    totals_days = durations.sum(axis=1) * 7
+
+    def to_date(days: float) -> str:
+        return (anchor + timedelta(days=float(days))).date().isoformat()
+
+    percentile_days = np.percentile(totals_days, PERCENTILES) if len(remaining) else np.zeros(len(PERCENTILES))
+
+    result = {
+        'anchor_date': anchor.date().isoformat(),
+        'simulations': simulations,
+        'remaining_phases': len(remaining),
+        'deterministic_date': to_date(base_weeks.sum() * 7),
+        'mean_date': to_date(totals_days.mean() if len(remaining) else 0),
+        'percentiles': {
+            f"p{p}": {'date': to_date(days), 'weeks': round(float(days) / 7, 1)}
+            for p, days in zip(PERCENTILES, percentile_days)
+        },
+        'phases': [
+            {
+                'id': phase['id'],
+                'name': phase['name'],
+                'typical_weeks': phase['typical_duration_weeks'],
+                'p50_weeks': round(float(np.percentile(durations[:, i], 50)), 1),
+                'p80_weeks': round(float(np.percentile(durations[:, i], 80)), 1),
+                'calibration': calibration['phases'][phase['id']]['source']
+            }
+            for i, phase in enumerate(remaining)
+        ],
+        'history_samples': calibration['history_samples']
+    }
+
+    target = parse_date(project.get('target_completion')) if project else None
+    if target:
+        target_days = (target - anchor).total_seconds() / 86400
+        result['target_completion'] = target.date().isoformat()
+        result['probability_on_target'] = round(float((totals_days <= target_days).mean()), 3)
+
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
@@ -4,7 +4,9 @@ Manages project milestones, phase completion tracking, and dependencies
 """
 import uuid
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from .forecast import forecast_completion, DEFAULT_SIMULATIONS
 
 
 class MilestonesModule:
@@ -29,6 +31,8 @@ class MilestonesModule:
 
         if action == 'list':
             return self._list_milestones(request.get('filters', {}), data_layer)
+        elif action == 'stream':
+            return self._stream_milestones(request.get('filters', {}), data_layer)
         elif action == 'get':
             return self._get_milestone(request.get('id'), data_layer)
         elif action == 'create':
@@ -45,6 +49,13 @@ class MilestonesModule:
             return self._mark_complete(request.get('id'), data_layer)
         elif action == 'get_timeline':
             return self._get_timeline(request.get('project_id'), data_layer)
+        elif action == 'get_forecast':
+            return self._get_forecast(
+                request.get('project_id'),
+                request.get('simulations', DEFAULT_SIMULATIONS),
+                request.get('seed'),
+                data_layer
+            )
         else:
             return {'success': False, 'error': f'Unknown action: {action}'}
 
@@ -73,6 +84,17 @@ class MilestonesModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _stream_milestones(self, filters: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """Iterate milestones in list order without loading them all"""
+        try:
+            rows = data_layer.iter_query(
+                'milestones', filters,
+                order_by='target_date IS NULL, target_date'  # Earliest first, undated last
+            )
+            return {'success': True, 'data': rows}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def _get_milestone(self, milestone_id: str, data_layer: Any) -> Dict[str, Any]:
         """Get single milestone by ID"""
         try:
@@ -256,8 +278,6 @@ class MilestonesModule:
             milestones.sort(key=lambda x: x.get('target_date', '9999-12-31'))
 
             # Calculate statistics
-            now = datetime.utcnow().isoformat()
-
             status_counts = {
                 'pending': 0,
                 'in-progress': 0,
@@ -274,12 +294,11 @@ class MilestonesModule:
                 if status in status_counts:
                     status_counts[status] += 1
 
-                # Check for delays
-                target_date = milestone.get('target_date')
-                if target_date and status not in ['completed', 'cancelled']:
-                    if target_date < now:
-                        delayed_milestones.append(milestone)
-                    elif len(upcoming_milestones) < 5:  # Next 5 upcoming
+                # Delayed status is maintained by the maintenance scheduler
+                if status == 'delayed':
+                    delayed_milestones.append(milestone)
+                elif status not in ['completed', 'cancelled'] and milestone.get('target_date'):
+                    if len(upcoming_milestones) < 5:  # Next 5 upcoming
                         upcoming_milestones.append(milestone)
 
             return {
@@ -296,6 +315,25 @@ class MilestonesModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _get_forecast(self, project_id: str, simulations: int, seed: Optional[int],
+                      data_layer: Any) -> Dict[str, Any]:
+        """
+        Monte Carlo completion forecast from the remaining build phases
+        Returns P50/P80/P95 completion dates calibrated on milestone history
+        """
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'project_id required'}
+
+            project = data_layer.get('projects', project_id)
+            milestones = data_layer.query('milestones', {'project_id': project_id})
+
+            forecast = forecast_completion(project, milestones, simulations=simulations, seed=seed)
+
+            return {'success': True, 'data': forecast}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def get_info(self) -> Dict[str, Any]:
         """Return module information"""
         return {
@@ -304,6 +342,7 @@ class MilestonesModule:
             'description': 'Milestone tracking with phase linking and dependency management',
             'actions': [
                 'list',
+                'stream',
                 'get',
                 'create',
                 'update',
@@ -311,6 +350,7 @@ class MilestonesModule:
                 'get_by_phase',
                 'get_by_status',
                 'mark_complete',
-                'get_timeline'
+                'get_timeline',
+                'get_forecast'
             ]
         }
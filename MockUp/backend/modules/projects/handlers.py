@@ -6,6 +6,9 @@ Manages project CRUD operations and project-level data
 from uuid import uuid4
 from datetime import datetime
 
+from .templates import CLONE_TABLES, DEFAULT_CLONE_TABLES, create_project
+from .transfer import export_archive, import_archive
+
 
 class ProjectsModule:
     def __init__(self):
@@ -28,13 +31,37 @@ class ProjectsModule:
             return self._delete_project(request.get('id'), data_layer)
         elif action == 'get_stats':
             return self._get_project_stats(request.get('id'), data_layer)
+        elif action == 'clone':
+            return self._clone_project(request.get('id'), request.get('data') or {}, data_layer)
+        elif action == 'from_template':
+            return self._project_from_template(request.get('data') or {}, data_layer)
+        elif action == 'export':
+            return self._export_project(request.get('id'), data_layer)
+        elif action == 'import':
+            return self._import_project(request.get('file'), request.get('name'), data_layer)
+        elif action == 'archive':
+            return self._archive_project(request.get('id'), data_layer)
+        elif action == 'restore':
+            return self._restore_project(request.get('id'), data_layer)
         else:
             return {'success': False, 'error': f"Unknown action: {action}"}
 
+    def _live_project(self, project_id, data_layer):
+        """The project, unless it does not exist or has been deleted"""
+        project = data_layer.get('projects', project_id)
+        return project if project and not project.get('deleted_at') else None
+
     def _list_projects(self, filters, data_layer):
         """List all projects with optional filters"""
         try:
             projects = data_layer.query('projects', filters)
+            projects = [project for project in projects if not project.get('deleted_at')]
+
+            # Archived projects live in the archive database
+            if (filters or {}).get('status') == 'archived':
+                hot = {project['id'] for project in projects}
+                projects += [project for project in data_layer.archive.list_projects(filters)
+                             if project['id'] not in hot]
             return {'success': True, 'data': projects}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -45,7 +72,7 @@ class ProjectsModule:
             if not project_id:
                 return {'success': False, 'error': 'Project ID required'}
 
-            project = data_layer.get('projects', project_id)
+            project = self._live_project(project_id, data_layer)
 
             if not project:
                 return {'success': False, 'error': 'Project not found'}
@@ -88,9 +115,11 @@ class ProjectsModule:
                 return {'success': False, 'error': 'Project ID required'}
 
             # Check project exists
-            existing = data_layer.get('projects', project_id)
+            existing = self._live_project(project_id, data_layer)
             if not existing:
                 return {'success': False, 'error': 'Project not found'}
+            if data_layer.archive.contains(project_id):
+                return {'success': False, 'error': 'Project is archived: restore it first'}
 
             # Update only provided fields
             update_data = {}
@@ -112,7 +141,12 @@ class ProjectsModule:
             return {'success': False, 'error': str(e)}
 
     def _delete_project(self, project_id, data_layer):
-        """Delete project (cascades to all related data)"""
+        """
+        Delete project
+
+        The project is marked deleted and disappears at once; its records
+        are purged in bounded batches by the maintenance module.
+        """
         try:
             if not project_id:
                 return {'success': False, 'error': 'Project ID required'}
@@ -121,12 +155,15 @@ class ProjectsModule:
             if project_id == 'default-project':
                 return {'success': False, 'error': 'Cannot delete default project'}
 
-            success = data_layer.delete('projects', project_id)
-
-            if not success:
+            if not self._live_project(project_id, data_layer):
                 return {'success': False, 'error': 'Project not found'}
+            if data_layer.archive.contains(project_id):
+                return {'success': False, 'error': 'Project is archived: restore it first'}
+
+            deleted_at = datetime.utcnow().isoformat()
+            data_layer.update('projects', project_id, {'deleted_at': deleted_at, 'updated_at': deleted_at})
 
-            return {'success': True, 'data': {'id': project_id}}
+            return {'success': True, 'data': {'id': project_id, 'deleted_at': deleted_at}}
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
@@ -137,7 +174,7 @@ class ProjectsModule:
                 return {'success': False, 'error': 'Project ID required'}
 
             # Get project
-            project = data_layer.get('projects', project_id)
+            project = self._live_project(project_id, data_layer)
             if not project:
                 return {'success': False, 'error': 'Project not found'}
 
@@ -202,3 +239,110 @@ class ProjectsModule:
             return {'success': True, 'data': stats}
         except Exception as e:
             return {'success': False, 'error': str(e)}
+
+    def _clone_project(self, project_id, data, data_layer):
+        """Copy a project and its records under new ids"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'Project ID required'}
+
+            source = self._live_project(project_id, data_layer)
+            if not source:
+                return {'success': False, 'error': 'Project not found'}
+            if data_layer.archive.contains(project_id):
+                return {'success': False, 'error': 'Project is archived: restore it first'}
+
+            tables = data.get('include') or DEFAULT_CLONE_TABLES
+            unknown = set(tables) - set(CLONE_TABLES)
+            if unknown:
+                return {'success': False, 'error': f"Cannot clone: {', '.join(sorted(unknown))}"}
+
+            result = create_project(data_layer, data, source, tables,
+                                    reset_progress=data.get('reset_progress', True), seed=False)
+            return {'success': True, 'data': result}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _project_from_template(self, data, data_layer):
+        """New project from a template project (optional) plus the standard UK phases and categories"""
+        try:
+            source = None
+            if data.get('template_id'):
+                source = self._live_project(data['template_id'], data_layer)
+                if not source:
+                    return {'success': False, 'error': 'Template project not found'}
+                if data_layer.archive.contains(data['template_id']):
+                    return {'success': False, 'error': 'Template project is archived: restore it first'}
+
+            result = create_project(data_layer, data, source, reset_progress=True, seed=True)
+            return {'success': True, 'data': result}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _export_project(self, project_id, data_layer):
+        """Zip archive of the project as a generator of byte chunks"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'Project ID required'}
+
+            project = self._live_project(project_id, data_layer)
+            if not project:
+                return {'success': False, 'error': 'Project not found'}
+
+            return {
+                'success': True,
+                'data': export_archive(data_layer, project),
+                'filename': f"project-{project_id}.zip"
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _import_project(self, source, name, data_layer):
+        """Restore an exported archive as a new project"""
+        try:
+            if not source:
+                return {'success': False, 'error': 'Archive required'}
+
+            return {'success': True, 'data': import_archive(data_layer, source, name)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _archive_project(self, project_id, data_layer):
+        """Move a completed project and all its records into the archive database"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'Project ID required'}
+
+            if project_id == 'default-project':
+                return {'success': False, 'error': 'Cannot archive default project'}
+
+            project = self._live_project(project_id, data_layer)
+            if not project:
+                return {'success': False, 'error': 'Project not found'}
+            if data_layer.archive.contains(project_id):
+                return {'success': False, 'error': 'Project is already archived'}
+            if project.get('status') not in ('completed', 'archived'):
+                return {'success': False, 'error': 'Only completed projects can be archived'}
+
+            data_layer.update('projects', project_id, {'status': 'archived'})
+            counts = data_layer.archive.archive(project_id)
+
+            return {'success': True, 'data': {'id': project_id, 'counts': counts}}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _restore_project(self, project_id, data_layer):
+        """Move an archived project back into the working database"""
+        try:
+            if not project_id:
+                return {'success': False, 'error': 'Project ID required'}
+
+            if project_id not in data_layer.archive.project_ids():
+                return {'success': False, 'error': 'Archived project not found'}
+
+            counts = data_layer.archive.restore(project_id)
+            data_layer.update('projects', project_id, {'status': 'completed'})
+
+            return {'success': True, 'data': {'project': data_layer.get('projects', project_id), 'counts': counts}}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
@@ -0,0 +1,232 @@
+"""
+Project Templates
+Clone a project, or start one from a template project and the UK standards
+
+A clone is a handful of INSERT ... SELECT statements in one transaction. New
+ids are generated in SQL into a temporary old -> new map, and every column
+that holds an id (blocked_by, dependencies, linked_task_id, supplier_id) is
+rewritten through that map with json_each, so no row is copied through
+Python. References to records outside the source project are dropped.
+
+New projects are then completed with a milestone for every UK build phase
+and a budget line for every UK budget category they do not already have.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from data.dates import parse_date
+from uk_constants import UK_BUDGET_CATEGORIES, UK_BUILD_PHASES
+
+
+# Copy order: referenced tables before the tables that reference them
+CLONE_TABLES = ('contacts', 'tasks', 'milestones', 'budget_items', 'materials', 'documents')
+
+# Documents point at files on disk, so they are only copied when asked for
+DEFAULT_CLONE_TABLES = ('contacts', 'tasks', 'milestones', 'budget_items', 'materials')
+
+ID_MAP_TABLE = 'temp._clone_ids'
+
+# Random v4 UUID, in SQL
+NEW_UUID_SQL = (
+    "lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || lower(hex(randomblob(6)))"
+)
+
+ID_REFERENCES = {
+    'documents': ('linked_task_id',),
+    'materials': ('supplier_id',)
+}
+ID_LIST_REFERENCES = {
+    'tasks': ('blocked_by',),
+    'milestones': ('dependencies',)
+}
+
+# Column -> SQL value for a fresh start (reset_progress)
+PROGRESS_RESETS = {
+    'tasks': {'status': "'todo'", 'completion_percentage': '0', 'comments': "'[]'"},
+    'milestones': {'status': "'pending'", 'actual_date': 'NULL'},
+    'budget_items': {'status': "'estimated'", 'actual_cost': '0', 'quote_date': 'NULL'},
+    'materials': {'delivery_status': "'not-ordered'"}
+}
+
+# Date columns moved with the project's start date
+DATE_COLUMNS = {
+    'tasks': ('due_date', 'start_date'),
+    'milestones': ('target_date',),
+    'materials': ('delivery_date',)
+}
+
+
+def _column_values(table: str, columns: List[str], reset_progress: bool, shift_days: int) -> Dict[str, str]:
+    """SQL expression per column for copying rows of src into the new project"""
+    values = {column: f"src.{column}" for column in columns}
+    values['id'] = 'ids.new_id'
+    values['project_id'] = ':project_id'
+    values['created_at'] = values['updated_at'] = ':now'
+
+    if shift_days:
+        for column in DATE_COLUMNS.get(table, ()):
+            values[column] = f"date(src.{column}, :shift)"
+
+    for column in ID_REFERENCES.get(table, ()):
+        values[column] = f"(SELECT m.new_id FROM {ID_MAP_TABLE} m WHERE m.old_id = src.{column})"
+
+    for column in ID_LIST_REFERENCES.get(table, ()):
+        values[column] = (
+            f"(SELECT json_group_array(m.new_id) FROM json_each(COALESCE(src.{column}, '[]')) j "
+            f"JOIN {ID_MAP_TABLE} m ON m.old_id = j.value)"
+        )
+
+    if reset_progress:
+        values.update(PROGRESS_RESETS.get(table, {}))
+    return {column: sql for column, sql in values.items() if column in columns}
+
+
+def copy_records(data_layer, source_id: str, project_id: str, tables: Iterable[str],
+                 reset_progress: bool = True, shift_days: int = 0) -> Dict[str, int]:
+    """INSERT ... SELECT the source project's records into project_id, in one transaction"""
+    tables = [t for t in CLONE_TABLES if t in tables]
+    params = {
+        'source_id': source_id,
+        'project_id': project_id,
+        'now': datetime.utcnow().isoformat(),
+        'shift': f"{shift_days:+d} days"
+    }
+
+    with data_layer.transaction() as cursor:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS _clone_ids (old_id TEXT PRIMARY KEY, new_id TEXT NOT NULL)")
+        cursor.execute(f"DELETE FROM {ID_MAP_TABLE}")
+        for table in tables:
+            cursor.execute(
+                f"INSERT INTO {ID_MAP_TABLE} (old_id, new_id) "
+                f"SELECT id, {NEW_UUID_SQL} FROM {table} WHERE project_id = :source_id",
+                params
+            )
+
+        counts = {}
+        for table in tables:
+            values = _column_values(table, data_layer.columns(table), reset_progress, shift_days)
+            counts[table] = len(data_layer.insert_select(
+                table, list(values),
+                f"SELECT {', '.join(values.values())} FROM {table} src "
+                f"JOIN {ID_MAP_TABLE} ids ON ids.old_id = src.id "
+                f"WHERE src.project_id = :source_id ORDER BY src.rowid",
+                params
+            ))
+
+        cursor.execute(f"DELETE FROM {ID_MAP_TABLE}")
+    return counts
+
+
+def _phase_rows(project_id: str, start: Optional[date], existing: Dict[str, str], now: str) -> List[Dict[str, Any]]:
+    """Milestones for UK phases the project lacks, each depending on the previous phase"""
+    rows = []
+    previous = None
+    weeks = 0
+    for phase in sorted(UK_BUILD_PHASES, key=lambda p: p['order']):
+        weeks += phase.get('typical_duration_weeks', 0)
+        milestone_id = existing.get(phase['id'])
+        if milestone_id is None:
+            milestone_id = str(uuid4())
+            rows.append({
+                'id': milestone_id,
+                'project_id': project_id,
+                'name': f"{phase['name']} complete",
+                'phase': phase['id'],
+                'target_date': (start + timedelta(weeks=weeks)).isoformat() if start else None,
+                'status': 'pending',
+                'dependencies': [previous] if previous else [],
+                'notes': phase.get('description', ''),
+                'created_at': now,
+                'updated_at': now
+            })
+        previous = milestone_id
+    return rows
+
+
+def _category_rows(project_id: str, existing: set, now: str) -> List[Dict[str, Any]]:
+    """Zero-estimate budget lines for UK categories the project lacks"""
+    return [{
+        'id': str(uuid4()),
+        'project_id': project_id,
+        'category': category['id'],
+        'item_name': category['name'],
+        'estimated_cost': 0,
+        'actual_cost': 0,
+        'status': 'estimated',
+        'notes': category.get('description', ''),
+        'created_at': now,
+        'updated_at': now
+    } for category in UK_BUDGET_CATEGORIES if category['id'] not in existing]
+
+
+def seed_standards(data_layer, project_id: str, start_date: Optional[str]) -> Dict[str, int]:
+    """Add missing UK phase milestones and budget categories"""
+    now = datetime.utcnow().isoformat()
+    start = parse_date(start_date)
+
+    phases = {}
+    for row in data_layer.fetchall(
+        "SELECT phase, id FROM milestones WHERE project_id = ? AND phase IS NOT NULL ORDER BY target_date",
+        (project_id,)
+    ):
+        phases.setdefault(row['phase'], row['id'])
+    categories = {
+        row['category'] for row in
+        data_layer.fetchall("SELECT DISTINCT category FROM budget_items WHERE project_id = ?", (project_id,))
+    }
+
+    milestones = _phase_rows(project_id, start.date() if start else None, phases, now)
+    items = _category_rows(project_id, categories, now)
+    data_layer.insert_many('milestones', milestones)
+    data_layer.insert_many('budget_items', items)
+    return {'milestones': len(milestones), 'budget_items': len(items)}
+
+
+def _shift_days(source: Dict[str, Any], start_date: Optional[str]) -> int:
+    """Days between the source's start and the new start (0 when either is unknown)"""
+    old, new = parse_date(source.get('start_date')), parse_date(start_date)
+    return (new.date() - old.date()).days if old and new else 0
+
+
+def create_project(data_layer, data: Dict[str, Any], source: Optional[Dict[str, Any]] = None,
+                   tables: Iterable[str] = DEFAULT_CLONE_TABLES, reset_progress: bool = True,
+                   seed: bool = True) -> Dict[str, Any]:
+    """
+    New project from data, optionally copying source's records and seeding UK standards
+
+    Fields missing from data are taken from source. Copied dates move by
+    the difference between the two start dates. Everything is one transaction.
+    """
+    source = source or {}
+    now = datetime.utcnow().isoformat()
+    project = {
+        'id': str(uuid4()),
+        'name': data.get('name') or (f"{source['name']} (copy)" if source.get('name') else None),
+        'location': data.get('location', source.get('location', '')),
+        'project_type': data.get('project_type') or source.get('project_type', 'self-build'),
+        'start_date': data.get('start_date', source.get('start_date')),
+        'target_completion': data.get('target_completion', source.get('target_completion')),
+        'status': 'planning',
+        'budget_total': data.get('budget_total', source.get('budget_total', 0)),
+        'description': data.get('description', source.get('description', '')),
+        'created_at': now,
+        'updated_at': now
+    }
+    if not project['name']:
+        raise ValueError('Project name required')
+
+    counts = {}
+    with data_layer.transaction():
+        data_layer.insert('projects', project)
+        if source:
+            counts.update(copy_records(data_layer, source['id'], project['id'], tables,
+                                       reset_progress, _shift_days(source, project['start_date'])))
+        if seed:
+            for table, added in seed_standards(data_layer, project['id'], project['start_date']).items():
+                counts[f"seeded_{table}"] = added
+
+    return {'project': data_layer.get('projects', project['id']), 'counts': counts}
@@ -0,0 +1,331 @@
+"""
+Project Transfer
+Streaming zip export of a whole project and id-remapping import
+
+The export is a generator: rows are read through one snapshot connection,
+written as NDJSON entries into a zip that targets a write-only buffer, and
+the buffer is drained after every chunk. Neither the project nor the archive
+is ever held in memory. Document files (the stored blob, else the file at
+file_path) are included under files/<doc id>/. Earlier document versions
+go in document_versions.ndjson, with any content no current document has
+under blobs/<hash>.
+
+The import gives every record a new id (so an archive can be restored next
+to its source project), rewrites the references between records, and
+inserts everything in one transaction. Blob files stored by an import that
+fails are removed again.
+"""
+
+import io
+import json
+import os
+import shutil
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from uuid import uuid4
+
+from modules.documents.blobs import BlobStore
+
+
+ARCHIVE_FORMAT = 'aven-project'
+ARCHIVE_VERSION = 1
+
+# Restore order: referenced tables before the tables that reference them
+PROJECT_TABLES = ('contacts', 'tasks', 'milestones', 'budget_items', 'documents', 'materials')
+
+# Reference columns: single id, or JSON list of ids (tasks and milestones share the dependency graph)
+ID_REFERENCES = {
+    'documents': ('linked_task_id',),
+    'materials': ('supplier_id',)
+}
+ID_LIST_REFERENCES = {
+    'tasks': ('blocked_by',),
+    'milestones': ('dependencies',)
+}
+
+# Earlier versions of the documents (the current version is the documents row)
+VERSIONS_ENTRY = 'document_versions.ndjson'
+BLOBS_PREFIX = 'blobs/'
+
+CHUNK_SIZE = 64 * 1024
+FILE_CHUNK_SIZE = 1024 * 1024
+INSERT_BATCH_SIZE = 500
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that zipfile writes into and the generator drains"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def pending(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _json_line(row: Dict[str, Any]) -> bytes:
+    return (json.dumps(row, default=str) + '\n').encode('utf-8')
+
+
+def _earlier_versions(data_layer, conn, project_id: str) -> Iterator[Dict[str, Any]]:
+    """Version rows of the project's documents other than the current ones"""
+    archived = data_layer.archive.contains(project_id)
+    reader = data_layer.archive.connect() if archived else conn
+    try:
+        cursor = reader.execute(
+            "SELECT v.* FROM document_versions v JOIN documents d ON d.id = v.document_id "
+            "WHERE d.project_id = ? AND v.version <> d.version ORDER BY v.document_id, v.version",
+            (project_id,)
+        )
+        for row in cursor:
+            yield dict(row)
+    finally:
+        if archived:
+            reader.close()
+
+
+def _write_file(archive: zipfile.ZipFile, buffer: _StreamBuffer, path: str, name: str) -> Iterator[bytes]:
+    """Copy a file into the zip, yielding drained chunks as it goes"""
+    with open(path, 'rb') as source, archive.open(name, 'w', force_zip64=True) as entry:
+        while True:
+            data = source.read(FILE_CHUNK_SIZE)
+            if not data:
+                break
+            entry.write(data)
+            if buffer.pending() >= CHUNK_SIZE:
+                yield buffer.drain()
+    yield buffer.drain()
+
+
+def export_archive(data_layer, project: Dict[str, Any]) -> Iterator[bytes]:
+    """Yield a zip archive of the project in chunks of roughly CHUNK_SIZE"""
+    project_id = project['id']
+    buffer = _StreamBuffer()
+    blobs = BlobStore(data_layer)
+    counts = {}
+    files = 0
+
+    with data_layer.snapshot() as conn, zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('project.json', json.dumps(project, default=str))
+
+        for table in PROJECT_TABLES:
+            counts[table] = 0
+            with archive.open(f'{table}.ndjson', 'w', force_zip64=True) as entry:
+                for row in data_layer.iter_query(table, {'project_id': project_id}, conn=conn):
+                    entry.write(_json_line(row))
+                    counts[table] += 1
+                    if buffer.pending() >= CHUNK_SIZE:
+                        yield buffer.drain()
+            yield buffer.drain()
+
+        current_blobs = set()
+        for document in data_layer.iter_query('documents', {'project_id': project_id}, conn=conn):
+            path = document.get('file_path')
+            if blobs.exists(document.get('blob_hash')):
+                path = blobs.path(document['blob_hash'])
+                current_blobs.add(document['blob_hash'])
+            elif not path or not os.path.isfile(path):
+                continue
+            filename = os.path.basename(document.get('filename') or '') or os.path.basename(document['file_path'])
+            yield from _write_file(archive, buffer, path, f"files/{document['id']}/{filename}")
+            files += 1
+
+        counts['document_versions'] = 0
+        version_blobs = set()
+        with archive.open(VERSIONS_ENTRY, 'w', force_zip64=True) as entry:
+            for row in _earlier_versions(data_layer, conn, project_id):
+                entry.write(_json_line(row))
+                counts['document_versions'] += 1
+                if row['blob_hash'] not in current_blobs and blobs.exists(row['blob_hash']):
+                    version_blobs.add(row['blob_hash'])
+                if buffer.pending() >= CHUNK_SIZE:
+                    yield buffer.drain()
+        yield buffer.drain()
+
+        for blob_hash in sorted(version_blobs):
+            yield from _write_file(archive, buffer, blobs.path(blob_hash), f"{BLOBS_PREFIX}{blob_hash}")
+            files += 1
+
+        archive.writestr('manifest.json', json.dumps({
+            'format': ARCHIVE_FORMAT,
+            'version': ARCHIVE_VERSION,
+            'project_id': project_id,
+            'exported_at': datetime.utcnow().isoformat(),
+            'counts': counts,
+            'files': files
+        }))
+
+    yield buffer.drain()
+
+
+def _read_ndjson(archive: zipfile.ZipFile, name: str) -> Iterator[Dict[str, Any]]:
+    """Rows of an NDJSON entry, streamed"""
+    if name not in archive.namelist():
+        return
+    with archive.open(name) as entry:
+        for line in io.TextIOWrapper(entry, encoding='utf-8'):
+            if line.strip():
+                yield json.loads(line)
+
+
+def _remap(table: str, row: Dict[str, Any], id_map: Dict[str, str], project_id: str) -> Dict[str, Any]:
+    """Point a row at the new project and the new ids of the records it references"""
+    row['project_id'] = project_id
+    row['id'] = id_map[row['id']]
+
+    for column in ID_REFERENCES.get(table, ()):
+        if row.get(column):
+            row[column] = id_map.get(row[column])  # Outside the archive: drop the link
+
+    for column in ID_LIST_REFERENCES.get(table, ()):
+        if row.get(column):
+            row[column] = [id_map[ref] for ref in row[column] if ref in id_map]
+    return row
+
+
+def documents_dir(data_layer) -> str:
+    """Where restored document files are stored"""
+    return os.path.join(data_layer.data_dir, 'documents')
+
+
+def import_archive(data_layer, source, name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Restore an exported project as a new project and return it
+
+    source is a path or a seekable binary file. Rows are streamed from the
+    archive twice: once to collect ids, once to insert. Columns the current
+    schema lacks are dropped so older or newer archives still restore.
+    """
+    with zipfile.ZipFile(source) as archive:
+        try:
+            manifest = json.loads(archive.read('manifest.json'))
+            project = json.loads(archive.read('project.json'))
+        except KeyError:
+            raise ValueError('Not a project export: manifest.json or project.json missing')
+        if manifest.get('format') != ARCHIVE_FORMAT:
+            raise ValueError('Not a project export')
+        if manifest.get('version', 0) > ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported export version: {manifest.get('version')}")
+
+        id_map = {}
+        for table in PROJECT_TABLES:
+            for row in _read_ndjson(archive, f'{table}.ndjson'):
+                if row.get('id'):
+                    id_map[row['id']] = str(uuid4())
+
+        project_id = str(uuid4())
+        now = datetime.utcnow().isoformat()
+        columns = {table: set(data_layer.columns(table))
+                   for table in ('projects', 'document_versions') + PROJECT_TABLES}
+
+        project_row = {k: v for k, v in project.items() if k in columns['projects']}
+        project_row.update({'id': project_id, 'created_at': now, 'updated_at': now})
+        if name:
+            project_row['name'] = name
+
+        blobs = BlobStore(data_layer)
+        target_dir = os.path.join(documents_dir(data_layer), project_id)
+        file_entries = {}
+        for entry in archive.namelist():
+            parts = entry.split('/')
+            if len(parts) == 3 and parts[0] == 'files' and parts[1] in id_map and parts[2]:
+                file_entries[parts[1]] = entry
+
+        counts = {}
+        # archived blob hash -> hash stored here (the same, unless the file was damaged)
+        stored = {}
+        try:
+            with data_layer.transaction():
+                data_layer.insert('projects', project_row)
+
+                for table in PROJECT_TABLES:
+                    counts[table] = 0
+                    batch = []
+                    for row in _read_ndjson(archive, f'{table}.ndjson'):
+                        old_id = row.get('id')
+                        row = _remap(table, {k: v for k, v in row.items() if k in columns[table]},
+                                     id_map, project_id)
+                        if table == 'documents' and row.get('blob_hash'):
+                            # Content goes back into the blob store (deduplicated against this database)
+                            archived_hash, row['blob_hash'] = row['blob_hash'], None
+                            if old_id in file_entries:
+                                with archive.open(file_entries[old_id]) as source:
+                                    row['blob_hash'] = stored[archived_hash] = blobs.store_file(source)['hash']
+                        elif table == 'documents' and old_id in file_entries:
+                            row['file_path'] = _extract(archive, file_entries[old_id],
+                                                        os.path.join(target_dir, row['id']))
+                        batch.append(row)
+                        if len(batch) >= INSERT_BATCH_SIZE:
+                            counts[table] += len(data_layer.insert_many(table, batch))
+                            batch = []
+                    if batch:
+                        counts[table] += len(data_layer.insert_many(table, batch))
+
+                counts['document_versions'] = _import_versions(archive, data_layer, blobs, id_map,
+                                                               columns['document_versions'], stored)
+        except Exception:
+            shutil.rmtree(target_dir, ignore_errors=True)
+            blobs.remove_orphans(stored.values())
+            raise
+
+    return {
+        'project': data_layer.get('projects', project_id),
+        'source_project_id': manifest.get('project_id'),
+        'counts': counts,
+        'files': len(file_entries)
+    }
+
+
+def _import_versions(archive: zipfile.ZipFile, data_layer, blobs: BlobStore, id_map: Dict[str, str],
+                     columns, stored: Dict[str, str]) -> int:
+    """Insert the earlier document versions (the current ones came with their documents)"""
+    blob_entries = {entry[len(BLOBS_PREFIX):] for entry in archive.namelist() if entry.startswith(BLOBS_PREFIX)}
+    count = 0
+    batch = []
+    for row in _read_ndjson(archive, VERSIONS_ENTRY):
+        if row.get('document_id') not in id_map:
+            continue
+        row = {k: v for k, v in row.items() if k in columns}
+        row['document_id'] = id_map[row['document_id']]
+        row['id'] = f"{row['document_id']}:{row['version']}"
+
+        archived_hash, row['blob_hash'] = row.get('blob_hash'), None
+        if archived_hash in stored:
+            row['blob_hash'] = stored[archived_hash]
+        elif archived_hash in blob_entries:
+            with archive.open(f"{BLOBS_PREFIX}{archived_hash}") as source:
+                row['blob_hash'] = stored[archived_hash] = blobs.store_file(source)['hash']
+
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            count += len(data_layer.insert_many('document_versions', batch))
+            batch = []
+    if batch:
+        count += len(data_layer.insert_many('document_versions', batch))
+    return count
+
+
+def _extract(archive: zipfile.ZipFile, entry: str, directory: str) -> str:
+    """Copy one archived file to directory and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, os.path.basename(entry))
+    with archive.open(entry) as source, open(path, 'wb') as target:
+        shutil.copyfileobj(source, target, FILE_CHUNK_SIZE)
+    return path
@@ -0,0 +1,4 @@
+"""Replication Module"""
+from .handlers import ReplicationModule
+
+__all__ = ['ReplicationModule']
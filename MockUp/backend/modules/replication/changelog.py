@@ -0,0 +1,166 @@
+"""
+Change Log
+Trigger-maintained log of committed row changes, the unit of replication
+
+Every replicated table gets AFTER INSERT/UPDATE/DELETE triggers that append
+the row's primary key and (for inserts and updates) all of its columns as
+JSON to _changelog. The log row is part of the writing transaction, so it
+exists exactly when the write commits, and seq follows commit order because
+SQLite has a single writer. Triggers are regenerated at startup so they
+always match the current columns.
+
+Moving a project into or out of the archive is logged as one MOVE_TABLE
+entry in place of its row changes (mark() and log_move(), called by
+ProjectArchive), so the standby repeats the move instead of deleting rows.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from data.archive import MOVE_TABLE
+
+
+CHANGELOG_TABLE = '_changelog'
+STATE_TABLE = '_replication_state'
+TRIGGER_PREFIX = '_changelog_'
+
+
+def replicated_tables(data_layer) -> Dict[str, Tuple[List[str], List[str]]]:
+    """table -> (columns, primary key columns) for every table that is replicated"""
+    rows = data_layer.fetchall(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    )
+    virtual = [row['name'] for row in rows if (row['sql'] or '').upper().startswith('CREATE VIRTUAL')]
+
+    tables = {}
+    for row in rows:
+        name = row['name']
+        # Internal tables, virtual tables and their shadow tables are derived locally
+        if name.startswith('_') or name in virtual or any(name.startswith(f"{v}_") for v in virtual):
+            continue
+
+        info = data_layer.fetchall(f"PRAGMA table_info({name})")
+        key = [c['name'] for c in sorted(info, key=lambda c: c['pk']) if c['pk']]
+        if key:
+            tables[name] = ([c['name'] for c in info], key)
+    return tables
+
+
+def _json_object(alias: str, columns: List[str]) -> str:
+    return "json_object(" + ', '.join(f"'{c}', {alias}.{c}" for c in columns) + ")"
+
+
+def _log_statement(table: str, operation: str, alias: str, columns: List[str], key: List[str],
+                   where: str = '') -> str:
+    data = _json_object(alias, columns) if operation == 'upsert' else 'NULL'
+    return (
+        f"INSERT INTO {CHANGELOG_TABLE} (table_name, operation, row_key, row_data, committed_at) "
+        f"SELECT '{table}', '{operation}', {_json_object(alias, key)}, {data}, "
+        f"strftime('%Y-%m-%dT%H:%M:%f', 'now')" + (f" WHERE {where}" if where else '') + ";"
+    )
+
+
+def install(data_layer):
+    """Create the log and state tables and (re)create the triggers"""
+    tables = replicated_tables(data_layer)
+    existing = data_layer.fetchall(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?", (f"{TRIGGER_PREFIX}%",)
+    )
+
+    with data_layer.transaction() as cursor:
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {CHANGELOG_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            operation TEXT NOT NULL CHECK(operation IN ('upsert', 'delete')),
+            row_key TEXT NOT NULL,
+            row_data TEXT,
+            committed_at TEXT NOT NULL
+        )
+        ''')
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        ''')
+
+        for trigger in existing:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger['name']}")
+
+        for table, (columns, key) in tables.items():
+            changed_key = ' OR '.join(f"OLD.{k} IS NOT NEW.{k}" for k in key)
+            cursor.execute(
+                f"CREATE TRIGGER {TRIGGER_PREFIX}{table}_insert AFTER INSERT ON {table} BEGIN "
+                f"{_log_statement(table, 'upsert', 'NEW', columns, key)} END"
+            )
+            # A changed primary key is a delete of the old row plus an upsert of the new one
+            cursor.execute(
+                f"CREATE TRIGGER {TRIGGER_PREFIX}{table}_update AFTER UPDATE ON {table} BEGIN "
+                f"{_log_statement(table, 'delete', 'OLD', columns, key, where=changed_key)} "
+                f"{_log_statement(table, 'upsert', 'NEW', columns, key)} END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER {TRIGGER_PREFIX}{table}_delete AFTER DELETE ON {table} BEGIN "
+                f"{_log_statement(table, 'delete', 'OLD', columns, key)} END"
+            )
+
+
+def uninstall(data_layer):
+    """Drop the triggers and logged rows when nothing ships them (replication off, or promoted)"""
+    triggers = data_layer.fetchall(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?", (f"{TRIGGER_PREFIX}%",)
+    )
+    has_log = data_layer.fetchone(
+        "SELECT 1 AS found FROM sqlite_master WHERE type = 'table' AND name = ?", (CHANGELOG_TABLE,)
+    )
+    if not triggers and not has_log:
+        return
+
+    with data_layer.transaction() as cursor:
+        for trigger in triggers:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger['name']}")
+        if has_log:
+            cursor.execute(f"DELETE FROM {CHANGELOG_TABLE}")
+
+
+def mark(cursor) -> int:
+    """Highest seq assigned so far: rows after it belong to the open transaction"""
+    return last_seq(cursor)
+
+
+def log_move(cursor, since: Optional[int], move: Dict[str, Any]):
+    """Replace the row changes logged since mark() with one archive move"""
+    if since is None:
+        return
+    cursor.execute(f"DELETE FROM {CHANGELOG_TABLE} WHERE seq > ?", (since,))
+    # The move takes the next seq, so the standby sees no gap
+    cursor.execute(
+        f"INSERT INTO {CHANGELOG_TABLE} (seq, table_name, operation, row_key, row_data, committed_at) "
+        f"VALUES (?, ?, 'upsert', ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now'))",
+        (since + 1, MOVE_TABLE, json.dumps({'id': move['project_id']}), json.dumps(move))
+    )
+    cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (since + 1, CHANGELOG_TABLE))
+
+
+def read_changes(conn, after_seq: int, limit: int) -> List[Dict[str, Any]]:
+    """Logged changes after a sequence number, oldest first"""
+    rows = conn.execute(
+        f"SELECT seq, table_name, operation, row_key, row_data, committed_at FROM {CHANGELOG_TABLE} "
+        f"WHERE seq > ? ORDER BY seq LIMIT ?",
+        (after_seq, limit)
+    ).fetchall()
+    return [{
+        'seq': row['seq'],
+        'table': row['table_name'],
+        'operation': row['operation'],
+        'key': json.loads(row['row_key']),
+        'data': json.loads(row['row_data']) if row['row_data'] else None,
+        'committed_at': row['committed_at']
+    } for row in rows]
+
+
+def last_seq(conn) -> int:
+    """Highest sequence number ever assigned (survives deleting shipped rows)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGELOG_TABLE,)).fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,119 @@
+"""
+Replication Module Handler
+Ships committed changes to a standby directory, or follows one as a standby
+"""
+from typing import Any, Callable, Dict, Optional
+
+from . import changelog
+from .shipper import Shipper
+from .standby import StandbyApplier
+
+ROLES = ('primary', 'standby')
+
+
+class ReplicationModule:
+    """Handler for replication status and standby promotion"""
+
+    def __init__(self, role: str, standby_dir: str, on_promote: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            role: 'primary' ships to standby_dir, 'standby' applies from it
+            standby_dir: Directory shared between the two (second disk, synced folder)
+            on_promote: Called once a standby has become writable
+        """
+        if role not in ROLES:
+            raise ValueError(f"role must be one of {', '.join(ROLES)}")
+
+        self.name = "replication"
+        self.version = "1.0.0"
+        self.role = role
+        self.standby_dir = standby_dir
+        self.on_promote = on_promote
+        self.data_layer = None
+        self.shipper = None
+        self.applier = None
+
+    def attach(self, data_layer: Any):
+        """Start shipping (primary) or applying (standby)"""
+        self.data_layer = data_layer
+        if self.role == 'primary':
+            self.shipper = Shipper(data_layer, self.standby_dir)
+            self.shipper.start()
+        else:
+            self.applier = StandbyApplier(data_layer, self.standby_dir)
+            self.applier.start()
+
+    def detach(self):
+        """Stop background work"""
+        if self.shipper:
+            self.shipper.stop()
+            self.shipper = None
+        if self.applier:
+            self.applier.stop()
+            self.applier = None
+
+    def handle(self, request: Dict[str, Any], data_layer: Any) -> Dict[str, Any]:
+        """
+        Route replication requests to appropriate handlers
+
+        Args:
+            request: Dictionary containing action and parameters
+            data_layer: Database abstraction layer
+
+        Returns:
+            Dictionary with success status and data/error
+        """
+        action = request.get('action')
+
+        if action == 'status':
+            return self._get_status()
+        elif action == 'promote':
+            return self._promote()
+        else:
+            return {'success': False, 'error': f'Unknown action: {action}'}
+
+    def _get_status(self) -> Dict[str, Any]:
+        """Role plus shipping or apply position and lag"""
+        try:
+            status = {'role': self.role, 'read_only': self.data_layer.read_only}
+            if self.shipper:
+                status['primary'] = self.shipper.get_status()
+            if self.applier:
+                status['standby'] = self.applier.get_status()
+            return {'success': True, 'data': status}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _promote(self) -> Dict[str, Any]:
+        """Apply what has been shipped, then make this database the writable primary"""
+        try:
+            if self.role != 'standby' or not self.applier:
+                return {'success': False, 'error': 'Only a standby can be promoted'}
+
+            applied = self.applier.promote()
+            status = self.applier.get_status()
+            self.applier = None
+
+            # The old primary may still ship into standby_dir; a promoted node no longer reads it,
+            # and ships nothing until it is restarted with a standby directory of its own
+            self.role = 'primary'
+            self.data_layer.read_only = False
+            changelog.uninstall(self.data_layer)
+            if self.on_promote:
+                self.on_promote()
+
+            return {'success': True, 'data': {'role': self.role, 'applied_on_promote': applied, 'standby': status}}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_info(self) -> Dict[str, Any]:
+        """Return module information"""
+        return {
+            'name': self.name,
+            'version': self.version,
+            'description': 'Change log shipping to a standby directory, standby apply and promotion',
+            'actions': [
+                'status',
+                'promote'
+            ]
+        }
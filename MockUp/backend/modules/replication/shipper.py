@@ -0,0 +1,240 @@
+"""
+Change Log Shipper
+Primary side of replication: copies committed changes into a standby directory
+
+Layout of the standby directory (a second disk or a synced folder):
+    base.db          backup-API snapshot the standby starts from
+    base-archive.db  the archive (data/archive.py) as of that snapshot, if any
+    base.json        {'base_seq'}: last change included in base.db
+    wal/<first>-<last>.ndjson
+                     shipped change batches, one change per line
+    primary.json     heartbeat: last shipped seq and commit time
+
+Every file is written under a temporary name, fsynced and renamed, so a
+reader (or a folder sync tool) never sees a partial file. Shipped rows are
+then removed from _changelog. Writes wake the shipper, so lag is normally
+one transaction plus the file write.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from modules.maintenance.backup import PAGES_PER_STEP, STEP_SLEEP_SECONDS
+from . import changelog
+
+
+SHIP_INTERVAL_SECONDS = 1.0
+BATCH_SIZE = 1000
+
+BASE_NAME = 'base.db'
+BASE_ARCHIVE_NAME = 'base-archive.db'
+BASE_STATE_NAME = 'base.json'
+PRIMARY_STATE_NAME = 'primary.json'
+WAL_DIR = 'wal'
+BATCH_SUFFIX = '.ndjson'
+
+
+def write_atomic(path: str, data: bytes):
+    """Write, fsync and rename into place"""
+    partial = path + '.partial'
+    with open(partial, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+def read_json(path: str) -> Optional[Dict[str, Any]]:
+    """JSON file contents, or None when missing"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def batch_range(name: str) -> Optional[tuple]:
+    """(first, last) seq of a batch file name"""
+    if not name.endswith(BATCH_SUFFIX):
+        return None
+    first, _, last = name[:-len(BATCH_SUFFIX)].partition('-')
+    return (int(first), int(last)) if first.isdigit() and last.isdigit() else None
+
+
+class Shipper:
+    """Ships change log batches from the primary to the standby directory"""
+
+    def __init__(self, data_layer, standby_dir: str,
+                 interval_seconds: float = SHIP_INTERVAL_SECONDS, batch_size: int = BATCH_SIZE):
+        self.data_layer = data_layer
+        self.standby_dir = standby_dir
+        self.wal_dir = os.path.join(standby_dir, WAL_DIR)
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ship_lock = threading.Lock()
+
+        self.shipped_seq = 0
+        self.last_commit_at: Optional[str] = None
+        self.last_shipped_at: Optional[str] = None
+        self.batches_shipped = 0
+        self.last_error: Optional[str] = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Install triggers, resume from the last shipped seq and start shipping"""
+        os.makedirs(self.wal_dir, exist_ok=True)
+        changelog.install(self.data_layer)
+
+        state = read_json(os.path.join(self.standby_dir, PRIMARY_STATE_NAME)) or {}
+        base = read_json(os.path.join(self.standby_dir, BASE_STATE_NAME)) or {}
+        self.shipped_seq = state.get('last_seq', base.get('base_seq', 0))
+        self.last_commit_at = state.get('last_commit_at')
+
+        self.data_layer.add_listener(self._on_write)
+        # Archive moves are logged as moves, not as row deletes and inserts
+        self.data_layer.archive.journal = changelog
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='replication-shipper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ship what is committed, then stop"""
+        self.data_layer.remove_listener(self._on_write)
+        self.data_layer.archive.journal = None
+        self._stopped.set()
+        self._wake.set()
+
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _on_write(self, table: str, operation: str, record_id: str):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.ship_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️  Replication shipping failed: {e}")
+
+            if self._stopped.is_set():
+                return
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+
+    # ==================== SHIPPING ====================
+
+    def ship_once(self) -> int:
+        """Ship every committed change not yet shipped; returns the number shipped"""
+        with self._ship_lock:
+            if not os.path.exists(os.path.join(self.standby_dir, BASE_NAME)):
+                self._write_base()
+
+            shipped = 0
+            while True:
+                with self.data_layer.snapshot() as conn:
+                    changes = changelog.read_changes(conn, self.shipped_seq, self.batch_size)
+                if not changes:
+                    break
+
+                self._write_batch(changes)
+                shipped += len(changes)
+                self.shipped_seq = changes[-1]['seq']
+                self.last_commit_at = changes[-1]['committed_at']
+                self.last_shipped_at = datetime.utcnow().isoformat()
+                self.data_layer.execute(
+                    f"DELETE FROM {changelog.CHANGELOG_TABLE} WHERE seq <= ?", (self.shipped_seq,)
+                )
+                if len(changes) < self.batch_size:
+                    break
+
+            self._write_state()
+            return shipped
+
+    def _write_base(self):
+        """Snapshot the database for a new standby and restart shipping from it"""
+        path = os.path.join(self.standby_dir, BASE_NAME)
+        partial = path + '.partial'
+        archive_path = os.path.join(self.standby_dir, BASE_ARCHIVE_NAME)
+        archive_partial = archive_path + '.partial'
+
+        target = sqlite3.connect(partial)
+        try:
+            with ExitStack() as stack:
+                # The snapshot is pinned, and the archive copied, with no move in between
+                with self.data_layer.archive.frozen():
+                    source = stack.enter_context(self.data_layer.snapshot())
+                    has_archive = self.data_layer.archive.copy_to(archive_partial)
+                base_seq = changelog.last_seq(source)
+                source.backup(target, pages=PAGES_PER_STEP, sleep=STEP_SLEEP_SECONDS)
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+
+        if has_archive:
+            os.replace(archive_partial, archive_path)
+        elif os.path.exists(archive_path):
+            os.remove(archive_path)
+
+        # Batches from before the snapshot are already in it
+        for name in os.listdir(self.wal_dir):
+            if batch_range(name):
+                os.remove(os.path.join(self.wal_dir, name))
+
+        write_atomic(os.path.join(self.standby_dir, BASE_STATE_NAME), json.dumps({
+            'base_seq': base_seq,
+            'created_at': datetime.utcnow().isoformat()
+        }).encode())
+        os.replace(partial, path)
+        self.shipped_seq = base_seq
+
+    def _write_batch(self, changes: List[Dict[str, Any]]):
+        name = f"{changes[0]['seq']:016d}-{changes[-1]['seq']:016d}{BATCH_SUFFIX}"
+        data = ''.join(json.dumps(change) + '\n' for change in changes).encode('utf-8')
+        write_atomic(os.path.join(self.wal_dir, name), data)
+        self.batches_shipped += 1
+
+    def _write_state(self):
+        """Heartbeat for the standby's lag metrics"""
+        write_atomic(os.path.join(self.standby_dir, PRIMARY_STATE_NAME), json.dumps({
+            'last_seq': self.shipped_seq,
+            'last_commit_at': self.last_commit_at,
+            'heartbeat_at': datetime.utcnow().isoformat()
+        }).encode())
+
+    # ==================== STATUS ====================
+
+    def get_status(self) -> Dict[str, Any]:
+        """Shipping position and the backlog still in the change log"""
+        with self.data_layer.snapshot() as conn:
+            pending = conn.execute(
+                f"SELECT COUNT(*), MIN(committed_at) FROM {changelog.CHANGELOG_TABLE} WHERE seq > ?",
+                (self.shipped_seq,)
+            ).fetchone()
+
+        oldest = pending[1]
+        return {
+            'standby_dir': self.standby_dir,
+            'shipped_seq': self.shipped_seq,
+            'last_commit_at': self.last_commit_at,
+            'last_shipped_at': self.last_shipped_at,
+            'batches_shipped': self.batches_shipped,
+            'unshipped_changes': pending[0],
+            'unshipped_lag_seconds': round(
+                (datetime.utcnow() - datetime.fromisoformat(oldest)).total_seconds(), 3
+            ) if oldest else 0.0,
+            'last_error': self.last_error
+        }
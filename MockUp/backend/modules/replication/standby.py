@@ -0,0 +1,228 @@
+"""
+Standby Applier
+Standby side of replication: applies shipped batches to a read-only copy
+
+The standby database is seeded from base.db on first start. Batches are then
+applied in seq order, each in one transaction that also records applied_seq
+in _replication_state, so a restart resumes exactly where it stopped and a
+batch is never half applied. Applied batch files are removed. An archive
+move (data/archive.py) cannot run inside that transaction (it ATTACHes
+the archive file), so a batch is applied in runs between moves, and each
+move is repeated on its own. A move already made is skipped, so resuming
+after a crash is safe.
+
+Lag is reported as the age of the oldest shipped change not yet applied,
+plus how long ago the primary last wrote its heartbeat.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from data.archive import ARCHIVE_FILE, MOVE_TABLE
+from . import changelog
+from .shipper import (BASE_ARCHIVE_NAME, BASE_NAME, BASE_STATE_NAME, PRIMARY_STATE_NAME, WAL_DIR,
+                      batch_range, read_json)
+
+
+APPLY_INTERVAL_SECONDS = 0.25
+BASE_WAIT_SECONDS = 30
+
+
+def prepare_standby(db_path: str, standby_dir: str, timeout: float = BASE_WAIT_SECONDS):
+    """Seed the standby database from the primary's base snapshot on first start"""
+    if os.path.exists(db_path):
+        return
+
+    base = os.path.join(standby_dir, BASE_NAME)
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(base):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"No base snapshot in {standby_dir}: start the primary first")
+        time.sleep(0.5)
+
+    base_seq = (read_json(os.path.join(standby_dir, BASE_STATE_NAME)) or {}).get('base_seq', 0)
+
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    partial = db_path + '.partial'
+    shutil.copyfile(base, partial)
+
+    conn = sqlite3.connect(partial)
+    try:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {changelog.STATE_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(f"INSERT OR REPLACE INTO {changelog.STATE_TABLE} (key, value) VALUES ('applied_seq', ?)",
+                     (str(base_seq),))
+        conn.execute(f"DELETE FROM {changelog.CHANGELOG_TABLE}")
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Archived projects are not in base.db
+    base_archive = os.path.join(standby_dir, BASE_ARCHIVE_NAME)
+    if os.path.exists(base_archive):
+        shutil.copyfile(base_archive, os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_FILE))
+    os.replace(partial, db_path)
+
+
+class StandbyApplier:
+    """Applies shipped change batches in order"""
+
+    def __init__(self, data_layer, standby_dir: str, interval_seconds: float = APPLY_INTERVAL_SECONDS):
+        self.data_layer = data_layer
+        self.standby_dir = standby_dir
+        self.wal_dir = os.path.join(standby_dir, WAL_DIR)
+        self.interval_seconds = interval_seconds
+
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._apply_lock = threading.Lock()
+
+        self.applied_seq = 0
+        self.last_commit_at: Optional[str] = None
+        self.last_applied_at: Optional[str] = None
+        self.changes_applied = 0
+        self.last_error: Optional[str] = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Resume from the recorded position and start applying"""
+        changelog.install(self.data_layer)
+        state = {
+            row['key']: row['value']
+            for row in self.data_layer.fetchall(f"SELECT key, value FROM {changelog.STATE_TABLE}")
+        }
+        self.applied_seq = int(state.get('applied_seq') or 0)
+        self.last_commit_at = state.get('last_commit_at')
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='replication-standby', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop applying"""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.apply_pending()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️  Replication apply failed: {e}")
+            self._stopped.wait(self.interval_seconds)
+
+    # ==================== APPLYING ====================
+
+    def _pending_batches(self):
+        """(first, last, path) of batch files not yet applied, in order"""
+        if not os.path.isdir(self.wal_dir):
+            return []
+        batches = []
+        for name in os.listdir(self.wal_dir):
+            seqs = batch_range(name)
+            if seqs:
+                batches.append((seqs[0], seqs[1], os.path.join(self.wal_dir, name)))
+        return sorted(batches)
+
+    def apply_pending(self) -> int:
+        """Apply every shipped batch after applied_seq; returns changes applied"""
+        applied = 0
+        with self._apply_lock:
+            for first, last, path in self._pending_batches():
+                if last > self.applied_seq:
+                    if first > self.applied_seq + 1:
+                        raise RuntimeError(
+                            f"Missing changes {self.applied_seq + 1}-{first - 1}: reseed the standby from base.db"
+                        )
+                    with open(path) as f:
+                        changes = [json.loads(line) for line in f if line.strip()]
+                    changes = [c for c in changes if c['seq'] > self.applied_seq]
+                    applied += self._apply(changes)
+                os.remove(path)
+        return applied
+
+    def _apply(self, changes) -> int:
+        """A batch: row changes in runs between archive moves, each run in one transaction"""
+        run = []
+        for change in changes:
+            if change['table'] != MOVE_TABLE:
+                run.append(change)
+                continue
+            self._apply_run(run)
+            run = []
+            self.data_layer.archive.apply_move(change['data'])
+            self._apply_run([], position=change)
+        self._apply_run(run)
+        return len(changes)
+
+    def _apply_run(self, changes, position: Optional[Dict[str, Any]] = None):
+        """Row changes, the new position and clearing the local trigger output, in one transaction"""
+        last = changes[-1] if changes else position
+        if not last:
+            return
+
+        with self.data_layer.transaction() as cursor:
+            if changes:
+                self.data_layer.apply_changes(changes)
+            cursor.execute(f"DELETE FROM {changelog.CHANGELOG_TABLE}")
+            cursor.executemany(
+                f"INSERT INTO {changelog.STATE_TABLE} (key, value) VALUES (?, ?) "
+                f"ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [('applied_seq', str(last['seq'])), ('last_commit_at', last['committed_at'])]
+            )
+
+        self.applied_seq = last['seq']
+        self.last_commit_at = last['committed_at']
+        self.last_applied_at = datetime.utcnow().isoformat()
+        self.changes_applied += len(changes) + (1 if position else 0)
+
+    def promote(self) -> int:
+        """Apply everything shipped so far and stop following the primary"""
+        self.stop()
+        return self.apply_pending()
+
+    # ==================== STATUS ====================
+
+    def get_status(self) -> Dict[str, Any]:
+        """Position, backlog and lag behind the primary"""
+        now = datetime.utcnow()
+        primary = read_json(os.path.join(self.standby_dir, PRIMARY_STATE_NAME)) or {}
+        pending = [b for b in self._pending_batches() if b[1] > self.applied_seq]
+
+        lag_seconds = 0.0
+        if pending:
+            try:
+                with open(pending[0][2]) as f:
+                    oldest = json.loads(f.readline())['committed_at']
+                lag_seconds = round((now - datetime.fromisoformat(oldest)).total_seconds(), 3)
+            except (OSError, ValueError, KeyError):
+                lag_seconds = None  # Batch applied or replaced while reading
+
+        heartbeat = primary.get('heartbeat_at')
+        primary_seq = primary.get('last_seq', self.applied_seq)
+        return {
+            'standby_dir': self.standby_dir,
+            'applied_seq': self.applied_seq,
+            'primary_seq': primary_seq,
+            'seq_lag': max(0, primary_seq - self.applied_seq),
+            'pending_batches': len(pending),
+            'lag_seconds': lag_seconds,
+            'last_commit_at': self.last_commit_at,
+            'last_applied_at': self.last_applied_at,
+            'changes_applied': self.changes_applied,
+            'primary_heartbeat_age_seconds': round(
+                (now - datetime.fromisoformat(heartbeat)).total_seconds(), 3
+            ) if heartbeat else None,
+            'following': self._thread is not None and self._thread.is_alive(),
+            'last_error': self.last_error
+        }
@@ -8,6 +8,17 @@ from datetime import datetime
 from uuid import uuid4
 
 
+# API (camelCase) field names -> task columns
+FIELD_COLUMNS = {
+    'dueDate': 'due_date',
+    'startDate': 'start_date',
+    'assignedTo': 'assigned_to',
+    'estimatedHours': 'estimated_hours',
+    'completionPercentage': 'completion_percentage',
+    'blockedBy': 'blocked_by'
+}
+
+
 class TasksModule:
     """Task management module"""
 
@@ -21,6 +32,8 @@ class TasksModule:
 
         if action == 'list':
             return self._list_tasks(request.get('filters', {}), data_layer)
+        elif action == 'stream':
+            return self._stream_tasks(request.get('filters', {}), data_layer)
         elif action == 'get':
             return self._get_task(request.get('id'), data_layer)
         elif action == 'create':
@@ -40,6 +53,13 @@ class TasksModule:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _stream_tasks(self, filters: Dict, data_layer) -> Dict[str, Any]:
+        """Iterate tasks without loading them all (for streamed responses)"""
+        try:
+            return {'success': True, 'data': data_layer.iter_query('tasks', filters)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
     def _get_task(self, task_id: str, data_layer) -> Dict[str, Any]:
         """Get single task"""
         try:
@@ -76,6 +96,9 @@ class TasksModule:
                 'created_at': datetime.utcnow().isoformat(),
                 'updated_at': datetime.utcnow().isoformat()
             }
+            # Without one the task belongs to the default project
+            if data.get('project_id'):
+                task_data['project_id'] = data['project_id']
 
             task_id = data_layer.insert('tasks', task_data)
             created_task = data_layer.get('tasks', task_id)
@@ -93,6 +116,7 @@ class TasksModule:
                 return {'success': False, 'error': 'Task not found'}
 
             # Update task
+            data = {FIELD_COLUMNS.get(k, k): v for k, v in data.items()}
             success = data_layer.update('tasks', task_id, data)
             if not success:
                 return {'success': False, 'error': 'Update failed'}
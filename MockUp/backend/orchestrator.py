@@ -8,7 +8,8 @@ import sys
 from typing import Dict, Any
 
 # Import data layer
-from data.sqlite_layer import SQLiteDataLayer
+from data.sqlite_layer import SQLiteDataLayer, is_memory_path
+from data.shards import ShardRouter
 
 # Import modules
 from modules.tasks.handlers import TasksModule
@@ -21,6 +22,30 @@ from modules.documents.handlers import DocumentsModule
 from modules.contacts.handlers import ContactsModule
 from modules.milestones.handlers import MilestonesModule
 from modules.materials.handlers import MaterialsModule
+from modules.maintenance.handlers import MaintenanceModule
+from modules.graph.handlers import GraphModule
+from modules.imports.handlers import ImportsModule
+from modules.replication import changelog
+from modules.replication.handlers import ReplicationModule
+from modules.replication.standby import prepare_standby
+
+
+# Modules whose data belongs to one project; in sharded storage each shard gets its own instances
+PROJECT_MODULES = {
+    'tasks': TasksModule,
+    'budget': BudgetModule,
+    'documents': DocumentsModule,
+    'contacts': ContactsModule,
+    'milestones': MilestonesModule,
+    'materials': MaterialsModule,
+    'graph': GraphModule
+}
+
+# Projects actions that read a project's records rather than the catalog row
+SHARDED_PROJECT_ACTIONS = ('get_stats', 'export')
+
+# Project module actions that read every project when no project_id is given
+FAN_OUT_ACTIONS = ('list', 'stream')
 
 
 class Orchestrator:
@@ -33,10 +58,21 @@ class Orchestrator:
         """Initialize orchestrator with configuration"""
         self.config = config
         self.modules = {}
+        self.role = config.get('role', 'primary')
+        self.shards = None
+
+        # A new standby starts from the primary's base snapshot
+        if self.role == 'standby':
+            if not config.get('standby_dir'):
+                raise ValueError("A standby needs a standby_dir to replicate from")
+            if is_memory_path(config['db_path']):
+                raise ValueError("A standby needs a database file to copy the base snapshot into")
+            prepare_standby(config['db_path'], config['standby_dir'])
 
         # Initialize data layer
         if config['db_type'] == 'sqlite':
-            self.data_layer = SQLiteDataLayer(config['db_path'])
+            # seed_path: start an in-memory database from a copy of this file
+            self.data_layer = SQLiteDataLayer(config['db_path'], seed_path=config.get('seed_path'))
             print(f"✅ SQLite data layer initialized")
         else:
             raise ValueError(f"Unsupported database type: {config['db_type']}")
@@ -44,6 +80,24 @@ class Orchestrator:
         # Initialize database schema
         self.data_layer.initialize_schema()
 
+        # Standby data only changes through replication
+        self.data_layer.read_only = self.role == 'standby'
+
+        # Without a standby directory nothing would drain the change log
+        if not config.get('standby_dir'):
+            changelog.uninstall(self.data_layer)
+
+        # Sharded storage: one database per project, this one is the catalog
+        # (set up first: maintenance finds the shards when it attaches)
+        if config.get('storage', 'single') == 'sharded':
+            if config.get('standby_dir'):
+                raise ValueError("Replication is not supported with sharded storage")
+            self.shards = ShardRouter(self.data_layer, self._project_modules)
+            self.shards.install()
+            print(f"✅ Sharded storage at {self.shards.root}")
+        elif config.get('storage', 'single') != 'single':
+            raise ValueError(f"Unsupported storage mode: {config['storage']}")
+
         # Register modules
         self._register_modules()
 
@@ -83,8 +137,120 @@ class Orchestrator:
         self.modules['materials'] = MaterialsModule()
         print("  ✓ Materials module")
 
+        self.modules['graph'] = GraphModule()
+        print("  ✓ Graph module")
+
+        self.modules['imports'] = ImportsModule()
+        print("  ✓ Imports module")
+
+        # Background modules
+        self.modules['maintenance'] = MaintenanceModule()
+        print("  ✓ Maintenance module")
+
+        if self.config.get('standby_dir'):
+            self.modules['replication'] = ReplicationModule(
+                self.role, self.config['standby_dir'], on_promote=self._promoted
+            )
+            print(f"  ✓ Replication module ({self.role})")
+
         print(f"✅ {len(self.modules)} modules registered")
 
+        # Let modules start background work against the data layer
+        for name, module in self.modules.items():
+            if hasattr(module, 'attach'):
+                module.attach(self.data_layer)
+                print(f"  ⚙️  {name} attached")
+
+    def _project_modules(self) -> Dict[str, Any]:
+        """Fresh instances of the project-scoped modules, for one shard"""
+        return {name: module_class() for name, module_class in PROJECT_MODULES.items()}
+
+    def _promoted(self):
+        """Restart module background work, which skips writes on a standby"""
+        self.role = 'primary'
+        for name, module in self.modules.items():
+            if name != 'replication' and hasattr(module, 'attach'):
+                if hasattr(module, 'detach'):
+                    module.detach()
+                module.attach(self.data_layer)
+
+    def shutdown(self):
+        """Stop module background work"""
+        for module in self.modules.values():
+            if hasattr(module, 'detach'):
+                module.detach()
+        # After maintenance, whose sweeps and backups use the shards
+        if self.shards:
+            self.shards.close()
+
+        # Removes an in-memory database's temporary data directory
+        if self.data_layer.in_memory:
+            self.data_layer.close()
+
+    def _route(self, request: Dict[str, Any]):
+        """Data layer, module instance and shard (held open; None for the catalog) serving a request"""
+        module_name = request.get('module')
+        module = self.modules[module_name]
+        if not self.shards:
+            return self.data_layer, module, None
+
+        shard = None
+        if module_name in PROJECT_MODULES:
+            shard = self.shards.route(request)
+        elif module_name == 'projects' and request.get('action') in SHARDED_PROJECT_ACTIONS:
+            shard = self.shards.route(request, project_id=request.get('id'))
+
+        if not shard:
+            return self.data_layer, module, None
+        return shard.data_layer, shard.modules.get(module_name, module), shard
+
+    def _fans_out(self, request: Dict[str, Any]) -> bool:
+        """Whether a request lists records of every project (sharded storage only)"""
+        if not self.shards or request.get('module') not in PROJECT_MODULES:
+            return False
+        if request.get('action') not in FAN_OUT_ACTIONS:
+            return False
+        return not (request.get('filters') or {}).get('project_id')
+
+    def _fan_out(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Catalog rows followed by each shard's, for list and stream actions"""
+        module_name = request['module']
+        result = self.modules[module_name].handle(request, self.data_layer)
+        if not result.get('success'):
+            return result
+
+        if request['action'] == 'stream':
+            return {'success': True, 'data': self._stream_shards(request, result['data'])}
+
+        rows = list(result['data'])
+        for project_id in self.shards.project_ids():
+            shard = self.shards.acquire(project_id)
+            if not shard:
+                continue  # Dropped meanwhile
+            try:
+                result = shard.modules[module_name].handle(request, shard.data_layer)
+            finally:
+                self.shards.release(shard)
+            if not result.get('success'):
+                return result
+            rows.extend(result['data'])
+        return {'success': True, 'data': rows}
+
+    def _stream_shards(self, request: Dict[str, Any], catalog_rows):
+        """Yield the catalog's rows, then each shard's (held open while it streams)"""
+        yield from catalog_rows
+        for project_id in self.shards.project_ids():
+            shard = self.shards.acquire(project_id)
+            if not shard:
+                continue
+            try:
+                result = shard.modules[request['module']].handle(request, shard.data_layer)
+                if not result.get('success'):
+                    raise RuntimeError(result.get('error'))
+                yield from result['data']
+            finally:
+                self.shards.release(shard)
+
     def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """
         Route request to appropriate module
@@ -114,12 +280,22 @@ class Orchestrator:
                 'error': f"Module '{module_name}' not found"
             }
 
-        # Get module
-        module = self.modules[module_name]
-
         # Handle request
         try:
-            result = module.handle(request, self.data_layer)
+            if self._fans_out(request):
+                return self._fan_out(request)
+
+            data_layer, module, shard = self._route(request)
+            try:
+                result = module.handle(request, data_layer)
+            finally:
+                if shard:
+                    self.shards.release(shard)
+
+            # A project created in sharded storage gets its own database
+            if (self.shards and module_name == 'projects' and request.get('action') == 'create'
+                    and result.get('success')):
+                self.shards.create(result['data'])
             return result
         except Exception as e:
             return {
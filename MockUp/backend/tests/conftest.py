@@ -0,0 +1,110 @@
+"""Shared test setup: import the backend packages the way main.py does"""
+
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.sqlite_layer import SQLiteDataLayer  # noqa: E402
+
+
+@pytest.fixture(params=['memory', 'file'])
+def data_layer(request, tmp_path):
+    """Fresh database with the schema and default project, in memory and in a file"""
+    data_layer = SQLiteDataLayer(':memory:' if request.param == 'memory' else str(tmp_path / 'aven.db'))
+    data_layer.initialize_schema()
+    yield data_layer
+    data_layer.close()
+
+
+class ApiResponse:
+    """Status, lower-cased headers and body of one HTTP response"""
+
+    def __init__(self, status_code: int, headers, content: bytes):
+        self.status_code = status_code
+        self.headers = {name.lower(): value for name, value in headers}
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ApiClient:
+    """Plain HTTP client for a server running in this process"""
+
+    def __init__(self, port: int):
+        self.port = port
+
+    def request(self, method, path, params=None, json_body=None, body=None, headers=None) -> ApiResponse:
+        headers = dict(headers or {})
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['content-type'] = 'application/json'
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return ApiResponse(response.status, response.getheaders(), response.read())
+        finally:
+            conn.close()
+
+    def get(self, path, **kwargs) -> ApiResponse:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, json=None, **kwargs) -> ApiResponse:
+        return self.request('POST', path, json_body=json, **kwargs)
+
+    def put(self, path, json=None, **kwargs) -> ApiResponse:
+        return self.request('PUT', path, json_body=json, **kwargs)
+
+    def delete(self, path, **kwargs) -> ApiResponse:
+        return self.request('DELETE', path, **kwargs)
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """
+    Serve the FastAPI app on a database in tmp_path: api(storage='single') -> ApiClient
+
+    A real uvicorn server on a free port, so requests go through HTTP and the
+    startup and shutdown events run.
+    """
+    import uvicorn
+    import main
+
+    servers = []
+
+    def start(storage='single'):
+        monkeypatch.setattr(main, 'DB_PATH', str(tmp_path / 'aven.db'))
+        monkeypatch.setattr(main, 'ROLE', 'primary')
+        monkeypatch.setattr(main, 'STANDBY_DIR', None)
+        monkeypatch.setattr(main, 'SEED_PATH', None)
+        monkeypatch.setattr(main, 'STORAGE', storage)
+
+        server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=0, log_level='warning'))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 30
+        while not server.started:
+            assert thread.is_alive() and time.monotonic() < deadline, 'server did not start'
+            time.sleep(0.02)
+        servers.append((server, thread))
+        return ApiClient(server.servers[0].sockets[0].getsockname()[1])
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=30)
@@ -0,0 +1,186 @@
+"""Document content over HTTP: storage, ranged downloads, search and version history"""
+
+import hashlib
+import os
+import time
+
+import pytest
+
+import main
+from modules.documents.blobs import BlobStore
+
+
+@pytest.fixture
+def client(api):
+    return api()
+
+
+def _document(client, filename='plan.pdf', content=None, content_type='application/pdf'):
+    document = client.post('/api/documents', json={
+        'project_id': 'default-project', 'filename': filename, 'file_path': filename
+    }).json()
+    if content is not None:
+        document = _upload(client, document['id'], content, content_type)
+    return document
+
+
+def _upload(client, document_id, content, content_type='application/pdf'):
+    response = client.post(f"/api/documents/{document_id}/content", body=content,
+                           headers={'content-type': content_type})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _blob(blob_hash):
+    data_layer = main.orchestrator.data_layer
+    row = data_layer.fetchone("SELECT refcount FROM blobs WHERE hash = ?", (blob_hash,))
+    path = BlobStore(data_layer).path(blob_hash)
+    return (row['refcount'] if row else None), os.path.exists(path)
+
+
+# ==================== BLOB STORE ====================
+
+def test_blobs_are_shared_and_removed_with_their_last_document(client):
+    drawing = b'%PDF-1.7 elevations' * 1000
+    first = _document(client, content=drawing)
+    second = _document(client, 'copy.pdf', content=drawing)
+    assert first['blob_hash'] == second['blob_hash'] == hashlib.sha256(drawing).hexdigest()
+    # Each document and each version row holds a reference
+    assert _blob(first['blob_hash']) == (4, True)
+
+    # A replaced version keeps its blob until the document goes
+    revised = _upload(client, first['id'], b'%PDF-1.7 revised elevations')
+    assert _blob(first['blob_hash']) == (3, True)
+
+    assert client.delete(f"/api/documents/{first['id']}").status_code == 200
+    assert _blob(first['blob_hash']) == (2, True)
+    assert _blob(revised['blob_hash']) == (None, False)
+
+    assert client.delete(f"/api/documents/{second['id']}").status_code == 200
+    assert _blob(first['blob_hash']) == (None, False)
+
+
+# ==================== RANGED DOWNLOADS ====================
+
+def test_range_requests(client):
+    photo = bytes(range(256)) * 40
+    document = _document(client, 'site.jpg', photo, 'image/jpeg')
+    url = f"/api/documents/{document['id']}/content"
+
+    whole = client.get(url)
+    assert whole.status_code == 200 and whole.content == photo
+    assert whole.headers['accept-ranges'] == 'bytes'
+
+    partial = client.get(url, headers={'range': 'bytes=100-199'})
+    assert partial.status_code == 206 and partial.content == photo[100:200]
+    assert partial.headers['content-range'] == f"bytes 100-199/{len(photo)}"
+
+    suffix = client.get(url, headers={'range': 'bytes=-10'})
+    assert suffix.status_code == 206 and suffix.content == photo[-10:]
+
+    beyond = client.get(url, headers={'range': f"bytes={len(photo)}-"})
+    assert beyond.status_code == 416
+    assert beyond.headers['content-range'] == f"bytes */{len(photo)}"
+
+    # Several ranges are answered with the whole content
+    several = client.get(url, headers={'range': 'bytes=0-9,20-29'})
+    assert several.status_code == 200 and several.content == photo
+
+
+def test_conditional_requests(client):
+    document = _document(client, 'site.jpg', b'first survey', 'image/jpeg')
+    url = f"/api/documents/{document['id']}/content"
+    etag = client.get(url).headers['etag']
+    assert etag == f'"{document["blob_hash"]}"'
+
+    cached = client.get(url, headers={'if-none-match': etag})
+    assert cached.status_code == 304 and cached.content == b''
+
+    resumed = client.get(url, headers={'range': 'bytes=6-', 'if-range': etag})
+    assert resumed.status_code == 206 and resumed.content == b'survey'
+
+    # Content replaced since the client's copy: the whole new file, not a range of it
+    _upload(client, document['id'], b'second survey', 'image/jpeg')
+    assert client.get(url, headers={'if-none-match': etag}).status_code == 200
+    stale = client.get(url, headers={'range': 'bytes=6-', 'if-range': etag})
+    assert stale.status_code == 200 and stale.content == b'second survey'
+
+
+# ==================== THUMBNAILS ====================
+
+def test_full_thumbnail_queue_fails_fast(client):
+    pytest.importorskip('PIL')
+    import io
+    from PIL import Image
+    from modules.documents.thumbnails import MAX_PENDING, THUMBNAIL_SIZES
+
+    photo = io.BytesIO()
+    Image.new('RGB', (64, 48), 'grey').save(photo, 'PNG')
+    document = client.post('/api/documents', json={
+        'project_id': 'default-project', 'filename': 'site.png', 'file_path': 'site.png', 'document_type': 'photo'
+    }).json()
+    document = _upload(client, document['id'], photo.getvalue(), 'image/png')
+    url = f"/api/documents/{document['id']}/thumbnail"
+    assert client.get(url).status_code == 200
+
+    # Every queue slot taken and nothing cached: the request gives up instead of waiting
+    thumbnails = main.orchestrator.modules['documents'].thumbnails
+    for size in THUMBNAIL_SIZES:
+        os.remove(thumbnails.path(document['blob_hash'], size))
+    for _ in range(MAX_PENDING):
+        assert thumbnails._slots.acquire(timeout=5)
+    try:
+        started = time.monotonic()
+        busy = client.get(url)
+        assert busy.status_code == 503 and busy.headers['retry-after']
+        assert time.monotonic() - started < 5
+    finally:
+        for _ in range(MAX_PENDING):
+            thumbnails._slots.release()
+
+    assert client.get(url).status_code == 200
+
+
+# ==================== SEARCH ====================
+
+def _search(client, query, expected, timeout=20):
+    """Search results once indexing has caught up with expected (a list of ids)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        found = [d['id'] for d in client.get('/api/documents/search', params={'q': query}).json()]
+        if sorted(found) == sorted(expected) or time.monotonic() > deadline:
+            return found
+        time.sleep(0.1)
+
+
+def test_uploaded_text_is_searchable(client):
+    certificate = _document(client, 'gas-safe.txt', b'Boiler installation certificate, Gas Safe registered',
+                            'text/plain')
+    _document(client, 'notes.txt', b'Scaffold down on Friday', 'text/plain')
+
+    assert _search(client, 'boiler installation', [certificate['id']]) == [certificate['id']]
+
+    # Only current versions are searched
+    _upload(client, certificate['id'], b'Heat pump commissioning record', 'text/plain')
+    assert _search(client, 'boiler', []) == []
+    assert _search(client, 'commissioning', [certificate['id']]) == [certificate['id']]
+
+
+# ==================== VERSIONS ====================
+
+def test_earlier_versions_stay_readable(client):
+    document = _document(client, 'plan.pdf', b'rev A')
+    replaced = _upload(client, document['id'], b'rev B')
+    assert replaced['version'] == 2
+
+    url = f"/api/documents/{document['id']}/content"
+    assert client.get(url).content == b'rev B'
+    first = client.get(url, params={'version': 1})
+    assert first.status_code == 200 and first.content == b'rev A'
+    assert first.headers['etag'] == f'"{document["blob_hash"]}"'
+    assert client.get(url, params={'version': 3}).status_code == 404
+
+    versions = client.get(f"/api/documents/{document['id']}/versions").json()
+    assert [(v['version'], v['blob_hash']) for v in versions] == [
+        (2, replaced['blob_hash']), (1, document['blob_hash'])
+    ]
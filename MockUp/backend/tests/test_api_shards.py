@@ -0,0 +1,37 @@
+"""Sharded storage over HTTP: tasks land in their project's shard and unfiltered lists see them all"""
+
+import json
+
+import main
+
+
+def _task(client, title, project_id=None):
+    response = client.post('/api/tasks', json={'title': title, 'category': 'general', 'project_id': project_id})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_tasks_in_sharded_projects(api):
+    client = api(storage='sharded')
+    projects = [client.post('/api/projects', json={'name': name}).json() for name in ('Barn', 'Cottage')]
+
+    barn = _task(client, 'Strip roof', projects[0]['id'])
+    cottage = _task(client, 'Damp course', projects[1]['id'])
+    default = _task(client, 'Site survey')
+    assert barn['project_id'] == projects[0]['id']
+
+    # The task lives in the shard, not the catalog
+    with main.orchestrator.shards.using(projects[0]['id']) as shard:
+        assert shard.get('tasks', barn['id'])['title'] == 'Strip roof'
+    assert main.orchestrator.data_layer.get('tasks', barn['id']) is None
+
+    listed = client.get('/api/tasks').json()
+    assert sorted(t['id'] for t in listed) == sorted([barn['id'], cottage['id'], default['id']])
+
+    streamed = client.get('/api/tasks', headers={'accept': 'application/x-ndjson'})
+    assert sorted(json.loads(line)['id'] for line in streamed.text.splitlines()) == sorted(t['id'] for t in listed)
+
+    filtered = client.get('/api/tasks', params={'project_id': projects[1]['id']}).json()
+    assert [t['id'] for t in filtered] == [cottage['id']]
+
+    assert client.get(f"/api/tasks/{barn['id']}").json()['title'] == 'Strip roof'
@@ -0,0 +1,95 @@
+"""Archived projects survive backups and replicate as moves"""
+
+import json
+import os
+import sqlite3
+
+from data.archive import MOVE_TABLE
+from data.sqlite_layer import SQLiteDataLayer
+from modules.maintenance.backup import BackupService
+from modules.replication import changelog
+from modules.replication.shipper import Shipper, WAL_DIR
+from modules.replication.standby import StandbyApplier, prepare_standby
+
+
+def _project(data_layer, name='Finished'):
+    project_id = data_layer.insert('projects', {'name': name, 'status': 'completed'})
+    data_layer.insert('contacts', {'project_id': project_id, 'name': 'Site manager'})
+    return project_id
+
+
+def _rows(path, query, params=()):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+
+def test_backups_include_the_archive(data_layer, tmp_path):
+    project_id = _project(data_layer)
+    data_layer.archive.archive(project_id)
+
+    backups = BackupService(data_layer, backup_dir=str(tmp_path / 'backups'), keep=1)
+    first = backups.run_backup()
+    listed = backups.list_backups()
+    assert len(listed) == 1 and listed[0]['archive']
+
+    archive_copy = str(tmp_path / 'backups' / listed[0]['archive'])
+    assert _rows(archive_copy, "SELECT id FROM projects") == [(project_id,)]
+    assert _rows(archive_copy, "SELECT COUNT(*) FROM contacts WHERE project_id = ?", (project_id,)) == [(1,)]
+
+    # Rotation removes a backup's archive with it
+    backups.run_backup()
+    assert os.path.basename(first['path'])[:-3] + '.archive.db' not in os.listdir(tmp_path / 'backups')
+    assert len(os.listdir(tmp_path / 'backups')) == 2
+
+
+def _standby(tmp_path, standby_dir):
+    path = str(tmp_path / 'standby' / 'aven.db')
+    prepare_standby(path, standby_dir, timeout=1)
+    data_layer = SQLiteDataLayer(path)
+    data_layer.initialize_schema()
+    data_layer.read_only = True
+    applier = StandbyApplier(data_layer, standby_dir, interval_seconds=3600)
+    applier.start()
+    return data_layer, applier
+
+
+def test_archive_moves_replicate_as_moves(data_layer, tmp_path):
+    standby_dir = str(tmp_path / 'shipped')
+    kept = _project(data_layer, 'Archived before the standby existed')
+    data_layer.archive.archive(kept)
+
+    shipper = Shipper(data_layer, standby_dir)
+    shipper.start()
+    try:
+        shipper.ship_once()
+        standby, applier = _standby(tmp_path, standby_dir)
+        # The base snapshot carries the archive
+        assert standby.archive.contains(kept)
+
+        project_id = _project(data_layer)
+        applier.apply_pending()
+        shipper.ship_once()  # the project's rows
+        applier.apply_pending()
+
+        data_layer.archive.archive(project_id)
+        assert data_layer.fetchone(f"SELECT COUNT(*) AS n FROM {changelog.CHANGELOG_TABLE}")['n'] == 1
+        shipper.ship_once()
+        shipped = [json.loads(line) for name in os.listdir(os.path.join(standby_dir, WAL_DIR))
+                   for line in open(os.path.join(standby_dir, WAL_DIR, name))]
+        assert [(c['table'], c['operation']) for c in shipped] == [(MOVE_TABLE, 'upsert')]
+
+        applier.apply_pending()
+        assert standby.archive.contains(project_id)
+        assert standby.archive.fetchall("SELECT name FROM contacts WHERE project_id = ?", (project_id,))
+
+        data_layer.archive.restore(project_id)
+        shipper.ship_once()
+        applier.apply_pending()
+        assert not standby.archive.contains(project_id)
+        assert standby.query('contacts', {'project_id': project_id})
+        applier.stop()
+    finally:
+        shipper.stop()
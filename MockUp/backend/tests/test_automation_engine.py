@@ -0,0 +1,26 @@
+"""Cascade metrics: the evaluation limit only counts when it cut work short"""
+
+from modules.automation.engine import CascadeEngine
+
+
+def _rule(data_layer, name):
+    data_layer.insert('automation_rules', {
+        'name': name, 'trigger': 'task_created', 'enabled': 1,
+        'conditions': [{'field': 'status', 'operator': 'equals', 'value': 'never'}],
+        'actions': [{'action': 'set_status', 'parameters': {'status': 'done'}}]
+    })
+
+
+def test_using_exactly_the_budget_is_not_a_limit_hit(data_layer):
+    task_id = data_layer.insert('tasks', {'title': 'Order bricks', 'category': 'materials'})
+    _rule(data_layer, 'only rule')
+
+    engine = CascadeEngine(max_evaluations=1)
+    result = engine.process(task_id, 'task_created', data_layer)
+    assert result['evaluations'] == 1 and not result['truncated']
+    assert engine.get_metrics()['evaluation_limit_hits'] == 0
+
+    _rule(data_layer, 'one rule too many')
+    result = engine.process(task_id, 'task_created', data_layer)
+    assert result['evaluations'] == 1 and result['truncated']
+    assert engine.get_metrics()['evaluation_limit_hits'] == 1
@@ -0,0 +1,83 @@
+"""Incremental CPM updates must match a full recompute"""
+
+import random
+from datetime import datetime, timedelta
+
+from modules.graph.cpm import CriticalPathSchedule
+from modules.graph.graph import DependencyGraph
+
+
+def _random_inputs(rng: random.Random, base: datetime):
+    start = base + timedelta(days=rng.randint(-10, 30)) if rng.random() < 0.4 else None
+    deadline = base + timedelta(days=rng.randint(0, 60)) if rng.random() < 0.3 else None
+    return {'duration': rng.randint(0, 6), 'start': start, 'deadline': deadline}
+
+
+def _results(schedule: CriticalPathSchedule):
+    result = schedule.to_dict()
+    result.pop('stats')
+    return result
+
+
+def _fresh(graph: DependencyGraph, inputs, project_start):
+    schedule = CriticalPathSchedule(graph, project_start)
+    schedule.inputs = {node_id: dict(i) for node_id, i in inputs.items()}
+    schedule.recompute()
+    return schedule
+
+
+def test_incremental_updates_match_full_recompute():
+    rng = random.Random(30)
+    base = datetime(2026, 3, 2)
+
+    for trial in range(300):
+        nodes = [f"n{i}" for i in range(rng.randint(2, 12))]
+        graph = DependencyGraph('p')
+        inputs = {}
+        for i, node_id in enumerate(nodes):
+            # Blockers only among earlier nodes, so the graph stays acyclic
+            blockers = {b for b in nodes[:i] if rng.random() < 0.3}
+            graph.set_node(node_id, 'task', node_id, 'todo', False, blockers, check_cycles=False)
+            inputs[node_id] = _random_inputs(rng, base)
+
+        project_start = base if rng.random() < 0.5 else None
+        schedule = _fresh(graph, inputs, project_start)
+
+        for step in range(10):
+            new_inputs = _random_inputs(rng, base)
+            starts = [(i['start'], n) for n, i in inputs.items() if i['start']]
+            if starts and rng.random() < 0.3:
+                # Move (or clear) the start of the node that sets day zero
+                earliest, node_id = min(starts)
+                new_inputs['start'] = rng.choice([None, earliest + timedelta(days=rng.randint(1, 20))])
+            else:
+                node_id = rng.choice(nodes)
+
+            previous_blockers = set(graph.blockers.get(node_id, set()))
+            if rng.random() < 0.3:
+                index = nodes.index(node_id)
+                blockers = {b for b in nodes[:index] if rng.random() < 0.3}
+                graph.set_node(node_id, 'task', node_id, 'todo', False, blockers, check_cycles=False)
+
+            inputs[node_id] = dict(new_inputs)
+            schedule.set_inputs(node_id, new_inputs, previous_blockers)
+
+            expected = _results(_fresh(graph, inputs, project_start))
+            assert _results(schedule) == expected, f"trial {trial}, step {step}, node {node_id}"
+
+
+def test_moving_the_earliest_start_later_moves_day_zero():
+    graph = DependencyGraph('p')
+    graph.set_node('a', 'task', 'a', 'todo', False, [])
+    graph.set_node('b', 'task', 'b', 'todo', False, ['a'])
+    inputs = {
+        'a': {'duration': 2, 'start': datetime(2026, 1, 5), 'deadline': None},
+        'b': {'duration': 3, 'start': datetime(2026, 1, 10), 'deadline': None}
+    }
+    schedule = _fresh(graph, inputs, None)
+
+    inputs['a'] = {'duration': 2, 'start': datetime(2026, 1, 20), 'deadline': None}
+    schedule.set_inputs('a', dict(inputs['a']), set())
+
+    assert schedule.to_dict()['project_start'] == '2026-01-10'
+    assert _results(schedule) == _results(_fresh(graph, inputs, None))
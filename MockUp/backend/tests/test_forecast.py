@@ -0,0 +1,31 @@
+"""Completion forecasts never start remaining work in the past"""
+
+from datetime import datetime, timedelta
+
+from modules.milestones.forecast import forecast_completion
+from uk_constants import UK_BUILD_PHASES
+
+
+def _completed(phase_id, days_ago):
+    actual = (datetime.utcnow() - timedelta(days=days_ago)).date().isoformat()
+    return {'phase': phase_id, 'status': 'completed', 'target_date': actual, 'actual_date': actual}
+
+
+def test_stale_last_completion_anchors_on_today():
+    today = datetime.utcnow().date().isoformat()
+    milestones = [_completed('groundworks', 120)]
+
+    result = forecast_completion({'start_date': '2025-01-06'}, milestones, simulations=500, seed=31)
+
+    assert result['remaining_phases'] > 0
+    assert result['anchor_date'] == today
+    assert all(p['date'] > today for p in result['percentiles'].values())
+
+
+def test_finished_project_keeps_its_last_completion():
+    milestones = [_completed(phase['id'], 120) for phase in UK_BUILD_PHASES]
+
+    result = forecast_completion(None, milestones, simulations=500, seed=31)
+
+    assert result['remaining_phases'] == 0
+    assert result['anchor_date'] == milestones[0]['actual_date']
@@ -0,0 +1,67 @@
+"""Cycle checks hold against writes whose listeners have not run yet"""
+
+import threading
+import time
+
+import pytest
+
+from modules.graph.graph import DependencyCycleError, GraphRegistry
+
+
+def _task(data_layer, title, blocked_by=()):
+    return data_layer.insert('tasks', {'title': title, 'category': 'general', 'blocked_by': list(blocked_by)})
+
+
+@pytest.fixture
+def lagging(data_layer):
+    """Registry whose write listener runs late, after the next writer has validated"""
+    committed = threading.Event()
+
+    def slow_listener(table, operation, record_id):
+        if table == 'tasks' and threading.current_thread() is not threading.main_thread():
+            committed.set()
+            time.sleep(0.3)
+
+    data_layer.add_listener(slow_listener)
+    registry = GraphRegistry(data_layer)
+    registry.attach()
+    registry.get('default-project')
+
+    def in_background(write):
+        committed.clear()
+        thread = threading.Thread(target=write)
+        thread.start()
+        assert committed.wait(5)
+        return thread
+
+    yield registry, in_background
+    registry.detach()
+
+
+def test_concurrent_writes_cannot_commit_a_cycle(data_layer, lagging):
+    registry, in_background = lagging
+    a = _task(data_layer, 'A')
+    b = _task(data_layer, 'B')
+
+    writer = in_background(lambda: data_layer.update('tasks', a, {'blocked_by': [b]}))
+    # A's edge is committed but not yet in the graph
+    with pytest.raises(DependencyCycleError):
+        data_layer.update('tasks', b, {'blocked_by': [a]})
+    writer.join()
+
+    assert data_layer.get('tasks', b)['blocked_by'] == []
+    assert registry.get('default-project').blockers[a] == {b}
+
+
+def test_edges_removed_but_not_yet_applied_do_not_block(data_layer, lagging):
+    registry, in_background = lagging
+    a = _task(data_layer, 'A')
+    b = _task(data_layer, 'B', blocked_by=[a])
+
+    writer = in_background(lambda: data_layer.update('tasks', b, {'blocked_by': []}))
+    # The graph still holds A -> B, but the database no longer does
+    data_layer.update('tasks', a, {'blocked_by': [b]})
+    writer.join()
+
+    graph = registry.get('default-project')
+    assert graph.blockers[a] == {b} and graph.blockers[b] == set()
@@ -0,0 +1,55 @@
+"""Status sweeps only ever revert statuses they set themselves"""
+
+from datetime import datetime, timedelta
+
+from modules.maintenance.jobs import MaintenanceScheduler
+
+
+PAST = (datetime.utcnow() - timedelta(days=10)).date().isoformat()
+FUTURE = (datetime.utcnow() + timedelta(days=10)).date().isoformat()
+
+
+def _milestone(data_layer, status, target_date):
+    return data_layer.insert('milestones', {
+        'project_id': 'default-project', 'name': status, 'status': status, 'target_date': target_date
+    })
+
+
+def _material(data_layer, status, delivery_date):
+    return data_layer.insert('materials', {
+        'project_id': 'default-project', 'item_name': status, 'delivery_status': status,
+        'delivery_date': delivery_date
+    })
+
+
+def test_rescheduled_rows_get_their_previous_status_back(data_layer):
+    jobs = MaintenanceScheduler(data_layer)
+    milestone = _milestone(data_layer, 'in-progress', PAST)
+    material = _material(data_layer, 'in-transit', PAST)
+
+    jobs.run_once()
+    assert data_layer.get('milestones', milestone)['status'] == 'delayed'
+    assert data_layer.get('materials', material)['delivery_status'] == 'overdue'
+
+    data_layer.update('milestones', milestone, {'target_date': FUTURE})
+    data_layer.update('materials', material, {'delivery_date': FUTURE})
+    jobs.run_once()
+    assert data_layer.get('milestones', milestone)['status'] == 'in-progress'
+    assert data_layer.get('materials', material)['delivery_status'] == 'in-transit'
+
+
+def test_statuses_set_by_hand_are_kept(data_layer):
+    jobs = MaintenanceScheduler(data_layer)
+    by_hand = _milestone(data_layer, 'delayed', FUTURE)
+    overdue = _material(data_layer, 'overdue', FUTURE)
+
+    # Marked by the job, then changed by hand before being rescheduled
+    changed = _milestone(data_layer, 'pending', PAST)
+    jobs.run_once()
+    data_layer.update('milestones', changed, {'status': 'in-progress'})
+    data_layer.update('milestones', changed, {'status': 'delayed', 'target_date': FUTURE})
+
+    jobs.run_once()
+    assert data_layer.get('milestones', by_hand)['status'] == 'delayed'
+    assert data_layer.get('materials', overdue)['delivery_status'] == 'overdue'
+    assert data_layer.get('milestones', changed)['status'] == 'delayed'
@@ -0,0 +1,41 @@
+"""In-memory databases: readers share one copy until the data changes"""
+
+from data.sqlite_layer import SQLiteDataLayer
+from modules.maintenance.handlers import MaintenanceModule
+
+
+def test_readers_share_a_copy_until_a_write():
+    data_layer = SQLiteDataLayer(':memory:')
+    try:
+        data_layer.initialize_schema()
+        with data_layer.snapshot() as first, data_layer.snapshot() as second:
+            copy = data_layer._reader_copy
+            assert first.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 1
+            assert second.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 1
+        assert data_layer._reader_copy is copy
+
+        data_layer.insert('projects', {'name': 'Extension'})
+        with data_layer.snapshot() as old:
+            old.execute("SELECT 1").fetchone()
+            assert data_layer._reader_copy is not copy
+            assert old.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 2
+
+            # An open reader keeps its copy when a write makes the next reader copy again
+            data_layer.insert('projects', {'name': 'Loft'})
+            assert len(list(data_layer.iter_query('projects'))) == 3
+            assert old.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 2
+    finally:
+        data_layer.close()
+
+
+def test_memory_databases_are_not_backed_up():
+    data_layer = SQLiteDataLayer(':memory:')
+    data_layer.initialize_schema()
+    maintenance = MaintenanceModule()
+    maintenance.attach(data_layer)
+    try:
+        assert maintenance.backups is None
+        assert maintenance.handle({'action': 'backup'}, data_layer)['success'] is False
+    finally:
+        maintenance.detach()
+        data_layer.close()
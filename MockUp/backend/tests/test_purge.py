@@ -0,0 +1,75 @@
+"""Purging a project clears it from every in-memory cache"""
+
+import time
+from datetime import datetime, timedelta
+
+from modules.automation.scheduler import DueDateScheduler
+from modules.budget.evm import EVMTracker
+from modules.documents.blobs import BlobStore
+from modules.documents.text_index import STATE_TABLE, TextIndexer
+from modules.graph.graph import GraphRegistry
+from modules.maintenance.purge import ProjectPurger
+
+
+def _populate(data_layer, project_id):
+    due = (datetime.utcnow() + timedelta(days=30)).date().isoformat()
+    first = data_layer.insert('tasks', {
+        'project_id': project_id, 'title': 'Pour slab', 'category': 'concrete', 'due_date': due
+    })
+    second = data_layer.insert('tasks', {
+        'project_id': project_id, 'title': 'Frame walls', 'category': 'framing', 'due_date': due,
+        'blocked_by': [first]
+    })
+    item = data_layer.insert('budget_items', {
+        'project_id': project_id, 'category': 'concrete', 'item_name': 'Ready mix', 'estimated_cost': 1000
+    })
+    document = data_layer.insert('documents', {
+        'project_id': project_id, 'filename': 'notes.bin', 'file_path': 'notes.bin',
+        'content_type': 'application/octet-stream'
+    })
+    return [first, second, item, document]
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_purged_records_leave_no_cache_entries(data_layer):
+    project_id = data_layer.insert('projects', {'name': 'Cancelled'})
+    ids = _populate(data_layer, project_id)
+
+    graphs = GraphRegistry(data_layer)
+    graphs.attach()
+    evm = EVMTracker(data_layer)
+    evm.attach()
+    scheduler = DueDateScheduler(data_layer, on_fire=lambda *args: None)
+    scheduler.start()
+    indexer = TextIndexer(data_layer, BlobStore(data_layer))
+    indexer.start()
+    try:
+        graphs.get(project_id)
+        evm.get(project_id)
+        assert set(ids[:2]) <= set(graphs.node_projects)
+        assert set(ids[:3]) <= set(evm.record_projects)
+        assert {('tasks', ids[0]), ('tasks', ids[1])} <= set(scheduler._entries)
+        _wait_for(lambda: data_layer.fetchone(f"SELECT 1 FROM {STATE_TABLE} WHERE document_id = ?", (ids[3],)))
+
+        data_layer.update('projects', project_id, {'deleted_at': datetime.utcnow().isoformat()})
+        assert ProjectPurger(data_layer, batch_size=1).purge(project_id)
+
+        assert project_id not in graphs.graphs and project_id not in graphs.schedules
+        assert not set(ids) & set(graphs.node_projects)
+        assert project_id not in evm.projects
+        assert not set(ids) & set(evm.record_projects)
+        assert not {record_id for _, record_id in scheduler._entries} & set(ids)
+        _wait_for(lambda: not data_layer.fetchone(
+            f"SELECT 1 FROM {STATE_TABLE} WHERE document_id = ?", (ids[3],)
+        ))
+    finally:
+        indexer.stop()
+        scheduler.stop()
+        evm.detach()
+        graphs.detach()
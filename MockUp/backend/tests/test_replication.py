@@ -0,0 +1,86 @@
+"""A standby built from shipped changes matches the primary, through archive moves and promotion"""
+
+import os
+
+from data.sqlite_layer import SQLiteDataLayer
+from modules.documents.blobs import BlobStore
+from modules.replication.shipper import Shipper
+from modules.replication.standby import StandbyApplier, prepare_standby
+
+
+def _attach(data_layer, blobs, document_id, content):
+    """Point a document at new content, starting a new version when it had some"""
+    writer = blobs.open_writer()
+    writer.write(content)
+    with data_layer.transaction():
+        blob = blobs.store(writer)
+        document = data_layer.get('documents', document_id)
+        update = {'blob_hash': blob['hash'], 'file_size': blob['size']}
+        if document['blob_hash']:
+            update['version'] = document['version'] + 1
+        data_layer.update('documents', document_id, update)
+    return blob['hash']
+
+
+def _state(data_layer):
+    """Everything replication must carry, including the trigger-maintained tables"""
+    return {
+        'blobs': data_layer.fetchall("SELECT hash, size_bytes, refcount FROM blobs ORDER BY hash"),
+        'versions': data_layer.fetchall(
+            "SELECT id, document_id, version, blob_hash FROM document_versions ORDER BY id"
+        ),
+        'documents': data_layer.fetchall("SELECT id, project_id, version, blob_hash FROM documents ORDER BY id"),
+        'archived': sorted(data_layer.archive.project_ids())
+    }
+
+
+def test_standby_follows_the_primary_and_takes_over(data_layer, tmp_path):
+    standby_dir = str(tmp_path / 'shipped')
+    blobs = BlobStore(data_layer)
+    shipper = Shipper(data_layer, standby_dir)
+    shipper.start()
+    applier = None
+    try:
+        shipper.ship_once()
+        standby_path = str(tmp_path / 'standby' / 'aven.db')
+        prepare_standby(standby_path, standby_dir, timeout=1)
+        standby = SQLiteDataLayer(standby_path)
+        standby.initialize_schema()
+        standby.read_only = True
+        applier = StandbyApplier(standby, standby_dir, interval_seconds=3600)
+        applier.start()
+
+        # Two projects sharing a drawing; the first document gets a second version
+        finished = data_layer.insert('projects', {'name': 'Finished', 'status': 'completed'})
+        current = data_layer.insert('projects', {'name': 'Current'})
+        old = data_layer.insert('documents', {'project_id': finished, 'filename': 'plan.pdf', 'file_path': 'plan.pdf'})
+        new = data_layer.insert('documents', {'project_id': current, 'filename': 'plan.pdf', 'file_path': 'plan.pdf'})
+        shared = _attach(data_layer, blobs, old, b'plan rev A')
+        _attach(data_layer, blobs, old, b'plan rev B')
+        _attach(data_layer, blobs, new, b'plan rev A')
+        assert data_layer.fetchone("SELECT refcount FROM blobs WHERE hash = ?", (shared,))['refcount'] == 3
+
+        data_layer.archive.archive(finished)
+        shipper.ship_once()
+        applier.apply_pending()
+        assert _state(standby) == _state(data_layer)
+        assert standby.archive.contains(finished)
+
+        data_layer.delete('documents', new)
+        data_layer.archive.restore(finished)
+        shipper.ship_once()
+
+        # Promotion applies what was shipped, and the standby's triggers carry on from there
+        applier.promote()
+        applier = None
+        standby.read_only = False
+        assert _state(standby) == _state(data_layer)
+        assert standby.fetchone("SELECT refcount FROM blobs WHERE hash = ?", (shared,))['refcount'] == 1
+
+        standby.delete('documents', old)
+        assert standby.fetchall("SELECT refcount FROM blobs") == [{'refcount': 0}] * 2
+        standby.close()
+    finally:
+        if applier:
+            applier.stop()
+        shipper.stop()
@@ -0,0 +1,64 @@
+"""Due date triggers fire once per date, however often the record is edited"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.automation.scheduler import DueDateScheduler
+
+
+@pytest.fixture
+def fired(data_layer):
+    """Scheduler whose fires are collected as (trigger, table, record_id)"""
+    calls = []
+    event = threading.Event()
+
+    def on_fire(trigger, table, record_id):
+        calls.append((trigger, table, record_id))
+        event.set()
+
+    scheduler = DueDateScheduler(data_layer, on_fire=on_fire)
+    scheduler.start()
+
+    def wait_for(count):
+        deadline = time.monotonic() + 5
+        while len(calls) < count and time.monotonic() < deadline:
+            event.wait(0.1)
+            event.clear()
+        # Give a spurious extra fire the chance to show up
+        time.sleep(0.2)
+        return calls
+
+    yield wait_for
+    scheduler.stop()
+
+
+def _due_in(hours):
+    return (datetime.utcnow() + timedelta(hours=hours)).isoformat()
+
+
+def test_fires_once_inside_the_lead_window(data_layer, fired):
+    task = data_layer.insert('tasks', {'title': 'Order skip', 'category': 'general', 'due_date': _due_in(12)})
+
+    assert fired(1) == [('due_date_approaching', 'tasks', task)]
+
+
+def test_unrelated_edits_do_not_fire_again(data_layer, fired):
+    task = data_layer.insert('tasks', {'title': 'Order skip', 'category': 'general', 'due_date': _due_in(12)})
+    fired(1)
+
+    data_layer.update('tasks', task, {'title': 'Order two skips'})
+    data_layer.update('tasks', task, {'priority': 'high'})
+
+    assert len(fired(2)) == 1
+
+
+def test_a_new_due_date_fires_again(data_layer, fired):
+    task = data_layer.insert('tasks', {'title': 'Order skip', 'category': 'general', 'due_date': _due_in(12)})
+    fired(1)
+
+    data_layer.update('tasks', task, {'due_date': _due_in(6)})
+
+    assert fired(2) == [('due_date_approaching', 'tasks', task)] * 2
@@ -0,0 +1,66 @@
+"""Sharded storage: global maintenance over every shard, bounded open shards"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from orchestrator import Orchestrator
+
+
+@pytest.fixture
+def orchestrator(tmp_path):
+    orchestrator = Orchestrator({'db_type': 'sqlite', 'db_path': str(tmp_path / 'aven.db'), 'storage': 'sharded'})
+    yield orchestrator
+    orchestrator.shutdown()
+
+
+def _request(orchestrator, module, action, **request):
+    result = orchestrator.handle_request({'module': module, 'action': action, **request})
+    assert result['success'], result
+    return result['data']
+
+
+def test_maintenance_covers_every_shard(orchestrator):
+    past = (datetime.utcnow() - timedelta(days=5)).date().isoformat()
+    projects = [_request(orchestrator, 'projects', 'create', data={'name': f"House {i}"})['id'] for i in range(3)]
+    milestones = [
+        _request(orchestrator, 'milestones', 'create',
+                 data={'project_id': project_id, 'name': 'Roof on', 'target_date': past})['id']
+        for project_id in projects
+    ]
+    assert all('maintenance' not in shard.modules for shard in orchestrator.shards._open.values())
+
+    sweep = _request(orchestrator, 'maintenance', 'run')
+    assert sweep['changes']['milestones.delayed'] == 3
+    for project_id, milestone_id in zip(projects, milestones):
+        assert _request(orchestrator, 'milestones', 'get', id=milestone_id)['status'] == 'delayed'
+
+    backup = orchestrator.modules['maintenance'].backups.run_backup()
+    listed = orchestrator.modules['maintenance'].backups.list_backups()[0]
+    shards_dir = os.path.join(os.path.dirname(backup['path']), listed['shards'])
+    assert sorted(os.listdir(shards_dir)) == sorted(f"{project_id}.db" for project_id in projects)
+
+
+def test_shards_are_evicted(orchestrator):
+    shards = orchestrator.shards
+    shards.max_open = 2
+    projects = [_request(orchestrator, 'projects', 'create', data={'name': f"House {i}"})['id'] for i in range(3)]
+    for project_id in projects:
+        _request(orchestrator, 'contacts', 'create', data={'project_id': project_id, 'name': 'Architect'})
+
+    # The least recently used shard was closed when the third opened
+    assert list(shards._open) == projects[1:]
+    assert shards.shards_evicted == 1
+
+    # A shard in use is kept however idle it looks
+    shards.idle_seconds = 0
+    shard = shards.acquire(projects[1])
+    assert shards.evict() == 1
+    assert list(shards._open) == [projects[1]]
+    shards.release(shard)
+    assert shards.evict() == 1 and not shards._open
+
+    # Evicted shards reopen on the next request
+    contacts = _request(orchestrator, 'contacts', 'list', filters={'project_id': projects[0]})
+    assert [c['name'] for c in contacts] == ['Architect']
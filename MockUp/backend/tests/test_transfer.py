@@ -0,0 +1,89 @@
+"""Project export and import keep document history, and a failed import leaves no files behind"""
+
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from data.sqlite_layer import SQLiteDataLayer
+from modules.documents.blobs import BlobStore
+from modules.documents.versions import history
+from modules.projects.transfer import export_archive, import_archive
+
+
+def _attach(data_layer, blobs, document_id, content):
+    writer = blobs.open_writer()
+    writer.write(content)
+    with data_layer.transaction():
+        blob = blobs.store(writer)
+        document = data_layer.get('documents', document_id)
+        update = {'blob_hash': blob['hash'], 'file_size': blob['size']}
+        if document['blob_hash']:
+            update['version'] = document['version'] + 1
+        data_layer.update('documents', document_id, update)
+    return blob['hash']
+
+
+@pytest.fixture
+def exported(data_layer):
+    """Zip of a project whose drawing has three versions"""
+    blobs = BlobStore(data_layer)
+    project_id = data_layer.insert('projects', {'name': 'Barn conversion'})
+    document_id = data_layer.insert('documents', {
+        'project_id': project_id, 'filename': 'elevations.pdf', 'file_path': 'elevations.pdf'
+    })
+    hashes = [_attach(data_layer, blobs, document_id, content) for content in (b'rev A', b'rev B', b'rev C')]
+    data_layer.insert('materials', {'project_id': project_id, 'item_name': 'Oak cladding'})
+
+    archive = b''.join(export_archive(data_layer, data_layer.get('projects', project_id)))
+    return archive, hashes
+
+
+@pytest.fixture
+def target(tmp_path):
+    """A second database with its own blob store"""
+    data_layer = SQLiteDataLayer(str(tmp_path / 'target' / 'aven.db'))
+    data_layer.initialize_schema()
+    yield data_layer
+    data_layer.close()
+
+
+def test_import_restores_every_version(exported, target):
+    archive, hashes = exported
+    imported = import_archive(target, io.BytesIO(archive))
+    assert imported['counts']['document_versions'] == 2
+
+    document = target.query('documents', {'project_id': imported['project']['id']})[0]
+    versions = history(target, document['id'])
+    assert [(v['version'], v['blob_hash']) for v in versions] == [(3, hashes[2]), (2, hashes[1]), (1, hashes[0])]
+
+    blobs = BlobStore(target)
+    for blob_hash, content in zip(hashes, (b'rev A', b'rev B', b'rev C')):
+        with open(blobs.path(blob_hash), 'rb') as blob:
+            assert blob.read() == content
+    refcounts = {row['hash']: row['refcount'] for row in target.fetchall("SELECT hash, refcount FROM blobs")}
+    # The current content is referenced by the document and its version row
+    assert refcounts == {hashes[0]: 1, hashes[1]: 1, hashes[2]: 2}
+
+
+def test_failed_import_removes_the_blobs_it_stored(exported, target):
+    archive, hashes = exported
+
+    # Materials are restored after documents: a bad row fails the import once the blobs are stored
+    broken = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(archive)) as source, zipfile.ZipFile(broken, 'w') as copy:
+        for name in source.namelist():
+            data = source.read(name)
+            if name == 'materials.ndjson':
+                data = json.dumps({'id': 'm1', 'item_name': None}).encode() + b'\n'
+            copy.writestr(name, data)
+
+    with pytest.raises(Exception):
+        import_archive(target, broken)
+
+    blobs = BlobStore(target)
+    assert not any(os.path.exists(blobs.path(blob_hash)) for blob_hash in hashes)
+    assert target.fetchall("SELECT hash FROM blobs") == []
+    assert target.fetchall("SELECT id FROM projects WHERE name = 'Barn conversion'") == []
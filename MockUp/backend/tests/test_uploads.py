@@ -0,0 +1,79 @@
+"""Chunked upload sessions: expiry and commit against chunk writers"""
+
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.documents.blobs import BlobStore
+from modules.documents.uploads import UploadSessions
+from modules.maintenance.jobs import MaintenanceScheduler
+
+
+@pytest.fixture
+def uploads(data_layer):
+    return UploadSessions(data_layer, BlobStore(data_layer))
+
+
+def _session(data_layer, uploads, size):
+    document_id = data_layer.insert('documents', {
+        'project_id': 'default-project', 'filename': 'plan.pdf', 'file_path': 'plan.pdf'
+    })
+    return uploads.create(document_id, size)
+
+
+def test_expired_sessions_are_closed_and_swept(data_layer, uploads):
+    session = _session(data_layer, uploads, 4096)
+    staged = uploads.staged_path(session['id'])
+    assert os.path.getsize(staged) == 4096
+
+    past = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+    data_layer.update('upload_sessions', session['id'], {'expires_at': past})
+    with pytest.raises(ValueError, match='expired'):
+        uploads.open_chunk(session['id'], 0)
+
+    sweep = MaintenanceScheduler(data_layer).run_once()
+    assert sweep['changes']['upload_sessions.expired'] == 1
+    assert uploads.get(session['id'])['status'] == 'expired'
+    assert not os.path.exists(staged)
+
+
+def _attach(data_layer, calls):
+    """commit() callback storing the blob and recording what it saw"""
+    def attach(stage, session):
+        with data_layer.transaction():
+            calls.append(stage())
+        return {'success': True}
+    return attach
+
+
+def test_commit_waits_for_open_chunk_writers(data_layer, uploads):
+    body = b'floor plan' * 100
+    session = _session(data_layer, uploads, len(body))
+    writer = uploads.open_chunk(session['id'], 0)
+    writer.write(body)
+    uploads.finish_chunk(writer, hashlib.sha256(body).hexdigest())
+
+    # A retried chunk is still open: its bytes could land after the hash or in the blob
+    retry = uploads.open_chunk(session['id'], 0)
+    with pytest.raises(ValueError, match='still being written'):
+        uploads.commit(session['id'], _attach(data_layer, []))
+    retry.write(body)
+    retry.discard()
+
+    calls = []
+
+    def attach(stage, session):
+        with pytest.raises(ValueError, match='being committed'):
+            uploads.open_chunk(session['id'], 0)
+        return _attach(data_layer, calls)(stage, session)
+
+    uploads.commit(session['id'], attach)
+    assert calls == [{'hash': hashlib.sha256(body).hexdigest(), 'size': len(body)}]
+
+    # The staged file is now the blob: no writer can open it again
+    with pytest.raises(ValueError):
+        uploads.open_chunk(session['id'], 0)
+    with open(uploads.blobs.path(calls[0]['hash']), 'rb') as blob:
+        assert blob.read() == body
@@ -140,52 +140,61 @@ UK_BUILD_PHASES = [
     }
 ]
 
-# Budget Categories (Standard UK self-build)
+# Budget Categories (Standard UK self-build), with the build phases each is paid against
 UK_BUDGET_CATEGORIES = [
     {
         'id': 'land',
         'name': 'Land & Legal',
-        'description': 'Land purchase, legal fees, stamp duty'
+        'description': 'Land purchase, legal fees, stamp duty',
+        'phases': ['pre-planning']
     },
     {
         'id': 'professional-fees',
         'name': 'Professional Fees',
-        'description': 'Architect, structural engineer, surveyors, planning consultants'
+        'description': 'Architect, structural engineer, surveyors, planning consultants',
+        'phases': ['planning-application', 'building-regs']
     },
     {
         'id': 'groundworks',
         'name': 'Groundworks',
-        'description': 'Excavation, foundations, drainage'
+        'description': 'Excavation, foundations, drainage',
+        'phases': ['groundworks', 'substructure']
     },
     {
         'id': 'structure',
         'name': 'Structure',
-        'description': 'Walls, roof, structural elements'
+        'description': 'Walls, roof, structural elements',
+        'phases': ['superstructure', 'external-envelope']
     },
     {
         'id': 'external-works',
         'name': 'External Works',
-        'description': 'Landscaping, driveway, boundary walls'
+        'description': 'Landscaping, driveway, boundary walls',
+        'phases': ['finishes', 'snagging']
     },
     {
         'id': 'mep',
         'name': 'M&E (Mechanical & Electrical)',
-        'description': 'Plumbing, heating, electrics, renewables'
+        'description': 'Plumbing, heating, electrics, renewables',
+        'phases': ['first-fix-electrics', 'first-fix-plumbing', 'second-fix-electrics', 'second-fix-plumbing']
     },
     {
         'id': 'finishes',
         'name': 'Finishes',
-        'description': 'Flooring, tiling, painting, decorating'
+        'description': 'Flooring, tiling, painting, decorating',
+        'phases': ['plastering', 'finishes']
     },
     {
         'id': 'kitchen-bathrooms',
         'name': 'Kitchen & Bathrooms',
-        'description': 'Fitted kitchens, bathroom suites, sanitaryware'
+        'description': 'Fitted kitchens, bathroom suites, sanitaryware',
+        'phases': ['second-fix-carpentry', 'second-fix-plumbing']
     },
     {
         'id': 'contingency',
         'name': 'Contingency',
-        'description': 'Reserve fund for unforeseen costs (typically 10-15%)'
+        'description': 'Reserve fund for unforeseen costs (typically 10-15%)',
+        'phases': []
     }
 ]
 